@@ -1,17 +1,16 @@
 from scipy.spatial import Voronoi
-from voronoi_mapper.geojson import (
-    load_mask_geojson,
-    load_points_and_features_from_geojson,
-)
+from voronoi_mapper.cache import StageCache, load_mask_geojson_cached, load_sites_cached
 from voronoi_mapper.models import BoundingBox
 from voronoi_mapper.plot import plot_voronoi
 
 if __name__ == "__main__":
     POINTS_GEOJSON_PATH = "./_data/points.geojson"
     BOUNDARY_GEOJSON_PATH = "./_data/wales.geojson"
+    CACHE_DIR = "./_data/_cache"
 
-    points, _ = load_points_and_features_from_geojson(geojson_path=POINTS_GEOJSON_PATH)
-    mask = load_mask_geojson(geojson_path=BOUNDARY_GEOJSON_PATH)
+    cache = StageCache(directory=CACHE_DIR)
+    points, _ = load_sites_cached(file_path=POINTS_GEOJSON_PATH, cache=cache)
+    mask = load_mask_geojson_cached(geojson_path=BOUNDARY_GEOJSON_PATH, cache=cache)
 
     bounding_box = BoundingBox(xmin=-6, xmax=-1, ymin=51, ymax=54)
 
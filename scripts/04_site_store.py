@@ -0,0 +1,19 @@
+from voronoi_mapper.site_store import convert_geojson_to_site_store
+from voronoi_mapper.voronoi import voronoi_map
+
+if __name__ == "__main__":
+    POINTS_GEOJSON_PATH = "./_data/points.geojson"
+    POINTS_SITE_STORE_PATH = "./_data/points.sites"
+    BOUNDARY_GEOJSON_PATH = "./_data/wales.geojson"
+    GEOJSON_SAVE_PATH = "./_data/wales_parkrun_polygons.geojson"
+
+    convert_geojson_to_site_store(
+        geojson_path=POINTS_GEOJSON_PATH, store_path=POINTS_SITE_STORE_PATH
+    )
+
+    # later runs can start from the memory mapped store
+    voronoi_map(
+        features_file_path=POINTS_SITE_STORE_PATH,
+        boundary_file_path=BOUNDARY_GEOJSON_PATH,
+        save_path=GEOJSON_SAVE_PATH,
+    )
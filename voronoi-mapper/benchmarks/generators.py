@@ -0,0 +1,107 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+
+
+def make_island_mask(
+    n_vertices: int = 2000, radius: float = 100.0, seed: int = 0
+) -> Polygon:
+    """Make a star-shaped polygon with a rough, coast-like outline.
+
+    The outline is a circle whose radius is perturbed by a sum of random sines,
+    with high frequencies damped so the outline is rough but not self-intersecting.
+    It is centred away from the origin so all coordinates are positive, like
+    projected coordinates.
+    """
+    rng = np.random.default_rng(seed)
+    angles = np.linspace(0, 2 * np.pi, n_vertices, endpoint=False)
+    frequencies = np.arange(2, 64)
+    amplitudes = rng.uniform(0, 0.15, len(frequencies)) / np.sqrt(frequencies)
+    phases = rng.uniform(0, 2 * np.pi, len(frequencies))
+    radii = radius * (
+        1
+        + np.sum(
+            amplitudes[:, None]
+            * np.sin(frequencies[:, None] * angles[None] + phases[:, None]),
+            axis=0,
+        )
+    )
+    center = 2 * radius
+    return Polygon(
+        np.column_stack(
+            [center + radii * np.cos(angles), center + radii * np.sin(angles)]
+        )
+    )
+
+
+def generate_uniform_sites(n_sites: int, mask: Polygon, seed: int = 0) -> np.ndarray:
+    """Scatter sites uniformly over the bounds of the mask."""
+    rng = np.random.default_rng(seed)
+    xmin, ymin, xmax, ymax = mask.bounds
+    return rng.uniform([xmin, ymin], [xmax, ymax], size=(n_sites, 2))
+
+
+def generate_clustered_sites(
+    n_sites: int, mask: Polygon, n_clusters: int = 20, seed: int = 0
+) -> np.ndarray:
+    """Scatter sites in Gaussian clusters of uneven size, like towns of a region."""
+    rng = np.random.default_rng(seed)
+    xmin, ymin, xmax, ymax = mask.bounds
+    centers = rng.uniform([xmin, ymin], [xmax, ymax], size=(n_clusters, 2))
+    spreads = rng.uniform(0.01, 0.08, n_clusters) * (xmax - xmin)
+    weights = rng.pareto(1.5, n_clusters) + 1
+
+    clusters = rng.choice(n_clusters, size=n_sites, p=weights / weights.sum())
+    return centers[clusters] + rng.normal(size=(n_sites, 2)) * spreads[clusters, None]
+
+
+def generate_coastline_sites(
+    n_sites: int, mask: Polygon, width: float = 0.02, seed: int = 0
+) -> np.ndarray:
+    """Scatter sites in a narrow band along the outline of the mask.
+
+    This puts most cells across the mask boundary, the worst case for clipping.
+    """
+    rng = np.random.default_rng(seed)
+    outline = mask.exterior
+    xmin, ymin, xmax, ymax = mask.bounds
+    along = shapely.line_interpolate_point(
+        outline, rng.uniform(0, 1, n_sites), normalized=True
+    )
+    offsets = rng.normal(size=(n_sites, 2)) * width * (xmax - xmin)
+    return shapely.get_coordinates(along) + offsets
+
+
+GENERATORS = {
+    "uniform": generate_uniform_sites,
+    "clustered": generate_clustered_sites,
+    "coastline": generate_coastline_sites,
+}
+
+
+def write_sites_geojson(points: np.ndarray, geojson_path: Path | str):
+    """Write sites as a GeoJSON FeatureCollection of points with an id property."""
+    with open(geojson_path, "w") as f:
+        f.write('{"type": "FeatureCollection", "features": [')
+        for index, (x, y) in enumerate(points.tolist()):
+            feature = {
+                "type": "Feature",
+                "properties": {"id": index},
+                "geometry": {"type": "Point", "coordinates": [x, y]},
+            }
+            f.write(("," if index else "") + json.dumps(feature))
+        f.write("]}")
+
+
+def write_mask_geojson(mask: Polygon, geojson_path: Path | str):
+    """Write the mask as a GeoJSON FeatureCollection with a single feature."""
+    feature = {
+        "type": "Feature",
+        "properties": {},
+        "geometry": json.loads(shapely.to_geojson(mask)),
+    }
+    with open(geojson_path, "w") as f:
+        json.dump({"type": "FeatureCollection", "features": [feature]}, f)
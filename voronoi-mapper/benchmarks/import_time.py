@@ -0,0 +1,116 @@
+"""Time importing the pipeline modules, each in a fresh interpreter.
+
+Run from the voronoi-mapper directory, for example:
+
+    python -m benchmarks.import_time --budget 1.0
+
+Exits with an error when a module takes longer than --budget seconds to
+import, or when importing it loads a dependency that should only load on
+demand, such as matplotlib or geopandas.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from benchmarks.run_benchmarks import get_machine_info
+
+DEFAULT_MODULES = [
+    "voronoi_mapper.voronoi",
+    "voronoi_mapper.batch",
+    "voronoi_mapper.incremental",
+]
+
+# only plotting, GeoDataFrames and the binary formats need these
+LAZY_MODULES = ["matplotlib", "geopandas", "pandas", "pyarrow", "pyogrio"]
+
+_IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "modules": list(sys.modules)}}))
+"""
+
+
+@dataclass
+class ImportResult:
+    module: str
+    seconds: float
+    lazy_modules_loaded: list[str]
+
+
+def measure_import(module: str, repeats: int = 5) -> ImportResult:
+    """Import a module in `repeats` new interpreters, keeping the fastest time."""
+    runs = []
+    for _ in range(repeats):
+        completed = subprocess.run(
+            [sys.executable, "-c", _IMPORT_SCRIPT.format(module=module)],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        runs.append(json.loads(completed.stdout))
+
+    loaded = set(runs[0]["modules"])
+    return ImportResult(
+        module=module,
+        seconds=min(run["seconds"] for run in runs),
+        lazy_modules_loaded=[name for name in LAZY_MODULES if name in loaded],
+    )
+
+
+def find_problems(results: list[ImportResult], budget: float) -> list[str]:
+    """Describe the imports over the time budget or loading lazy dependencies."""
+    problems = []
+    for result in results:
+        if result.seconds > budget:
+            problems.append(
+                f"{result.module}: {result.seconds:.3f}s is over the {budget:.3f}s budget"
+            )
+        if result.lazy_modules_loaded:
+            problems.append(
+                f"{result.module}: loads {', '.join(result.lazy_modules_loaded)}"
+            )
+    return problems
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=1.0)
+    parser.add_argument("--output", type=Path, help="Write the results as JSON here.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+
+    results = []
+    for module in args.modules:
+        result = measure_import(module=module, repeats=args.repeats)
+        print(f"{result.module:>30} {result.seconds:8.3f}s", file=sys.stderr)
+        results.append(result)
+
+    report = {
+        "machine": get_machine_info(),
+        "results": [asdict(result) for result in results],
+    }
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    problems = find_problems(results=results, budget=args.budget)
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
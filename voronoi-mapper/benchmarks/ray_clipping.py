@@ -0,0 +1,159 @@
+"""Time clipping rays to a bounding box, the array clipper against the per-ray function.
+
+Run from the voronoi-mapper directory, for example:
+
+    python -m benchmarks.ray_clipping --rays 1000000 --legacy-rays 100000
+
+The per-ray function is timed on the first --legacy-rays rays only, and its
+rate is compared with the array clipper on all of them.
+"""
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+from benchmarks.run_benchmarks import get_machine_info
+from voronoi_mapper.geometry import (
+    get_intersection_with_bounding_box,
+    get_intersections_with_bounding_box,
+)
+from voronoi_mapper.models import BoundingBox, IntersectionException
+
+DEFAULT_RAYS = 2_000_000
+
+# the per-ray function manages around a hundred thousand rays per second
+DEFAULT_LEGACY_RAYS = 200_000
+
+BOUNDING_BOX = BoundingBox(xmin=0, xmax=100, ymin=0, ymax=100)
+
+
+@dataclass
+class RayClippingResult:
+    method: str
+    n_rays: int
+    wall_seconds: float
+    rays_per_second: float
+    failures: int
+
+
+def make_rays(
+    n_rays: int, bounding_box: BoundingBox = BOUNDING_BOX, seed: int = 0
+) -> tuple[np.ndarray, np.ndarray]:
+    """Make unit rays starting inside the bounding box.
+
+    A quarter of them point along an axis and another quarter are within a
+    rounding error of one. Rays starting within a unit of an edge pass their
+    second point outside the box, which the per-ray function cannot handle.
+    """
+    rng = np.random.default_rng(seed)
+    origins = rng.uniform(
+        [bounding_box.xmin, bounding_box.ymin],
+        [bounding_box.xmax, bounding_box.ymax],
+        size=(n_rays, 2),
+    )
+
+    angles = rng.uniform(0, 2 * np.pi, size=n_rays)
+    kinds = rng.integers(0, 4, size=n_rays)
+    axis_angles = rng.integers(0, 4, size=n_rays) * (np.pi / 2)
+    angles[kinds == 0] = axis_angles[kinds == 0]
+    nudges = rng.choice([-1e-15, 1e-15], size=n_rays)
+    angles[kinds == 1] = axis_angles[kinds == 1] + nudges[kinds == 1]
+
+    directions = np.column_stack([np.cos(angles), np.sin(angles)])
+    # cos and sin of right angles are only close to 0
+    directions[kinds == 0] = np.round(directions[kinds == 0])
+    return origins, directions
+
+
+def time_legacy(
+    origins: np.ndarray, directions: np.ndarray, bounding_box: BoundingBox
+) -> RayClippingResult:
+    failures = 0
+    start = time.perf_counter()
+    for origin, direction in zip(origins.tolist(), directions.tolist()):
+        try:
+            get_intersection_with_bounding_box(
+                coordinates=(
+                    origin,
+                    [origin[0] + direction[0], origin[1] + direction[1]],
+                ),
+                bounding_box=bounding_box,
+            )
+        except IntersectionException:
+            failures += 1
+    wall_seconds = time.perf_counter() - start
+
+    return RayClippingResult(
+        method="per_ray",
+        n_rays=len(origins),
+        wall_seconds=wall_seconds,
+        rays_per_second=len(origins) / wall_seconds,
+        failures=failures,
+    )
+
+
+def time_array(
+    origins: np.ndarray, directions: np.ndarray, bounding_box: BoundingBox
+) -> RayClippingResult:
+    start = time.perf_counter()
+    _, edge_codes = get_intersections_with_bounding_box(
+        origins=origins, directions=directions, bounding_box=bounding_box
+    )
+    wall_seconds = time.perf_counter() - start
+
+    return RayClippingResult(
+        method="array",
+        n_rays=len(origins),
+        wall_seconds=wall_seconds,
+        rays_per_second=len(origins) / wall_seconds,
+        failures=int(np.count_nonzero(edge_codes < 0)),
+    )
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rays", type=int, default=DEFAULT_RAYS)
+    parser.add_argument("--legacy-rays", type=int, default=DEFAULT_LEGACY_RAYS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Write the results as JSON here.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    origins, directions = make_rays(n_rays=args.rays, seed=args.seed)
+    n_legacy = min(args.legacy_rays, args.rays)
+
+    results = [
+        time_legacy(
+            origins=origins[:n_legacy],
+            directions=directions[:n_legacy],
+            bounding_box=BOUNDING_BOX,
+        ),
+        time_array(origins=origins, directions=directions, bounding_box=BOUNDING_BOX),
+    ]
+    for result in results:
+        print(
+            f"{result.method:>8} {result.n_rays:>9} {result.wall_seconds:8.3f}s "
+            f"{result.rays_per_second:14,.0f} rays/s {result.failures:>7} failed",
+            file=sys.stderr,
+        )
+
+    report = {
+        "machine": get_machine_info(),
+        "results": [asdict(result) for result in results],
+    }
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,292 @@
+"""Time every stage of the Voronoi mapping pipeline on synthetic site sets.
+
+Run from the voronoi-mapper directory, for example:
+
+    python -m benchmarks.run_benchmarks --sizes 1000 10000 --output results.json
+
+Pass a previous results file as --baseline to exit with an error when any
+stage got slower than the tolerance allows.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import warnings
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import scipy
+import shapely
+from scipy.spatial import Voronoi
+from benchmarks.generators import (
+    GENERATORS,
+    make_island_mask,
+    write_mask_geojson,
+    write_sites_geojson,
+)
+from voronoi_mapper.geojson import load_mask_geojson, load_sites_from_geojson
+from voronoi_mapper.geometry import (
+    PreparedMask,
+    clip_polygons_to_mask,
+    match_points_to_polygons,
+)
+from voronoi_mapper.instrumentation import StageEvent, StageReport, measure_stage
+from voronoi_mapper.voronoi import (
+    create_geodataframe_from_cells_and_properties,
+    get_bounding_box_from_points,
+    get_cells_from_voronoi,
+    get_line_segment_arrays_from_voronoi,
+    get_polygons_from_voronoi,
+)
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+# polygonize and matching are the legacy path and slow down sharply with size
+DEFAULT_LEGACY_MAX_SITES = 100_000
+
+
+@dataclass
+class StageResult:
+    distribution: str
+    n_sites: int
+    stage: str
+    wall_seconds: float
+    cpu_seconds: float
+    items: int
+    peak_bytes: int | None = None
+
+
+def run_pipeline(
+    points_path: Path,
+    mask_path: Path,
+    save_path: Path,
+    run_legacy_stages: bool,
+    report: StageReport,
+) -> StageReport:
+    """Run the pipeline stage by stage, as voronoi_map does."""
+
+    with measure_stage(report, "load") as stage:
+        points, properties = load_sites_from_geojson(geojson_path=points_path)
+        mask = load_mask_geojson(geojson_path=mask_path)
+        stage.items = len(points)
+
+    with measure_stage(report, "voronoi") as stage:
+        voronoi = Voronoi(points)
+        stage.items = len(voronoi.vertices)
+
+    # the segment stages need every Voronoi vertex inside the box
+    bounding_box = get_bounding_box_from_points(
+        points=np.concatenate([points, voronoi.vertices]), mask=mask
+    )
+
+    with measure_stage(report, "segments") as stage:
+        segments = get_line_segment_arrays_from_voronoi(
+            voronoi=voronoi, bounding_box=bounding_box
+        )
+        stage.items = len(segments.segments)
+
+    if run_legacy_stages:
+        with measure_stage(report, "polygonize") as stage:
+            polygons = list(
+                get_polygons_from_voronoi(voronoi=voronoi, bounding_box=bounding_box)
+            )
+            stage.items = len(polygons)
+
+        with measure_stage(report, "matching") as stage:
+            point_indices, _ = match_points_to_polygons(
+                points=points, polygons=polygons
+            )
+            stage.items = len(point_indices)
+
+    with measure_stage(report, "cells") as stage:
+        cells = get_cells_from_voronoi(voronoi=voronoi, bounding_box=bounding_box)
+        gdf = create_geodataframe_from_cells_and_properties(
+            cells=cells, properties=properties
+        )
+        stage.items = len(gdf)
+
+    with measure_stage(report, "clip") as stage:
+        gdf = clip_polygons_to_mask(gdf=gdf, mask=PreparedMask(mask=mask))
+        stage.items = len(gdf)
+
+    with measure_stage(report, "write") as stage:
+        gdf.to_file(save_path, driver="GeoJSON")
+        stage.items = len(gdf)
+
+    return report
+
+
+def run_benchmark(
+    distribution: str,
+    n_sites: int,
+    directory: Path,
+    mask_vertices: int = 2000,
+    legacy_max_sites: int = DEFAULT_LEGACY_MAX_SITES,
+    trace_memory: bool = True,
+    seed: int = 0,
+) -> list[StageResult]:
+    """Benchmark one synthetic site set, returning a result per stage.
+
+    Stages are timed on a first run without tracemalloc, as tracing slows down
+    allocation heavy stages. Peak memory comes from a second, traced run.
+    """
+    mask = make_island_mask(n_vertices=mask_vertices, seed=seed)
+    points = GENERATORS[distribution](n_sites=n_sites, mask=mask, seed=seed)
+
+    points_path = directory / f"{distribution}_{n_sites}.geojson"
+    mask_path = directory / "mask.geojson"
+    save_path = directory / f"{distribution}_{n_sites}_cells.geojson"
+    write_sites_geojson(points=points, geojson_path=points_path)
+    write_mask_geojson(mask=mask, geojson_path=mask_path)
+
+    def run(report: StageReport) -> list[StageEvent]:
+        save_path.unlink(missing_ok=True)
+        return run_pipeline(
+            points_path=points_path,
+            mask_path=mask_path,
+            save_path=save_path,
+            run_legacy_stages=n_sites <= legacy_max_sites,
+            report=report,
+        ).events
+
+    timings = run(report=StageReport())
+    peaks = {}
+    if trace_memory:
+        peaks = {
+            event.stage: event.peak_bytes
+            for event in run(report=StageReport(trace_memory=True))
+        }
+
+    return [
+        StageResult(
+            distribution=distribution,
+            n_sites=n_sites,
+            stage=event.stage,
+            wall_seconds=event.wall_seconds,
+            cpu_seconds=event.cpu_seconds,
+            items=event.items,
+            peak_bytes=peaks.get(event.stage),
+        )
+        for event in timings
+    ]
+
+
+def get_machine_info() -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "shapely": shapely.__version__,
+        "geos": shapely.geos_version_string,
+    }
+
+
+def find_regressions(
+    results: list[dict], baseline: list[dict], tolerance: float, min_seconds: float
+) -> list[str]:
+    """Describe the stages that took over (1 + tolerance) times their baseline time.
+
+    Stages faster than `min_seconds` in the baseline are too noisy to compare.
+    """
+    baseline_times = {
+        (result["distribution"], result["n_sites"], result["stage"]): result[
+            "wall_seconds"
+        ]
+        for result in baseline
+    }
+    regressions = []
+    for result in results:
+        key = (result["distribution"], result["n_sites"], result["stage"])
+        baseline_time = baseline_times.get(key)
+        if baseline_time is None or baseline_time < min_seconds:
+            continue
+        if result["wall_seconds"] > baseline_time * (1 + tolerance):
+            regressions.append(
+                f"{key[0]} {key[1]} {key[2]}: "
+                f"{baseline_time:.3f}s -> {result['wall_seconds']:.3f}s"
+            )
+    return regressions
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument(
+        "--distributions", nargs="+", choices=list(GENERATORS), default=list(GENERATORS)
+    )
+    parser.add_argument("--mask-vertices", type=int, default=2000)
+    parser.add_argument(
+        "--legacy-max-sites",
+        type=int,
+        default=DEFAULT_LEGACY_MAX_SITES,
+        help="Largest site count to run the polygonize and matching stages for.",
+    )
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Write the results as JSON here.")
+    parser.add_argument("--baseline", type=Path, help="Results to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--min-seconds", type=float, default=0.05)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    # synthetic sites have no CRS to write out
+    warnings.filterwarnings("ignore", message="'crs' was not provided")
+
+    results = []
+    with TemporaryDirectory() as directory:
+        for distribution in args.distributions:
+            for n_sites in args.sizes:
+                for result in run_benchmark(
+                    distribution=distribution,
+                    n_sites=n_sites,
+                    directory=Path(directory),
+                    mask_vertices=args.mask_vertices,
+                    legacy_max_sites=args.legacy_max_sites,
+                    trace_memory=not args.no_memory,
+                    seed=args.seed,
+                ):
+                    print(
+                        f"{result.distribution:>10} {result.n_sites:>8} "
+                        f"{result.stage:>10} {result.wall_seconds:8.3f}s"
+                        + (
+                            ""
+                            if result.peak_bytes is None
+                            else f" {result.peak_bytes / 2**20:9.1f} MiB"
+                        ),
+                        file=sys.stderr,
+                    )
+                    results.append(asdict(result))
+
+    report = {"machine": get_machine_info(), "results": results}
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = find_regressions(
+            results=results,
+            baseline=baseline,
+            tolerance=args.tolerance,
+            min_seconds=args.min_seconds,
+        )
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""Measure the peak memory of streamed runs as the site count grows.
+
+Run from the voronoi-mapper directory, for example:
+
+    python -m benchmarks.streaming_memory --sizes 100000 300000 1000000
+
+Every run maps memory mapped sites in a fresh interpreter and reports its peak
+resident set size. Exits with an error when the peak of the largest run is over
+(1 + --max-growth) times the peak of the smallest one. Pass --eager to measure
+runs without a chunk size alongside.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import shapely
+from benchmarks.generators import (
+    generate_uniform_sites,
+    make_island_mask,
+    write_mask_geojson,
+)
+from benchmarks.run_benchmarks import get_machine_info
+from voronoi_mapper.site_store import write_site_store
+
+DEFAULT_SIZES = [100_000, 300_000, 1_000_000]
+
+_RUN_SCRIPT = """
+import json, resource, time
+from voronoi_mapper.models import BoundingBox
+from voronoi_mapper.voronoi import voronoi_map
+start = time.perf_counter()
+voronoi_map(
+    features_file_path={sites_path!r},
+    boundary_file_path={mask_path!r},
+    bounding_box=BoundingBox(**{bounding_box!r}),
+    save_path={save_path!r},
+    chunk_size={chunk_size!r},
+)
+seconds = time.perf_counter() - start
+peak_bytes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+print(json.dumps({{"seconds": seconds, "peak_bytes": peak_bytes}}))
+"""
+
+
+@dataclass
+class MemoryResult:
+    n_sites: int
+    chunk_size: int | None
+    seconds: float
+    peak_bytes: int
+
+
+def measure_run(
+    sites_path: Path,
+    mask_path: Path,
+    bounding_box: dict[str, float],
+    save_path: Path,
+    chunk_size: int | None,
+) -> dict:
+    """Map the sites in a new interpreter, returning its time and peak memory."""
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            _RUN_SCRIPT.format(
+                sites_path=str(sites_path),
+                mask_path=str(mask_path),
+                bounding_box=bounding_box,
+                save_path=str(save_path),
+                chunk_size=chunk_size,
+            ),
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return json.loads(completed.stdout)
+
+
+def run_benchmark(
+    n_sites: int,
+    chunk_size: int | None,
+    directory: Path,
+    mask_vertices: int = 2000,
+    seed: int = 0,
+) -> MemoryResult:
+    mask = make_island_mask(n_vertices=mask_vertices, seed=seed)
+    sites_path = directory / f"uniform_{n_sites}.sites"
+    mask_path = directory / "mask.geojson"
+    if not sites_path.exists():
+        points = generate_uniform_sites(n_sites=n_sites, mask=mask, seed=seed)
+        write_site_store(store_path=sites_path, points=points)
+    write_mask_geojson(mask=mask, geojson_path=mask_path)
+
+    # the default box of an eager run needs the full diagram, so both get this one
+    xmin, ymin, xmax, ymax = map(float, shapely.buffer(mask, 1).bounds)
+    run = measure_run(
+        sites_path=sites_path,
+        mask_path=mask_path,
+        bounding_box={"xmin": xmin, "xmax": xmax, "ymin": ymin, "ymax": ymax},
+        save_path=directory / f"cells_{n_sites}_{chunk_size}.arrow",
+        chunk_size=chunk_size,
+    )
+    return MemoryResult(
+        n_sites=n_sites,
+        chunk_size=chunk_size,
+        seconds=run["seconds"],
+        peak_bytes=run["peak_bytes"],
+    )
+
+
+def find_growth(results: list[MemoryResult], max_growth: float) -> list[str]:
+    """Describe streamed runs peaking over (1 + max_growth) times the smallest one."""
+    streamed = sorted(
+        (result for result in results if result.chunk_size is not None),
+        key=lambda result: result.n_sites,
+    )
+    if len(streamed) < 2:
+        return []
+    smallest, largest = streamed[0], streamed[-1]
+    if largest.peak_bytes <= smallest.peak_bytes * (1 + max_growth):
+        return []
+    return [
+        f"{smallest.n_sites} -> {largest.n_sites} sites: "
+        f"{smallest.peak_bytes / 2**20:.1f} MiB -> {largest.peak_bytes / 2**20:.1f} MiB"
+    ]
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--eager", action="store_true")
+    parser.add_argument("--mask-vertices", type=int, default=2000)
+    parser.add_argument("--max-growth", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Write the results as JSON here.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    chunk_sizes = [args.chunk_size, None] if args.eager else [args.chunk_size]
+
+    results = []
+    with TemporaryDirectory() as directory:
+        for n_sites in args.sizes:
+            for chunk_size in chunk_sizes:
+                result = run_benchmark(
+                    n_sites=n_sites,
+                    chunk_size=chunk_size,
+                    directory=Path(directory),
+                    mask_vertices=args.mask_vertices,
+                    seed=args.seed,
+                )
+                print(
+                    f"{result.n_sites:>8} {str(result.chunk_size):>8} "
+                    f"{result.seconds:8.3f}s {result.peak_bytes / 2**20:9.1f} MiB",
+                    file=sys.stderr,
+                )
+                results.append(result)
+
+    report = {
+        "machine": get_machine_info(),
+        "results": [asdict(result) for result in results],
+    }
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    problems = find_growth(results=results, max_growth=args.max_growth)
+    for problem in problems:
+        print(f"Peak memory grew: {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
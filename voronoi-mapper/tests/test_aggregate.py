@@ -0,0 +1,171 @@
+import json
+import os
+
+import numpy as np
+import pytest
+from scipy.spatial import Voronoi
+from shapely.geometry import box
+from voronoi_mapper.aggregate import aggregate_events
+from voronoi_mapper.geometry import PreparedMask
+from voronoi_mapper.locate import SiteLocator
+from voronoi_mapper.models import BoundingBox
+from voronoi_mapper.voronoi import get_cells_from_voronoi
+
+
+@pytest.fixture
+def locator():
+    sites = np.random.default_rng(4).random((50, 2)) * 10
+    bounding_box = BoundingBox(xmin=-1, xmax=11, ymin=-1, ymax=11)
+    mask = box(1, 1, 9, 9)
+    cells = get_cells_from_voronoi(voronoi=Voronoi(sites), bounding_box=bounding_box)
+    return SiteLocator(
+        sites=sites,
+        cells=cells,
+        clipped=PreparedMask(mask=mask).clip(cells=cells),
+        mask=mask,
+        bounding_box=bounding_box,
+    )
+
+
+@pytest.fixture
+def events():
+    rng = np.random.default_rng(5)
+    points = rng.uniform(0, 10, size=(1000, 2))
+    values = rng.normal(size=len(points))
+    values[rng.random(len(points)) < 0.2] = np.nan
+    return points, values
+
+
+@pytest.fixture
+def events_csv_path(temp_directory, events):
+    pytest.importorskip("pyarrow")
+    points, values = events
+    file_path = os.path.join(temp_directory, "events.csv")
+    with open(file_path, "w") as f:
+        f.write("lon,lat,value\n")
+        for (lon, lat), value in zip(points.tolist(), values.tolist()):
+            f.write(f"{lon!r},{lat!r},{'' if np.isnan(value) else repr(value)}\n")
+    return file_path
+
+
+def _expected_statistics(locator, points, values):
+    sites = locator.locate(points=points, max_workers=1)
+    expected = {key: [] for key in ("count", "sum", "mean", "min", "max")}
+    for site in range(len(locator.site_status)):
+        site_values = values[(sites == site) & ~np.isnan(values)]
+        expected["count"].append(np.sum(sites == site))
+        for statistic in ("sum", "mean", "min", "max"):
+            expected[statistic].append(
+                getattr(np, statistic)(site_values) if len(site_values) else np.nan
+            )
+    return expected
+
+
+@pytest.mark.parametrize("chunk_size, max_workers", [(1_000_000, 1), (77, 2)])
+def test_aggregate_events(locator, events, events_csv_path, chunk_size, max_workers):
+    totals = aggregate_events(
+        events_file_path=events_csv_path,
+        locator=locator,
+        columns=["value"],
+        statistics=["sum", "mean", "min", "max"],
+        chunk_size=chunk_size,
+        max_workers=max_workers,
+    )
+    expected = _expected_statistics(locator, *events)
+
+    assert len(totals) == len(locator.site_status)
+    assert list(totals.columns) == [
+        "event_count",
+        "value_sum",
+        "value_mean",
+        "value_min",
+        "value_max",
+    ]
+    assert totals.columns["event_count"].tolist() == expected["count"]
+    # cells outside the mask get no events
+    assert totals.columns["event_count"].sum() < len(events[0])
+    for statistic in ("sum", "mean", "min", "max"):
+        np.testing.assert_allclose(
+            totals.columns[f"value_{statistic}"], expected[statistic]
+        )
+
+
+def test_aggregate_events_count_only(locator, events, events_csv_path):
+    totals = aggregate_events(
+        events_file_path=events_csv_path, locator=locator, max_workers=1
+    )
+    assert list(totals.columns) == ["event_count"]
+    assert totals.columns["event_count"].tolist() == (
+        _expected_statistics(locator, *events)["count"]
+    )
+
+
+def test_aggregate_events_missing_properties(locator, temp_directory):
+    file_path = os.path.join(temp_directory, "events.geojson")
+    features = [
+        {"type": "Feature", "geometry": {"type": "Point", "coordinates": [5, 5]}},
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [5, 5]},
+            "properties": {"value": 2},
+        },
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [5, 5]},
+            "properties": {"value": None},
+        },
+    ]
+    with open(file_path, "w") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+
+    totals = aggregate_events(
+        events_file_path=file_path,
+        locator=locator,
+        columns=["value"],
+        statistics=["mean", "max"],
+        chunk_size=1,
+        max_workers=1,
+    )
+
+    (site,) = locator.locate(points=[[5, 5]], max_workers=1)
+    assert totals.columns["event_count"][site] == 3
+    assert totals.columns["value_mean"][site] == 2
+    assert totals.columns["value_max"][site] == 2
+    assert np.isnan(np.delete(totals.columns["value_mean"], site)).all()
+
+
+def test_aggregate_events_cell_without_events(locator, temp_directory):
+    file_path = os.path.join(temp_directory, "events.geojson")
+    feature = {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [5, 5]},
+        "properties": {"value": 2},
+    }
+    with open(file_path, "w") as f:
+        json.dump({"type": "FeatureCollection", "features": [feature]}, f)
+
+    totals = aggregate_events(
+        events_file_path=file_path,
+        locator=locator,
+        columns=["value"],
+        statistics=["sum", "mean", "min", "max"],
+        max_workers=1,
+    )
+
+    (site,) = locator.locate(points=[[5, 5]], max_workers=1)
+    (empty_site,) = locator.locate(points=[[2, 2]], max_workers=1)
+    assert site != empty_site
+    assert totals.columns["event_count"][empty_site] == 0
+    assert totals.columns["value_sum"][site] == 2
+    for statistic in ("sum", "mean", "min", "max"):
+        assert np.isnan(totals.columns[f"value_{statistic}"][empty_site])
+
+
+def test_aggregate_events_unknown_statistic(locator, events_csv_path):
+    with pytest.raises(ValueError):
+        aggregate_events(
+            events_file_path=events_csv_path,
+            locator=locator,
+            columns=["value"],
+            statistics=["median"],
+        )
@@ -0,0 +1,106 @@
+import os
+
+import geopandas as gpd
+import pytest
+from voronoi_mapper.batch import voronoi_map_batch
+from voronoi_mapper.instrumentation import StageReport
+from voronoi_mapper.voronoi import voronoi_map
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_voronoi_map_batch_matches_voronoi_map(
+    mock_saved_geojson_file_path,
+    mock_saved_geojson_mask_file_path,
+    temp_directory,
+    max_workers,
+):
+    expected_path = os.path.join(temp_directory, "expected.geojson")
+    voronoi_map(
+        features_file_path=mock_saved_geojson_file_path,
+        boundary_file_path=mock_saved_geojson_mask_file_path,
+        save_path=expected_path,
+    )
+    save_paths = [
+        os.path.join(temp_directory, f"batch_{max_workers}_{layer}.geojson")
+        for layer in range(3)
+    ]
+
+    voronoi_map_batch(
+        features_file_paths=[mock_saved_geojson_file_path] * 3,
+        boundary_file_path=mock_saved_geojson_mask_file_path,
+        save_paths=save_paths,
+        max_workers=max_workers,
+    )
+
+    expected = gpd.read_file(expected_path)
+    for save_path in save_paths:
+        assert expected.geom_equals(gpd.read_file(save_path)).all()
+
+
+def test_voronoi_map_batch_report(
+    mock_saved_geojson_file_path, mock_saved_geojson_mask_file_path, temp_directory
+):
+    report = StageReport()
+
+    voronoi_map_batch(
+        features_file_paths=[mock_saved_geojson_file_path] * 2,
+        boundary_file_path=mock_saved_geojson_mask_file_path,
+        save_paths=[
+            os.path.join(temp_directory, f"reported_{layer}.geojson")
+            for layer in range(2)
+        ],
+        instrumentation=report,
+    )
+
+    stages = [event.stage for event in report.events]
+    assert stages[:2] == ["load_mask", "prepare_mask"]
+    assert stages.count("load_mask") == 1
+    assert stages.count("clip") == 2
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_voronoi_map_batch_cached_and_streamed(
+    mock_saved_geojson_file_path,
+    mock_saved_geojson_mask_file_path,
+    temp_directory,
+    max_workers,
+):
+    cache_dir = os.path.join(temp_directory, f"batch_cache_{max_workers}")
+    expected_path = os.path.join(temp_directory, f"expected_{max_workers}.geojson")
+    voronoi_map(
+        features_file_path=mock_saved_geojson_file_path,
+        boundary_file_path=mock_saved_geojson_mask_file_path,
+        save_path=expected_path,
+        cache_dir=cache_dir,
+    )
+    entries = set(os.listdir(cache_dir))
+    save_paths = [
+        os.path.join(temp_directory, f"streamed_{max_workers}_{layer}.geojson")
+        for layer in range(2)
+    ]
+
+    voronoi_map_batch(
+        features_file_paths=[mock_saved_geojson_file_path] * 2,
+        boundary_file_path=mock_saved_geojson_mask_file_path,
+        save_paths=save_paths,
+        max_workers=max_workers,
+        cache_dir=cache_dir,
+        chunk_size=2,
+    )
+
+    # the batch shares the cache of voronoi_map and streaming writes no cells
+    assert set(os.listdir(cache_dir)) == entries
+    expected = gpd.read_file(expected_path)
+    for save_path in save_paths:
+        assert expected.geom_equals(gpd.read_file(save_path)).all()
+
+
+def test_voronoi_map_batch_mismatched_paths(
+    mock_saved_geojson_file_path, mock_saved_geojson_mask_file_path
+):
+    with pytest.raises(ValueError):
+        voronoi_map_batch(
+            features_file_paths=[mock_saved_geojson_file_path] * 2,
+            boundary_file_path=mock_saved_geojson_mask_file_path,
+            save_paths=["only_one.geojson"],
+        )
@@ -0,0 +1,162 @@
+import json
+import os
+
+import numpy as np
+import pytest
+from benchmarks.generators import GENERATORS, make_island_mask
+from benchmarks.import_time import main as import_time_main
+from benchmarks.ray_clipping import main as ray_clipping_main
+from benchmarks.ray_clipping import make_rays
+from benchmarks.run_benchmarks import find_regressions, main
+from benchmarks.streaming_memory import MemoryResult, find_growth
+from benchmarks.streaming_memory import main as streaming_memory_main
+
+
+@pytest.mark.parametrize("distribution", list(GENERATORS))
+def test_generators(distribution):
+    mask = make_island_mask(n_vertices=200)
+
+    points = GENERATORS[distribution](n_sites=500, mask=mask, seed=1)
+
+    assert points.shape == (500, 2)
+    assert np.all(np.isfinite(points))
+    np.testing.assert_array_equal(
+        points, GENERATORS[distribution](n_sites=500, mask=mask, seed=1)
+    )
+
+
+def test_island_mask_is_valid():
+    mask = make_island_mask(n_vertices=500)
+
+    assert mask.is_valid
+    assert mask.bounds[0] > 0 and mask.bounds[1] > 0
+
+
+def test_find_regressions():
+    baseline = [
+        {"distribution": "uniform", "n_sites": 10, "stage": "load", "wall_seconds": 1},
+        {"distribution": "uniform", "n_sites": 10, "stage": "clip", "wall_seconds": 1},
+        {"distribution": "uniform", "n_sites": 10, "stage": "write", "wall_seconds": 0},
+    ]
+    results = [
+        {"distribution": "uniform", "n_sites": 10, "stage": "load", "wall_seconds": 2},
+        {
+            "distribution": "uniform",
+            "n_sites": 10,
+            "stage": "clip",
+            "wall_seconds": 1.1,
+        },
+        {"distribution": "uniform", "n_sites": 10, "stage": "write", "wall_seconds": 5},
+        {"distribution": "uniform", "n_sites": 20, "stage": "load", "wall_seconds": 5},
+    ]
+
+    regressions = find_regressions(
+        results=results, baseline=baseline, tolerance=0.25, min_seconds=0.05
+    )
+
+    assert regressions == ["uniform 10 load: 1.000s -> 2.000s"]
+
+
+def test_run_benchmarks(temp_directory):
+    output_path = os.path.join(temp_directory, "results.json")
+    args = ["--sizes", "200", "--mask-vertices", "100", "--output", output_path]
+
+    assert main(args + ["--distributions", "uniform", "coastline"]) == 0
+
+    with open(output_path) as f:
+        results = json.load(f)["results"]
+    assert {result["stage"] for result in results} == {
+        "load",
+        "voronoi",
+        "segments",
+        "polygonize",
+        "matching",
+        "cells",
+        "clip",
+        "write",
+    }
+    assert all(result["peak_bytes"] is not None for result in results)
+
+    rerun_args = ["--sizes", "200", "--mask-vertices", "100", "--no-memory"]
+    assert main(rerun_args + ["--baseline", output_path, "--tolerance", "1e9"]) == 0
+    assert (
+        main(
+            rerun_args
+            + ["--baseline", output_path, "--tolerance", "-1", "--min-seconds", "0"]
+        )
+        == 1
+    )
+
+
+def test_make_rays():
+    origins, directions = make_rays(n_rays=1000, seed=1)
+
+    assert origins.shape == directions.shape == (1000, 2)
+    np.testing.assert_allclose(np.linalg.norm(directions, axis=1), 1)
+    assert np.any(directions == 0)
+
+
+def test_run_ray_clipping_benchmark(temp_directory):
+    output_path = os.path.join(temp_directory, "rays.json")
+
+    assert ray_clipping_main(["--rays", "2000", "--output", output_path]) == 0
+
+    with open(output_path) as f:
+        results = json.load(f)["results"]
+    assert [result["method"] for result in results] == ["per_ray", "array"]
+    assert results[1]["failures"] == 0
+    assert ray_clipping_main(["--rays", "10", "--legacy-rays", "5"]) == 0
+
+
+def test_run_import_time_benchmark(temp_directory):
+    output_path = os.path.join(temp_directory, "imports.json")
+    args = ["--modules", "voronoi_mapper.models", "--repeats", "2"]
+
+    assert import_time_main(args + ["--budget", "60", "--output", output_path]) == 0
+
+    with open(output_path) as f:
+        results = json.load(f)["results"]
+    assert results[0]["module"] == "voronoi_mapper.models"
+    assert results[0]["lazy_modules_loaded"] == []
+    assert import_time_main(args + ["--budget", "0"]) == 1
+    assert (
+        import_time_main(
+            ["--modules", "voronoi_mapper.plot", "--repeats", "1", "--budget", "60"]
+        )
+        == 1
+    )
+
+
+def test_find_growth():
+    results = [
+        MemoryResult(n_sites=10, chunk_size=5, seconds=1, peak_bytes=100),
+        MemoryResult(n_sites=10, chunk_size=None, seconds=1, peak_bytes=100),
+        MemoryResult(n_sites=100, chunk_size=5, seconds=1, peak_bytes=140),
+        MemoryResult(n_sites=100, chunk_size=None, seconds=1, peak_bytes=1000),
+    ]
+
+    # eager runs are measured alongside but may grow
+    assert find_growth(results=results, max_growth=0.5) == []
+    assert find_growth(results=results, max_growth=0.2) == [
+        "10 -> 100 sites: 0.0 MiB -> 0.0 MiB"
+    ]
+    assert find_growth(results=results[:2], max_growth=0) == []
+
+
+def test_run_streaming_memory_benchmark(temp_directory):
+    pytest.importorskip("pyarrow")
+    output_path = os.path.join(temp_directory, "streaming_memory_results.json")
+    args = ["--sizes", "500", "1000", "--chunk-size", "200", "--mask-vertices", "100"]
+
+    assert streaming_memory_main(args + ["--eager", "--output", output_path]) == 0
+
+    with open(output_path) as f:
+        results = json.load(f)["results"]
+    assert [(result["n_sites"], result["chunk_size"]) for result in results] == [
+        (500, 200),
+        (500, None),
+        (1000, 200),
+        (1000, None),
+    ]
+    assert all(result["peak_bytes"] > 0 for result in results)
+    assert streaming_memory_main(args + ["--max-growth", "-1"]) == 1
@@ -0,0 +1,207 @@
+import os
+
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+from voronoi_mapper.cache import (
+    StageCache,
+    cached_stage,
+    load_mask_geojson_cached,
+    load_sites_cached,
+)
+from voronoi_mapper.geojson import load_mask_geojson, load_sites_from_geojson
+from voronoi_mapper.models import BoundingBox
+from voronoi_mapper.site_store import write_site_store
+from voronoi_mapper.voronoi import voronoi_map
+
+
+@pytest.fixture
+def cache(temp_directory):
+    return StageCache(directory=os.path.join(temp_directory, "cache"))
+
+
+def test_cache_key_changes_with_file_contents(cache, temp_directory):
+    file_path = os.path.join(temp_directory, "input.txt")
+    with open(file_path, "w") as f:
+        f.write("first")
+    key = cache.key(stage="stage", file_paths=[file_path], params={"a": 1})
+
+    assert key == cache.key(stage="stage", file_paths=[file_path], params={"a": 1})
+    assert key != cache.key(stage="stage", file_paths=[file_path], params={"a": 2})
+    assert key != cache.key(stage="other", file_paths=[file_path], params={"a": 1})
+
+    with open(file_path, "w") as f:
+        f.write("second contents")
+
+    assert key != cache.key(stage="stage", file_paths=[file_path], params={"a": 1})
+
+
+def test_cache_key_params(cache):
+    square = shapely.box(0, 0, 1, 1)
+    # the reprs of these two are cut short to the same text
+    long_line = shapely.LineString([(x, 0) for x in range(1000)])
+    other_line = shapely.LineString([(x, 0) for x in range(1001)])
+    bounding_box = BoundingBox(xmin=0, xmax=1, ymin=0, ymax=1)
+
+    key = cache.key(stage="stage", file_paths=[], params={"mask": square})
+
+    assert key == cache.key(
+        stage="stage", file_paths=[], params={"mask": shapely.box(0, 0, 1, 1)}
+    )
+    assert cache.key(
+        stage="stage", file_paths=[], params={"mask": long_line}
+    ) != cache.key(stage="stage", file_paths=[], params={"mask": other_line})
+    assert cache.key(
+        stage="stage", file_paths=[], params={"bounding_box": bounding_box}
+    ) == cache.key(
+        stage="stage",
+        file_paths=[],
+        params={"bounding_box": BoundingBox(xmin=0, xmax=1, ymin=0, ymax=1)},
+    )
+
+
+def test_cache_get_and_put(cache):
+    assert cache.get("missing") is None
+
+    cache.put("key", {"points": np.arange(4)})
+
+    np.testing.assert_array_equal(cache.get("key")["points"], np.arange(4))
+
+
+def test_cache_evicts_least_recently_used(temp_directory):
+    cache = StageCache(directory=os.path.join(temp_directory, "small"), max_bytes=4000)
+    cache.put("first", np.zeros(200))
+    cache.put("second", np.zeros(200))
+    os.utime(cache._entry_path("first"), ns=(0, 0))
+    os.utime(cache._entry_path("second"), ns=(1, 1))
+
+    cache.put("third", np.zeros(200))
+
+    assert cache.get("first") is None
+    assert cache.get("second") is not None
+    assert cache.get("third") is not None
+
+
+def test_cached_stage_reuses_result(cache, mock_saved_geojson_file_path):
+    calls = []
+
+    def compute():
+        calls.append(None)
+        return [1, 2, 3]
+
+    for _ in range(2):
+        result = cached_stage(
+            cache=cache,
+            stage="stage",
+            file_paths=[mock_saved_geojson_file_path],
+            params=None,
+            compute=compute,
+            dump=tuple,
+            load=list,
+        )
+        assert result == [1, 2, 3]
+
+    assert len(calls) == 1
+
+
+def test_cached_stage_without_cache():
+    assert (
+        cached_stage(
+            cache=None, stage="stage", file_paths=[], params=None, compute=lambda: 1
+        )
+        == 1
+    )
+
+
+def test_cached_loaders(
+    cache, mock_saved_geojson_file_path, mock_saved_geojson_mask_file_path
+):
+    points, properties = load_sites_from_geojson(
+        geojson_path=mock_saved_geojson_file_path
+    )
+    mask = load_mask_geojson(geojson_path=mock_saved_geojson_mask_file_path)
+
+    for _ in range(2):
+        cached_points, cached_properties = load_sites_cached(
+            file_path=mock_saved_geojson_file_path, cache=cache
+        )
+        cached_mask = load_mask_geojson_cached(
+            geojson_path=mock_saved_geojson_mask_file_path, cache=cache
+        )
+
+        np.testing.assert_array_equal(cached_points, points)
+        assert list(cached_properties.columns) == list(properties.columns)
+        assert cached_mask.equals(mask)
+
+
+def test_load_sites_cached_site_store(cache, temp_directory):
+    store_path = os.path.join(temp_directory, "points.sites")
+    write_site_store(store_path=store_path, points=[[1, 2], [3, 4]], ids=[5, 6])
+
+    points, properties = load_sites_cached(file_path=store_path, cache=cache)
+
+    assert isinstance(points, np.memmap)
+    np.testing.assert_array_equal(points, [[1, 2], [3, 4]])
+    np.testing.assert_array_equal(properties.columns["id"], [5, 6])
+    assert os.listdir(cache.directory) == []
+
+
+def test_voronoi_map_cached(
+    mock_saved_geojson_file_path, mock_saved_geojson_mask_file_path, temp_directory
+):
+    cache_dir = os.path.join(temp_directory, "map_cache")
+    save_paths = [
+        os.path.join(temp_directory, f"cached_{run}.geojson") for run in range(2)
+    ]
+
+    for save_path in save_paths:
+        voronoi_map(
+            features_file_path=mock_saved_geojson_file_path,
+            boundary_file_path=mock_saved_geojson_mask_file_path,
+            save_path=save_path,
+            cache_dir=cache_dir,
+        )
+
+    first, second = (gpd.read_file(save_path) for save_path in save_paths)
+    assert first.geom_equals(second).all()
+    assert len(os.listdir(cache_dir)) == 4
+
+
+def test_voronoi_map_cache_mask_tile_size(
+    mock_saved_geojson_file_path, mock_saved_geojson_mask_file_path, temp_directory
+):
+    cache_dir = os.path.join(temp_directory, "map_cache")
+    for mask_tile_size in (None, 1.0):
+        voronoi_map(
+            features_file_path=mock_saved_geojson_file_path,
+            boundary_file_path=mock_saved_geojson_mask_file_path,
+            save_path=os.path.join(temp_directory, "cached.geojson"),
+            cache_dir=cache_dir,
+            mask_tile_size=mask_tile_size,
+        )
+
+    # the sites, mask and cells are shared, the clipped cells are not
+    assert len(os.listdir(cache_dir)) == 5
+
+
+def test_voronoi_map_cache_shared_with_loaders(
+    mock_saved_geojson_file_path, mock_saved_geojson_mask_file_path, temp_directory
+):
+    # scripts/03_plot.py reads the sites and mask that scripts/02_voronoi.py cached
+    cache_dir = os.path.join(temp_directory, "map_cache")
+    voronoi_map(
+        features_file_path=mock_saved_geojson_file_path,
+        boundary_file_path=mock_saved_geojson_mask_file_path,
+        save_path=os.path.join(temp_directory, "cached.geojson"),
+        cache_dir=cache_dir,
+    )
+    entries = sorted(os.listdir(cache_dir))
+
+    cache = StageCache(directory=cache_dir)
+    load_sites_cached(file_path=mock_saved_geojson_file_path, cache=cache)
+    load_mask_geojson_cached(
+        geojson_path=mock_saved_geojson_mask_file_path, cache=cache
+    )
+
+    assert sorted(os.listdir(cache_dir)) == entries
@@ -0,0 +1,127 @@
+import json
+import os
+
+import geopandas as gpd
+import numpy as np
+import pytest
+from voronoi_mapper.batch import voronoi_map_batch
+from voronoi_mapper.coalesce import coalesce_properties, coalesce_sites
+from voronoi_mapper.properties import PropertyTable
+from voronoi_mapper.voronoi import voronoi_map
+
+
+@pytest.fixture
+def duplicated_points():
+    return np.array([[0, 0], [1, 1], [0, 0], [1, 1.0001], [5, 5], [1, 1.0002]])
+
+
+def test_coalesce_sites_exact_duplicates(duplicated_points):
+    sites, feature_sites = coalesce_sites(points=duplicated_points)
+
+    np.testing.assert_array_equal(
+        sites, [[0, 0], [1, 1], [1, 1.0001], [5, 5], [1, 1.0002]]
+    )
+    np.testing.assert_array_equal(feature_sites, [0, 1, 0, 2, 3, 4])
+
+
+def test_coalesce_sites_tolerance(duplicated_points):
+    sites, feature_sites = coalesce_sites(points=duplicated_points, tolerance=0.00015)
+
+    # the last point is only within the tolerance of the fourth, which is
+    # within the tolerance of the second
+    np.testing.assert_array_equal(sites, [[0, 0], [1, 1], [5, 5]])
+    np.testing.assert_array_equal(feature_sites, [0, 1, 0, 1, 2, 1])
+    np.testing.assert_array_equal(sites[feature_sites][:, 0], duplicated_points[:, 0])
+
+
+@pytest.mark.parametrize("tolerance", [0, 1])
+def test_coalesce_sites_empty(tolerance):
+    sites, feature_sites = coalesce_sites(points=np.empty((0, 2)), tolerance=tolerance)
+
+    assert sites.shape == (0, 2)
+    assert len(feature_sites) == 0
+
+
+def test_coalesce_properties():
+    properties = PropertyTable(
+        columns={
+            "name": np.array(["a", "b", "c", "d"], dtype=object),
+            "count": np.array([1, 2, 3, 4]),
+        },
+        length=4,
+    )
+
+    coalesced = coalesce_properties(
+        properties=properties, feature_sites=np.array([0, 1, 0, 2]), n_sites=3
+    )
+
+    assert len(coalesced) == 3
+    assert coalesced.columns["name"].tolist() == ["a", "b", "d"]
+    assert coalesced.columns["count"].tolist() == [1, 2, 4]
+    assert coalesced.columns["count"].dtype == np.int64
+    assert coalesced.columns["feature_count"].tolist() == [2, 1, 1]
+    assert coalesced.columns["feature_indices"].tolist() == ["[0, 2]", "[1]", "[3]"]
+
+
+def test_coalesce_properties_empty():
+    coalesced = coalesce_properties(
+        properties=PropertyTable(columns={}, length=0),
+        feature_sites=np.empty(0, dtype=np.intp),
+        n_sites=0,
+    )
+
+    assert len(coalesced) == 0
+    assert len(coalesced.columns["feature_count"]) == 0
+    assert len(coalesced.columns["feature_indices"]) == 0
+
+
+@pytest.fixture
+def duplicated_sites_file_path(temp_directory):
+    file_path = os.path.join(temp_directory, "duplicated_sites.geojson")
+    gpd.GeoDataFrame(
+        {"name": ["a", "b", "c", "d", "e"]},
+        geometry=gpd.points_from_xy(
+            [1.5, 2.5, 1.5, 2.5, 2.0], [1.5, 1.5, 1.5, 2.5, 2.000001]
+        ),
+    ).to_file(file_path, driver="GeoJSON")
+    return file_path
+
+
+def test_voronoi_map_coalesce(
+    duplicated_sites_file_path, mock_saved_geojson_mask_file_path, temp_directory
+):
+    save_path = os.path.join(temp_directory, "coalesced.geojson")
+
+    voronoi_map(
+        features_file_path=duplicated_sites_file_path,
+        boundary_file_path=mock_saved_geojson_mask_file_path,
+        save_path=save_path,
+        coalesce_tolerance=0.001,
+    )
+
+    with open(save_path) as f:
+        properties = [feature["properties"] for feature in json.load(f)["features"]]
+    assert [feature["name"] for feature in properties] == ["a", "b", "d", "e"]
+    assert [feature["feature_count"] for feature in properties] == [2, 1, 1, 1]
+    # GDAL writes strings holding JSON arrays as arrays
+    assert [feature["feature_indices"] for feature in properties] == [
+        [0, 2],
+        [1],
+        [3],
+        [4],
+    ]
+
+
+def test_voronoi_map_batch_coalesce(
+    duplicated_sites_file_path, mock_saved_geojson_mask_file_path, temp_directory
+):
+    save_path = os.path.join(temp_directory, "coalesced_batch.geojson")
+
+    voronoi_map_batch(
+        features_file_paths=[duplicated_sites_file_path],
+        boundary_file_path=mock_saved_geojson_mask_file_path,
+        save_paths=[save_path],
+        coalesce_tolerance=0,
+    )
+
+    assert len(gpd.read_file(save_path)) == 4
@@ -1,7 +1,14 @@
-import json
 import os
-from pdb import set_trace
 
+import geopandas as gpd
+import numpy as np
+import pytest
+from voronoi_mapper.aggregate import aggregate_events
+from voronoi_mapper.geojson import load_mask_geojson
+from voronoi_mapper.locate import SiteLocator
+from voronoi_mapper.models import BoundingBox
+from voronoi_mapper.readers import load_sites
+from voronoi_mapper.vector_tiles import write_vector_tiles
 from voronoi_mapper.voronoi import voronoi_map
 
 
@@ -11,10 +18,162 @@ def test_voronoi_map(
     FILE_NAME = "saved_file.geojson"
     GEOJSON_SAVE_PATH = os.path.join(temp_directory, FILE_NAME)
 
+    gdf = voronoi_map(
+        features_file_path=mock_saved_geojson_file_path,
+        boundary_file_path=mock_saved_geojson_mask_file_path,
+        save_path=GEOJSON_SAVE_PATH,
+    )
+
+    assert FILE_NAME in os.listdir(temp_directory)
+    written = gpd.read_file(GEOJSON_SAVE_PATH)
+    assert written.geom_equals(gdf.geometry.reset_index(drop=True)).all()
+
+
+def test_voronoi_map_tiled(
+    mock_saved_geojson_file_path, mock_saved_geojson_mask_file_path, temp_directory
+):
+    FILE_NAME = "saved_file_tiled.geojson"
+    GEOJSON_SAVE_PATH = os.path.join(temp_directory, FILE_NAME)
+
+    voronoi_map(
+        features_file_path=mock_saved_geojson_file_path,
+        boundary_file_path=mock_saved_geojson_mask_file_path,
+        save_path=GEOJSON_SAVE_PATH,
+        tiles=(2, 2),
+        max_workers=2,
+    )
+
+    assert FILE_NAME in os.listdir(temp_directory)
+
+
+def test_voronoi_map_mask_options(
+    mock_saved_geojson_file_path,
+    mock_saved_geojson_mask_file_path,
+    mock_bounding_box,
+    temp_directory,
+):
+    FILE_NAME = "saved_file_mask_options.geojson"
+    GEOJSON_SAVE_PATH = os.path.join(temp_directory, FILE_NAME)
+
     voronoi_map(
         features_file_path=mock_saved_geojson_file_path,
         boundary_file_path=mock_saved_geojson_mask_file_path,
+        bounding_box=mock_bounding_box,
         save_path=GEOJSON_SAVE_PATH,
+        mask_simplify_tolerance=0.01,
+        mask_coverage=True,
     )
 
     assert FILE_NAME in os.listdir(temp_directory)
+
+
+@pytest.mark.parametrize(
+    "file_name, tiles",
+    [("cells.geojson", None), ("cells.geojson", (2, 2)), ("cells.parquet", None)],
+)
+def test_voronoi_map_streamed_matches_eager(
+    mock_saved_geojson_mask_file_path, temp_directory, file_name, tiles
+):
+    pytest.importorskip("pyarrow")
+    pytest.importorskip("pyogrio")
+    points = np.random.default_rng(0).random((300, 2)) * 4
+    features_file_path = os.path.join(temp_directory, "features.geojson")
+    gpd.GeoDataFrame(
+        {"site": np.arange(len(points))}, geometry=gpd.points_from_xy(*points.T)
+    ).to_file(features_file_path, driver="GeoJSON")
+
+    cells = {}
+    for mode, chunk_size in [("eager", None), ("streamed", 50)]:
+        os.mkdir(os.path.join(temp_directory, mode))
+        save_path = os.path.join(temp_directory, mode, file_name)
+        result = voronoi_map(
+            features_file_path=features_file_path,
+            boundary_file_path=mock_saved_geojson_mask_file_path,
+            # the default box of an eager run comes from the full diagram
+            bounding_box=BoundingBox(xmin=-1, xmax=5, ymin=-1, ymax=5),
+            save_path=save_path,
+            tiles=tiles,
+            chunk_size=chunk_size,
+        )
+        # streamed cells are not returned
+        assert (result is None) == (mode == "streamed")
+        written = (
+            gpd.read_parquet(save_path)
+            if file_name.endswith(".parquet")
+            else gpd.read_file(save_path)
+        )
+        cells[mode] = written.sort_values("site").reset_index(drop=True)
+
+    # streamed rows are written chunk by chunk rather than in site order
+    assert not written["site"].is_monotonic_increasing
+    assert cells["streamed"]["site"].equals(cells["eager"]["site"])
+    assert (
+        cells["streamed"]
+        .geom_equals_exact(cells["eager"].geometry, tolerance=1e-9)
+        .all()
+    )
+
+
+def test_voronoi_map_streamed_needs_save_path(
+    mock_saved_geojson_file_path, mock_saved_geojson_mask_file_path
+):
+    with pytest.raises(ValueError):
+        voronoi_map(
+            features_file_path=mock_saved_geojson_file_path,
+            boundary_file_path=mock_saved_geojson_mask_file_path,
+            chunk_size=2,
+        )
+
+
+def test_voronoi_map_vector_tiles(
+    mock_saved_geojson_file_path, mock_saved_geojson_mask_file_path, temp_directory
+):
+    TILES_PATH = os.path.join(temp_directory, "cells.mbtiles")
+
+    cells = voronoi_map(
+        features_file_path=mock_saved_geojson_file_path,
+        boundary_file_path=mock_saved_geojson_mask_file_path,
+    )
+    written = write_vector_tiles(
+        gdf=cells, save_path=TILES_PATH, min_zoom=0, max_zoom=3, max_workers=1
+    )
+
+    assert written > 0
+    assert "cells.mbtiles" in os.listdir(temp_directory)
+
+
+def test_voronoi_map_aggregate_events(
+    mock_saved_geojson_file_path, mock_saved_geojson_mask_file_path, temp_directory
+):
+    EVENTS_PATH = os.path.join(temp_directory, "events.geojson")
+    # events in and around the mask, with a value to sum
+    events = gpd.GeoDataFrame(
+        {"value": range(200)},
+        geometry=gpd.points_from_xy(*np.random.default_rng(0).uniform(0, 4, (2, 200))),
+    )
+    events.to_file(EVENTS_PATH, driver="GeoJSON")
+
+    cells = voronoi_map(
+        features_file_path=mock_saved_geojson_file_path,
+        boundary_file_path=mock_saved_geojson_mask_file_path,
+    )
+    points, _ = load_sites(file_path=mock_saved_geojson_file_path)
+    locator = SiteLocator.from_clipped_cells(
+        sites=points,
+        cells=cells,
+        mask=load_mask_geojson(geojson_path=mock_saved_geojson_mask_file_path),
+    )
+    totals = aggregate_events(
+        events_file_path=EVENTS_PATH,
+        locator=locator,
+        columns=["value"],
+        statistics=["sum"],
+        max_workers=1,
+    )
+    cells = cells.assign(**totals.take(cells.index).columns)
+
+    joined = gpd.sjoin(events, cells, predicate="within")
+    expected = joined.groupby("index_right")["value"].agg(["count", "sum"])
+    assert cells["event_count"].sum() == len(joined) > 0
+    assert (cells.loc[expected.index, "event_count"] == expected["count"]).all()
+    assert (cells.loc[expected.index, "value_sum"] == expected["sum"]).all()
@@ -1,8 +1,17 @@
+import json
+import os
+
+import numpy as np
+import pytest
+import shapely
 from shapely.geometry import Polygon
 from voronoi_mapper.geojson import (
+    iter_geojson_features,
     load_mask_geojson,
     load_points_and_features_from_geojson,
+    load_sites_from_geojson,
 )
+from voronoi_mapper.models import BoundingBox
 
 
 def test_load_points_and_features_from_geojson(
@@ -29,3 +38,157 @@ def test_load_mask_geojson():
     )
 
     assert expected_polygon.equals(mask)
+
+
+@pytest.fixture
+def tiled_mask_file_path(temp_directory):
+    """Adjacent unit squares along y = 0 to 1, with a jagged top on the first."""
+    jagged_top = [[x / 10, 1 + (x % 2) / 1000] for x in range(10, -1, -1)]
+    geometries = [
+        {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], *jagged_top, [0, 0]]]},
+        *(
+            {
+                "type": "Polygon",
+                "coordinates": [[[x, 0], [x + 1, 0], [x + 1, 1], [x, 1], [x, 0]]],
+            }
+            for x in range(1, 5)
+        ),
+    ]
+    file_path = os.path.join(temp_directory, "tiled_mask.geojson")
+    with open(file_path, "w") as f:
+        json.dump(
+            {
+                "type": "FeatureCollection",
+                "features": [
+                    {"type": "Feature", "properties": {}, "geometry": geometry}
+                    for geometry in geometries
+                ],
+            },
+            f,
+        )
+    return file_path
+
+
+def test_load_mask_geojson_bounding_box(tiled_mask_file_path):
+    mask = load_mask_geojson(
+        geojson_path=tiled_mask_file_path,
+        bounding_box=BoundingBox(xmin=2.5, xmax=3.5, ymin=-1, ymax=2),
+    )
+
+    assert mask.bounds == (2, 0, 4, 1)
+
+
+def test_load_mask_geojson_coverage(tiled_mask_file_path):
+    mask = load_mask_geojson(geojson_path=tiled_mask_file_path, coverage=True)
+
+    assert mask.equals(load_mask_geojson(geojson_path=tiled_mask_file_path))
+
+
+def test_load_mask_geojson_simplify(tiled_mask_file_path):
+    mask = load_mask_geojson(geojson_path=tiled_mask_file_path)
+
+    simplified = load_mask_geojson(
+        geojson_path=tiled_mask_file_path, simplify_tolerance=0.01
+    )
+
+    assert simplified.is_valid
+    assert shapely.get_num_coordinates(simplified) < shapely.get_num_coordinates(mask)
+    assert abs(simplified.area - mask.area) < 0.01
+
+
+@pytest.mark.parametrize("buffer_size", [1, 7, 1 << 20])
+def test_iter_geojson_features(
+    mock_saved_geojson_file_path, mock_geojson_data, buffer_size
+):
+    features = list(
+        iter_geojson_features(
+            geojson_path=mock_saved_geojson_file_path, buffer_size=buffer_size
+        )
+    )
+
+    assert features == mock_geojson_data["features"]
+
+
+@pytest.mark.parametrize(
+    "content,expected_features",
+    [
+        ("{}", []),
+        ('{"type": "FeatureCollection", "features": []}', []),
+        ('{"features": [{"id": 1}], "bbox": [0, 0, 1, 1]}', [{"id": 1}]),
+        ('{"crs": 4326, "features": [{"id": 1}, {"id": 2}]}', [{"id": 1}, {"id": 2}]),
+    ],
+)
+def test_iter_geojson_features_layouts(temp_directory, content, expected_features):
+    file_path = os.path.join(temp_directory, "layout.geojson")
+    with open(file_path, "w") as f:
+        f.write(content)
+
+    features = list(iter_geojson_features(geojson_path=file_path, buffer_size=3))
+
+    assert features == expected_features
+
+
+@pytest.mark.parametrize(
+    "content,exception",
+    [
+        ('["features"]', ValueError),
+        ('{"features": [{"id": 1}', ValueError),
+        ('{"features": [{"id": 1', json.JSONDecodeError),
+    ],
+)
+def test_iter_geojson_features_malformed(temp_directory, content, exception):
+    file_path = os.path.join(temp_directory, "malformed.geojson")
+    with open(file_path, "w") as f:
+        f.write(content)
+
+    with pytest.raises(exception):
+        list(iter_geojson_features(geojson_path=file_path, buffer_size=4))
+
+
+def test_load_sites_from_geojson(mock_saved_geojson_file_path, mock_geojson_data):
+    points, properties = load_sites_from_geojson(
+        geojson_path=mock_saved_geojson_file_path
+    )
+
+    expected_points = [
+        feature["geometry"]["coordinates"][:2]
+        for feature in mock_geojson_data["features"]
+    ]
+
+    assert points.dtype == np.float64
+    assert points.tolist() == expected_points
+    assert len(properties) == len(expected_points)
+    assert list(properties.columns) == ["name"]
+    assert properties.columns["name"].tolist() == ["Bushy parkrun"] * len(
+        expected_points
+    )
+
+
+def test_load_sites_from_geojson_many_features(temp_directory):
+    file_path = os.path.join(temp_directory, "many.geojson")
+    features = [
+        {
+            "type": "Feature",
+            "properties": {"id": i},
+            "geometry": {"type": "Point", "coordinates": [i, -i]},
+        }
+        for i in range(2500)
+    ]
+    features.append(
+        {
+            "type": "Feature",
+            "properties": None,
+            "geometry": {"type": "LineString", "coordinates": [[1, 2], [3, 4]]},
+        }
+    )
+    with open(file_path, "w") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+
+    points, properties = load_sites_from_geojson(geojson_path=file_path)
+
+    assert points.shape == (2501, 2)
+    assert points[:2500].tolist() == [[i, -i] for i in range(2500)]
+    assert points[2500].tolist() == [1, 2]
+    assert properties.columns["id"].dtype == np.float64
+    assert properties.columns["id"][:2500].tolist() == list(range(2500))
+    assert np.isnan(properties.columns["id"][2500])
@@ -1,17 +1,21 @@
-from pdb import set_trace
-
 import geopandas as gpd
+import numpy as np
 import pytest
+import shapely
 from shapely.geometry import MultiPolygon, Polygon
 from voronoi_mapper.geometry import (
+    PreparedMask,
     calculate_gradient,
     check_point_is_within,
     clip_polygons_to_mask,
     get_bounding_segments,
     get_intersection_with_bounding_box,
+    get_intersections_with_bounding_box,
     handle_straight_lines,
+    match_points_to_polygons,
 )
 from voronoi_mapper.models import (
+    EDGE_ORDER,
     BoundingBox,
     Edges,
     Intersection,
@@ -109,6 +113,58 @@ def test_get_intersection_with_bounding_box(
     )
 
 
+def test_get_intersections_with_bounding_box():
+    bounding_box = BoundingBox(xmin=0, xmax=5, ymin=0, ymax=5)
+    origins = np.array([[1, 0], [0, 3], [2, 3], [3, 4], [2, 3], [4, 3], [2, 3]])
+    directions = np.array([[1, 2], [1, -1], [-1, -1], [1, -1], [2, 0], [-2, 0], [0, 1]])
+
+    coordinates, edge_codes = get_intersections_with_bounding_box(
+        origins=origins, directions=directions, bounding_box=bounding_box
+    )
+
+    for origin, direction, coordinate, edge_code in zip(
+        origins, directions, coordinates, edge_codes
+    ):
+        expected_output = get_intersection_with_bounding_box(
+            coordinates=(origin.tolist(), (origin + direction).tolist()),
+            bounding_box=bounding_box,
+        )
+        assert tuple(coordinate) == expected_output.coordinates
+        assert EDGE_ORDER[edge_code] == expected_output.edge
+
+
+def test_get_intersections_with_bounding_box_misses():
+    coordinates, edge_codes = get_intersections_with_bounding_box(
+        origins=np.array([[1, 1], [7, 1], [7, 1], [1, 7], [1, 1], [1, 1]]),
+        directions=np.array([[1, 0], [1, 0], [0, 1], [0, 1], [0, 0], [np.nan, np.nan]]),
+        bounding_box=BoundingBox(xmin=0, xmax=5, ymin=0, ymax=5),
+    )
+
+    assert edge_codes.tolist() == [EDGE_ORDER.index(Edges.right), -1, -1, -1, -1, -1]
+    assert coordinates[0].tolist() == [5, 1]
+    assert np.isnan(coordinates[1:]).all()
+
+
+def test_get_intersections_with_bounding_box_degenerate_rays():
+    bounding_box = BoundingBox(xmin=0, xmax=5, ymin=0, ymax=5)
+
+    coordinates, edge_codes = get_intersections_with_bounding_box(
+        origins=np.array([[1, 0], [-1, 2], [2, 2], [2, 2], [5, 5]]),
+        directions=np.array([[3, 4], [1, 0], [1, 1e-300], [-1e-300, -1], [1, 1]]),
+        bounding_box=bounding_box,
+    )
+
+    # from outside the box, nearly parallel to an edge and from a corner
+    assert coordinates.tolist() == [[4.75, 5], [5, 2], [5, 2], [2, 0], [5, 5]]
+    assert [EDGE_ORDER[code] for code in edge_codes] == [
+        Edges.top,
+        Edges.right,
+        Edges.right,
+        Edges.bottom,
+        Edges.top,
+    ]
+
+
 @pytest.mark.parametrize(
     "coordinates,bounding_box",
     [
@@ -136,17 +192,32 @@ def test_get_bounding_segments(mock_bounding_box, mock_bounding_box_intersection
     )
 
     expected_bounding_segments = [
-        ((-10, 10), [-6.0, 10]),
-        ([-6.0, 10], (10, 10)),
-        ((10, -10), [10, -9.0]),
-        ([10, -9.0], [10, -2.25]),
-        ([10, -2.25], (10, 10)),
-        ((-10, -10), (10, -10)),
-        ((-10, -10), [-10, 6.25]),
-        ([-10, 6.25], (-10, 10)),
+        [[-10, 10], [-6.0, 10]],
+        [[-6.0, 10], [10, 10]],
+        [[10, -10], [10, -9.0]],
+        [[10, -9.0], [10, -2.25]],
+        [[10, -2.25], [10, 10]],
+        [[-10, -10], [10, -10]],
+        [[-10, -10], [-10, 6.25]],
+        [[-10, 6.25], [-10, 10]],
     ]
 
-    assert all(segment in expected_bounding_segments for segment in bounding_segments)
+    np.testing.assert_array_equal(bounding_segments, expected_bounding_segments)
+
+
+def test_get_bounding_segments_skips_repeated_points(mock_bounding_box):
+    bounding_segments = get_bounding_segments(
+        bounding_box=mock_bounding_box,
+        bounding_box_intersections={
+            "top": np.array([[2.0, 10], [-10, 10], [2.0, 10]]),
+            "right": np.empty((0, 2)),
+        },
+    )
+
+    assert bounding_segments.shape == (5, 2, 2)
+    np.testing.assert_array_equal(
+        bounding_segments[:2], [[[-10, 10], [2, 10]], [[2, 10], [10, 10]]]
+    )
 
 
 def test_clip_polygons_within_mask(mock_geo_dataframe, mock_mask_multipolygon):
@@ -155,6 +226,75 @@ def test_clip_polygons_within_mask(mock_geo_dataframe, mock_mask_multipolygon):
     assert clipped.geometry.iloc[0].equals(Polygon([(1, 1), (2, 1), (2, 2), (1, 2)]))
 
 
+@pytest.mark.parametrize("tile_size", [None, 0.5, 10])
+def test_clip_polygons_matches_geopandas_clip(tile_size):
+    gdf = gpd.GeoDataFrame(
+        {"name": ["inside", "boundary", "outside", "split", "touching"]},
+        geometry=[
+            Polygon([(1.5, 1.5), (2.5, 1.5), (2.5, 2.5), (1.5, 2.5)]),
+            Polygon([(0, 0), (2, 0), (2, 2), (0, 2)]),
+            Polygon([(6, 6), (7, 6), (7, 7), (6, 7)]),
+            Polygon([(2, 0), (6, 0), (6, 2), (2, 2)]),
+            Polygon([(3, 3), (4, 3), (4, 4), (3, 4)]),
+        ],
+        crs=27700,
+    )
+    mask = MultiPolygon(
+        [
+            Polygon([(1, 1), (3, 1), (3, 3), (1, 3)]),
+            Polygon([(4, 0.5), (5, 0.5), (5, 1.5), (4, 1.5)]),
+        ]
+    )
+
+    clipped = clip_polygons_to_mask(gdf, mask, tile_size=tile_size)
+    expected = gdf.clip(mask)
+    expected = expected[expected.geometry.area > 0].sort_index()
+
+    assert clipped.crs == gdf.crs
+    assert clipped.index.tolist() == expected.index.tolist()
+    assert clipped["name"].tolist() == expected["name"].tolist()
+    for actual_geometry, expected_geometry in zip(clipped.geometry, expected.geometry):
+        assert actual_geometry.symmetric_difference(expected_geometry).area < 1e-9
+
+
+def test_prepared_mask_empty_with_tiles(mock_geo_dataframe):
+    mask = PreparedMask(MultiPolygon(), tile_size=1)
+
+    clipped = clip_polygons_to_mask(mock_geo_dataframe, mask)
+
+    assert len(mask.parts) == 0
+    assert clipped.empty
+
+
+def test_prepared_mask_leaves_mask_unprepared():
+    polygon = Polygon([(1, 1), (3, 1), (3, 3), (1, 3)])
+
+    mask = PreparedMask(polygon)
+
+    assert shapely.is_prepared(mask.mask)
+    assert not shapely.is_prepared(polygon)
+
+
+def test_prepared_mask_classify():
+    mask = PreparedMask(
+        MultiPolygon([Polygon([(1, 1), (3, 1), (3, 3), (1, 3)])]), tile_size=1
+    )
+    cells = np.array(
+        [
+            Polygon([(1.5, 1.5), (2.5, 1.5), (2.5, 2.5), (1.5, 2.5)]),
+            Polygon([(0, 0), (2, 0), (2, 2), (0, 2)]),
+            Polygon([(6, 6), (7, 6), (7, 7), (6, 7)]),
+        ]
+    )
+
+    inside, (cell_indices, part_indices) = mask.classify(cells)
+
+    assert inside.tolist() == [True, False, False]
+    assert set(cell_indices.tolist()) == {1}
+    assert len(mask.parts) == 4
+    assert len(part_indices) == 4
+
+
 @pytest.mark.parametrize(
     "geo_dataframe,mask",
     [
@@ -233,3 +373,28 @@ def test_handle_straight_lines(
 
     assert actual_intersection.coordinates == expected_intersection.coordinates
     assert actual_intersection.edge == expected_intersection.edge
+
+
+def test_match_points_to_polygons():
+    polygons = [
+        Polygon([(0, 0), (2, 0), (2, 2), (0, 2)]),
+        Polygon([(3, 3), (5, 3), (5, 5), (3, 5)]),
+        Polygon([(0, 0), (5, 0), (5, 5), (0, 5)]),
+    ]
+    points = np.array([[4, 4], [6, 6], [1, 1], [2.5, 2.5]])
+
+    point_indices, polygon_indices = match_points_to_polygons(
+        points=points, polygons=iter(polygons)
+    )
+
+    assert point_indices.tolist() == [0, 2, 3]
+    assert polygon_indices.tolist() == [1, 0, 2]
+
+
+def test_match_points_to_polygons_no_points():
+    point_indices, polygon_indices = match_points_to_polygons(
+        points=[], polygons=[Polygon([(0, 0), (2, 0), (2, 2), (0, 2)])]
+    )
+
+    assert len(point_indices) == 0
+    assert len(polygon_indices) == 0
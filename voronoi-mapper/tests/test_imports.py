@@ -0,0 +1,33 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "voronoi_mapper.voronoi",
+        "voronoi_mapper.batch",
+        "voronoi_mapper.incremental",
+        "voronoi_mapper.tiling",
+    ],
+)
+def test_pipeline_imports_skip_plotting_and_geodataframes(module):
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import json, sys, {module}; print(json.dumps(list(sys.modules)))",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+        cwd=Path(__file__).parents[1],
+    )
+
+    loaded = set(json.loads(completed.stdout))
+    assert "matplotlib" not in loaded
+    assert "geopandas" not in loaded
@@ -0,0 +1,178 @@
+import numpy as np
+import pytest
+import shapely
+from shapely.geometry import Polygon
+from voronoi_mapper.incremental import VoronoiMap
+from voronoi_mapper.models import BoundingBox
+from voronoi_mapper.properties import PropertyTable
+
+
+@pytest.fixture
+def random_points():
+    return np.random.default_rng(1).random((300, 2)) * 10
+
+
+@pytest.fixture
+def random_mask():
+    return Polygon([(1, 1), (9, 2), (8, 9), (2, 8)])
+
+
+@pytest.fixture
+def random_bounding_box():
+    return BoundingBox(xmin=-1, xmax=11, ymin=-1, ymax=11)
+
+
+def assert_matches_rebuild(voronoi_map: VoronoiMap, mask, bounding_box):
+    rebuilt = VoronoiMap(
+        points=voronoi_map.points, mask=mask, bounding_box=bounding_box
+    )
+    assert np.all(
+        shapely.area(shapely.symmetric_difference(voronoi_map.cells, rebuilt.cells))
+        < 1e-9
+    )
+    assert np.all(
+        shapely.area(shapely.symmetric_difference(voronoi_map.clipped, rebuilt.clipped))
+        < 1e-9
+    )
+
+
+def test_voronoi_map_add_sites(random_points, random_mask, random_bounding_box):
+    voronoi_map = VoronoiMap(
+        points=random_points, mask=random_mask, bounding_box=random_bounding_box
+    )
+
+    site_ids = voronoi_map.add_sites(
+        points=[[5, 5], [0.5, 9.5]], properties=[{"name": "a"}, None]
+    )
+
+    assert site_ids.tolist() == [300, 301]
+    assert voronoi_map.properties.columns["name"][-2:].tolist() == ["a", None]
+    assert_matches_rebuild(voronoi_map, random_mask, random_bounding_box)
+
+
+def test_voronoi_map_remove_sites(random_points, random_mask, random_bounding_box):
+    voronoi_map = VoronoiMap(
+        points=random_points, mask=random_mask, bounding_box=random_bounding_box
+    )
+
+    voronoi_map.remove_sites(site_ids=[0, 10, 11, 299])
+
+    assert len(voronoi_map.points) == 296
+    assert 10 not in voronoi_map.site_ids
+    assert_matches_rebuild(voronoi_map, random_mask, random_bounding_box)
+
+
+def test_voronoi_map_remove_unknown_site(random_points, random_mask):
+    voronoi_map = VoronoiMap(points=random_points, mask=random_mask)
+
+    with pytest.raises(KeyError) as exc_info:
+        voronoi_map.remove_sites(site_ids=[5, 1000])
+    assert "1000" in str(exc_info.value)
+
+
+def test_voronoi_map_move_site(random_points, random_mask, random_bounding_box):
+    properties = PropertyTable(columns={"id": np.arange(300)}, length=300)
+    voronoi_map = VoronoiMap(
+        points=random_points,
+        mask=random_mask,
+        properties=properties,
+        bounding_box=random_bounding_box,
+    )
+
+    voronoi_map.move_site(site_id=42, point=[5, 5])
+    gdf = voronoi_map.to_geodataframe()
+
+    assert voronoi_map.points[-1].tolist() == [5, 5]
+    assert gdf.loc[42, "id"] == 42
+    assert gdf.loc[42, "geometry"].contains(shapely.Point(5, 5))
+    assert_matches_rebuild(voronoi_map, random_mask, random_bounding_box)
+
+
+def test_voronoi_map_no_change(random_points, random_mask):
+    voronoi_map = VoronoiMap(points=random_points, mask=random_mask)
+    cells = voronoi_map.cells.copy()
+
+    voronoi_map.remove_sites(site_ids=[])
+
+    assert all(a is b for a, b in zip(cells, voronoi_map.cells))
+
+
+def test_voronoi_map_site_outside_bounding_box(
+    random_points, random_mask, random_bounding_box
+):
+    voronoi_map = VoronoiMap(
+        points=np.concatenate([random_points, [[100, 100]]]),
+        mask=random_mask,
+        bounding_box=random_bounding_box,
+    )
+    cells = voronoi_map.cells.copy()
+
+    voronoi_map.remove_sites(site_ids=[300])
+
+    assert cells[300].is_empty
+    assert all(a is b for a, b in zip(cells[:300], voronoi_map.cells))
+
+
+def test_voronoi_map_from_files(
+    mock_saved_geojson_file_path, mock_saved_geojson_mask_file_path
+):
+    voronoi_map = VoronoiMap.from_files(
+        features_file_path=mock_saved_geojson_file_path,
+        boundary_file_path=mock_saved_geojson_mask_file_path,
+    )
+
+    gdf = voronoi_map.to_geodataframe()
+
+    assert len(voronoi_map.points) == 5
+    assert list(gdf.columns) == ["geometry", "name"]
+    assert shapely.union_all(gdf.geometry.values).equals(voronoi_map.mask.mask)
+
+
+def test_voronoi_map_locate(random_points, random_mask, random_bounding_box):
+    voronoi_map = VoronoiMap(
+        points=random_points, mask=random_mask, bounding_box=random_bounding_box
+    )
+    points = [[5, 5], [0.5, 0.5]]
+
+    site_ids = voronoi_map.locate(points=points)
+    nearest = np.argmin(np.linalg.norm(random_points - [5, 5], axis=1))
+    assert site_ids.tolist() == [nearest, -1]
+
+    # the cells are found again after the map changes
+    voronoi_map.remove_sites(site_ids=[nearest])
+    new_site_id = voronoi_map.add_sites(points=[[5, 5]])[0]
+    assert voronoi_map.locate(points=points, max_workers=1).tolist() == [
+        new_site_id,
+        -1,
+    ]
+
+
+@pytest.mark.parametrize("seed", [20, 47, 52])
+def test_voronoi_map_random_updates(random_mask, seed):
+    rng = np.random.default_rng(seed)
+    bounding_box = BoundingBox(xmin=0, xmax=10, ymin=0, ymax=10)
+    voronoi_map = VoronoiMap(
+        points=rng.random((300, 2)) * 10, mask=random_mask, bounding_box=bounding_box
+    )
+
+    for _ in range(40):
+        update = rng.integers(3)
+        if update == 0:
+            voronoi_map.add_sites(points=rng.random((rng.integers(1, 4), 2)) * 10)
+        elif update == 1:
+            voronoi_map.remove_sites(
+                site_ids=rng.choice(voronoi_map.site_ids, size=3, replace=False)
+            )
+        else:
+            voronoi_map.move_site(
+                site_id=rng.choice(voronoi_map.site_ids), point=rng.random(2) * 10
+            )
+        assert_matches_rebuild(voronoi_map, random_mask, bounding_box)
+
+    points = rng.random((2000, 2)) * 10
+    point_indices, cell_indices = shapely.STRtree(voronoi_map.clipped).query(
+        shapely.points(points), predicate="intersects"
+    )
+    expected = np.full(len(points), -1)
+    expected[point_indices] = voronoi_map.site_ids[cell_indices]
+    assert np.array_equal(voronoi_map.locate(points=points, max_workers=1), expected)
@@ -0,0 +1,125 @@
+import json
+import os
+import tracemalloc
+
+import numpy as np
+import pytest
+from voronoi_mapper.instrumentation import (
+    Instrumentation,
+    StageEvent,
+    StageReport,
+    measure_stage,
+)
+from voronoi_mapper.voronoi import voronoi_map
+
+
+class RecordingInstrumentation(Instrumentation):
+    def __init__(self):
+        self.calls = []
+
+    def stage_started(self, stage):
+        self.calls.append(("started", stage))
+
+    def stage_finished(self, event):
+        self.calls.append(("finished", event.stage))
+
+
+def test_measure_stage_without_instrumentation():
+    with measure_stage(None, "stage") as stage:
+        stage.items = 3
+
+    assert stage == StageEvent(stage="stage", items=3)
+
+
+def test_measure_stage_default_instrumentation():
+    with measure_stage(Instrumentation(), "stage") as stage:
+        pass
+
+    assert stage.peak_bytes is None
+    assert stage.wall_seconds >= 0
+
+
+def test_measure_stage_events():
+    instrumentation = RecordingInstrumentation()
+
+    with measure_stage(instrumentation, "first"):
+        with measure_stage(instrumentation, "second"):
+            pass
+
+    assert instrumentation.calls == [
+        ("started", "first"),
+        ("started", "second"),
+        ("finished", "second"),
+        ("finished", "first"),
+    ]
+
+
+def test_measure_stage_memory():
+    report = StageReport(trace_memory=True)
+
+    with measure_stage(report, "allocate") as stage:
+        values = np.ones(1_000_000)
+        stage.items = len(values)
+
+    [event] = report.events
+    assert event.items == 1_000_000
+    assert event.peak_bytes >= values.nbytes
+    assert event.wall_seconds >= 0 and event.cpu_seconds >= 0
+    assert not tracemalloc.is_tracing()
+
+
+def test_measure_stage_body_raises():
+    report = StageReport(trace_memory=True)
+
+    with pytest.raises(RuntimeError):
+        with measure_stage(report, "failing") as stage:
+            stage.items = 2
+            raise RuntimeError
+
+    [event] = report.events
+    assert event.stage == "failing" and event.items == 2
+    assert event.peak_bytes is not None
+    assert not tracemalloc.is_tracing()
+
+
+def test_measure_stage_keeps_tracing_running():
+    tracemalloc.start()
+    try:
+        with measure_stage(StageReport(trace_memory=True), "stage"):
+            pass
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_voronoi_map_report(
+    mock_saved_geojson_file_path, mock_saved_geojson_mask_file_path, temp_directory
+):
+    report = StageReport()
+    report_path = os.path.join(temp_directory, "report.json")
+
+    voronoi_map(
+        features_file_path=mock_saved_geojson_file_path,
+        boundary_file_path=mock_saved_geojson_mask_file_path,
+        save_path=os.path.join(temp_directory, "reported.geojson"),
+        instrumentation=report,
+    )
+    report.write_json(report_path)
+
+    with open(report_path) as f:
+        saved_report = json.load(f)
+    assert [stage["stage"] for stage in saved_report["stages"]] == [
+        "load_mask",
+        "prepare_mask",
+        "load_sites",
+        "voronoi",
+        "cells",
+        "geodataframe",
+        "clip",
+        "write",
+    ]
+    assert saved_report["stages"][2]["items"] == 5
+    assert saved_report["stages"][2]["peak_bytes"] is None
+    assert saved_report["total_wall_seconds"] == sum(
+        stage["wall_seconds"] for stage in saved_report["stages"]
+    )
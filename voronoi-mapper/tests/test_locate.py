@@ -0,0 +1,101 @@
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+from scipy.spatial import Voronoi
+from shapely.geometry import Polygon
+from voronoi_mapper.geometry import PreparedMask
+from voronoi_mapper.locate import SiteLocator
+from voronoi_mapper.models import BoundingBox
+from voronoi_mapper.voronoi import get_cells_from_voronoi
+
+
+@pytest.fixture
+def sites():
+    return np.random.default_rng(2).random((200, 2)) * 10
+
+
+@pytest.fixture
+def mask():
+    return Polygon(
+        [(1, 1), (9, 2), (8, 9), (5, 6), (2, 8)], holes=[[(4, 3), (6, 3), (5, 4)]]
+    )
+
+
+@pytest.fixture
+def bounding_box():
+    return BoundingBox(xmin=-1, xmax=11, ymin=-1, ymax=11)
+
+
+@pytest.fixture
+def locator(sites, mask, bounding_box):
+    cells = get_cells_from_voronoi(voronoi=Voronoi(sites), bounding_box=bounding_box)
+    return SiteLocator(
+        sites=sites,
+        cells=cells,
+        clipped=PreparedMask(mask=mask).clip(cells=cells),
+        mask=mask,
+        bounding_box=bounding_box,
+    )
+
+
+def get_containing_cells(points, cells, mask):
+    """Find the cell of each point the slow way, by polygon containment."""
+    clipped = PreparedMask(mask=mask).clip(cells=cells)
+    point_indices, cell_indices = shapely.STRtree(clipped).query(
+        shapely.points(points), predicate="intersects"
+    )
+    expected = np.full(len(points), -1)
+    expected[point_indices] = cell_indices
+    return expected
+
+
+@pytest.mark.parametrize("chunk_size, max_workers", [(10_000, 1), (333, 4)])
+def test_site_locator_matches_containment(
+    sites, mask, bounding_box, locator, chunk_size, max_workers
+):
+    points = np.random.default_rng(3).uniform(-2, 12, size=(5000, 2))
+    cells = get_cells_from_voronoi(voronoi=Voronoi(sites), bounding_box=bounding_box)
+
+    located = locator.locate(
+        points=points, chunk_size=chunk_size, max_workers=max_workers
+    )
+
+    assert located.dtype == np.intp
+    assert np.array_equal(located, get_containing_cells(points, cells, mask))
+    outside_box = np.any(np.abs(points - 5) > 6, axis=1)
+    assert np.all(located[outside_box] == -1)
+
+
+def test_site_locator_from_clipped_cells(sites, mask, bounding_box):
+    cells = get_cells_from_voronoi(voronoi=Voronoi(sites), bounding_box=bounding_box)
+    clipped = PreparedMask(mask=mask).clip(cells=cells)
+    kept = np.flatnonzero(~shapely.is_empty(clipped))
+    points = np.random.default_rng(3).uniform(-2, 12, size=(5000, 2))
+
+    locator = SiteLocator.from_clipped_cells(
+        sites=sites,
+        cells=gpd.GeoDataFrame(geometry=clipped[kept], index=kept),
+        mask=mask,
+    )
+
+    assert np.array_equal(
+        locator.locate(points=points, max_workers=1),
+        get_containing_cells(points, cells, mask),
+    )
+
+
+def test_site_locator_points(locator):
+    located = locator.locate(points=[[5, 3.5], [0, 0], [12, 5], [3, 3]], max_workers=1)
+
+    assert located[:3].tolist() == [-1, -1, -1]
+    assert located[3] == np.argmin(np.linalg.norm(locator.tree.data - [3, 3], axis=1))
+
+
+def test_site_locator_leaves_mask_unprepared(locator, mask):
+    assert shapely.is_prepared(locator.mask)
+    assert not shapely.is_prepared(mask)
+
+
+def test_site_locator_no_points(locator):
+    assert locator.locate(points=np.empty((0, 2))).tolist() == []
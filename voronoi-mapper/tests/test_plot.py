@@ -2,6 +2,7 @@ import os
 
 import pytest
 from shapely.geometry import MultiPolygon, Polygon
+from voronoi_mapper.models import BoundingBox
 from voronoi_mapper.plot import plot_voronoi
 
 
@@ -23,3 +24,51 @@ def test_plot_voronoi(mock_voronoi, mock_bounding_box, mask, temp_directory):
     )
 
     assert file_name in os.listdir(temp_directory)
+
+
+@pytest.mark.parametrize(
+    "mask, bounding_box",
+    [
+        (Polygon([(1, 1), (3, 1), (3, 3), (1, 3)]), None),
+        (
+            MultiPolygon(
+                [
+                    Polygon([(1, 1), (3, 1), (3, 3), (1, 3)]),
+                    # smaller than a pixel
+                    Polygon([(5, 5), (5.001, 5), (5.001, 5.001)]),
+                ]
+            ),
+            BoundingBox(xmin=-10, xmax=10, ymin=-10, ymax=10),
+        ),
+    ],
+)
+def test_plot_voronoi_fast(mock_voronoi, mask, bounding_box, temp_directory):
+    file_path = os.path.join(temp_directory, "test_image.png")
+
+    plot_voronoi(
+        voronoi=mock_voronoi,
+        save_path=file_path,
+        boundary=mask,
+        bounding_box=bounding_box,
+        fast=True,
+        dpi=50,
+    )
+
+    assert os.path.getsize(file_path) > 0
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_plot_voronoi_rasterized(mock_voronoi, mock_bounding_box, fast, temp_directory):
+    file_path = os.path.join(temp_directory, "test_image.svg")
+
+    plot_voronoi(
+        voronoi=mock_voronoi,
+        save_path=file_path,
+        boundary=Polygon([(1, 1), (3, 1), (3, 3), (1, 3)]),
+        bounding_box=mock_bounding_box,
+        fast=fast,
+        rasterized=True,
+    )
+
+    with open(file_path) as f:
+        assert "<image" in f.read()
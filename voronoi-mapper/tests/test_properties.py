@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from voronoi_mapper.properties import PropertyColumns, PropertyTable
+
+
+def test_property_columns_append():
+    properties = PropertyColumns()
+
+    properties.append({"name": "a"})
+    properties.append(None)
+    properties.append({"name": "c", "size": 3})
+    properties.append({"size": 4})
+
+    assert len(properties) == 4
+    assert properties.columns == {
+        "name": ["a", None, "c", None],
+        "size": [None, None, 3, 4],
+    }
+
+
+@pytest.mark.parametrize(
+    "values,expected_dtype",
+    [
+        ([True, False], np.dtype(bool)),
+        ([1, 2, np.int64(3)], np.dtype(np.int64)),
+        ([1, None, 2.5], np.dtype(np.float64)),
+        ([1, True], np.dtype(object)),
+        (["a", None], np.dtype(object)),
+        ([[1, 2], [3]], np.dtype(object)),
+    ],
+)
+def test_property_columns_to_table_dtypes(values, expected_dtype):
+    properties = PropertyColumns()
+    for value in values:
+        properties.append({"value": value})
+
+    table = properties.to_table()
+
+    assert table.columns["value"].dtype == expected_dtype
+    assert len(table.columns["value"]) == len(values)
+
+
+def test_property_columns_to_table():
+    properties = PropertyColumns()
+    properties.append({"name": "a", "size": 1})
+    properties.append({"name": "b", "size": None})
+
+    table = properties.to_table()
+
+    assert len(table) == 2
+    assert list(table.columns) == ["name", "size"]
+    assert table.columns["name"].tolist() == ["a", "b"]
+    assert table.columns["size"][0] == 1
+    assert np.isnan(table.columns["size"][1])
+    assert properties.columns == {}
+
+
+def test_property_table_take():
+    table = PropertyTable(
+        columns={"name": np.array(["a", "b", "c"], dtype=object)}, length=3
+    )
+
+    taken = table.take([2, 0])
+
+    assert len(taken) == 2
+    assert taken.columns["name"].tolist() == ["c", "a"]
+
+
+def test_property_table_concat():
+    table = PropertyTable(
+        columns={
+            "count": np.array([1, 2]),
+            "name": np.array(["a", "b"], dtype=object),
+            "size": np.array([3, 4]),
+        },
+        length=2,
+    )
+    other = PropertyTable(
+        columns={"count": np.array([3.5]), "flag": np.array([True])}, length=1
+    )
+
+    joined = table.concat(other)
+
+    assert len(joined) == 3
+    assert list(joined.columns) == ["count", "name", "size", "flag"]
+    assert joined.columns["count"].tolist() == [1, 2, 3.5]
+    assert joined.columns["name"].tolist() == ["a", "b", None]
+    assert joined.columns["size"][:2].tolist() == [3, 4]
+    assert np.isnan(joined.columns["size"][2])
+    assert joined.columns["flag"].tolist() == [None, None, True]
@@ -0,0 +1,241 @@
+import os
+
+import geopandas as gpd
+import numpy as np
+import pytest
+from shapely.geometry import LineString, Point, Polygon
+from voronoi_mapper.geojson import load_sites_from_geojson
+from voronoi_mapper.readers import (
+    iter_sites,
+    load_sites,
+    load_sites_from_csv,
+    load_sites_from_flatgeobuf,
+    load_sites_from_geoparquet,
+)
+from voronoi_mapper.site_store import convert_geojson_to_site_store
+from voronoi_mapper.voronoi import voronoi_map
+
+
+@pytest.fixture
+def sites_geodataframe():
+    return gpd.GeoDataFrame(
+        {
+            "name": ["a", None, "c"],
+            "count": [1, 2, 3],
+            "score": [0.5, None, 1.5],
+            "open": [True, False, True],
+            "geometry": [Point(0, 1), Point(2, 3), Point(4, 5)],
+        },
+        crs=4326,
+    )
+
+
+def _check_sites(points, properties, columns):
+    np.testing.assert_array_equal(points, [[0, 1], [2, 3], [4, 5]])
+    assert points.dtype == np.float64 and points.flags["C_CONTIGUOUS"]
+    assert list(properties.columns) == columns
+    assert len(properties) == 3
+
+    expected = {
+        "name": ["a", None, "c"],
+        "count": [1, 2, 3],
+        "open": [True, False, True],
+    }
+    for key in columns:
+        if key == "score":
+            np.testing.assert_array_equal(properties.columns[key], [0.5, np.nan, 1.5])
+        else:
+            assert properties.columns[key].tolist() == expected[key]
+
+    dtypes = {"name": object, "count": np.int64, "score": np.float64, "open": bool}
+    for key in columns:
+        assert properties.columns[key].dtype == dtypes[key]
+
+
+@pytest.mark.parametrize("geometry_encoding", ["WKB", "geoarrow"])
+def test_load_sites_from_geoparquet(
+    sites_geodataframe, temp_directory, geometry_encoding
+):
+    pytest.importorskip("pyarrow")
+    if geometry_encoding == "WKB":
+        # WKB is the only encoding geopandas < 1.0 writes, and it takes no option
+        write_options = {}
+    else:
+        pytest.importorskip("geopandas", minversion="1.0")
+        write_options = {"geometry_encoding": geometry_encoding}
+    file_path = os.path.join(temp_directory, f"sites_{geometry_encoding}.parquet")
+    sites_geodataframe.to_parquet(file_path, **write_options)
+
+    _check_sites(
+        *load_sites_from_geoparquet(parquet_path=file_path),
+        columns=["name", "count", "score", "open"],
+    )
+    _check_sites(
+        *load_sites_from_geoparquet(parquet_path=file_path, columns=["count"]),
+        columns=["count"],
+    )
+
+
+def test_load_sites_from_flatgeobuf(sites_geodataframe, temp_directory):
+    pytest.importorskip("pyarrow")
+    pytest.importorskip("pyogrio")
+    file_path = os.path.join(temp_directory, "sites.fgb")
+    sites_geodataframe.to_file(file_path, driver="FlatGeobuf", SPATIAL_INDEX="NO")
+
+    _check_sites(
+        *load_sites_from_flatgeobuf(flatgeobuf_path=file_path),
+        columns=["name", "count", "score", "open"],
+    )
+    _check_sites(
+        *load_sites_from_flatgeobuf(flatgeobuf_path=file_path, columns=["name"]),
+        columns=["name"],
+    )
+
+
+def test_load_sites_from_csv(temp_directory):
+    pytest.importorskip("pyarrow")
+    file_path = os.path.join(temp_directory, "sites.csv")
+    with open(file_path, "w") as f:
+        f.write("name,lon,count,lat,score,open\n")
+        f.write("a,0,1,1,0.5,true\n,2,2,3,,false\nc,4,3,5,1.5,true\n")
+
+    _check_sites(
+        *load_sites_from_csv(csv_path=file_path),
+        columns=["name", "count", "score", "open"],
+    )
+    _check_sites(
+        *load_sites_from_csv(csv_path=file_path, columns=["score", "name"]),
+        columns=["score", "name"],
+    )
+
+
+def test_load_sites_first_coordinate(temp_directory):
+    pytest.importorskip("pyarrow")
+    file_path = os.path.join(temp_directory, "shapes.parquet")
+    gpd.GeoDataFrame(
+        geometry=[LineString([(0, 1), (9, 9)]), Polygon([(2, 3), (3, 3), (2, 4)])]
+    ).to_parquet(file_path)
+
+    points, properties = load_sites(file_path=file_path)
+
+    np.testing.assert_array_equal(points, [[0, 1], [2, 3]])
+    assert properties.columns == {}
+
+
+def test_load_sites_empty_geometry(temp_directory):
+    pytest.importorskip("pyarrow")
+    file_path = os.path.join(temp_directory, "empty.parquet")
+    gpd.GeoDataFrame(geometry=[Point(0, 1), Point()]).to_parquet(file_path)
+
+    with pytest.raises(ValueError):
+        load_sites(file_path=file_path)
+
+
+def test_load_sites_geojson_columns(mock_saved_geojson_file_path):
+    points, properties = load_sites(
+        file_path=mock_saved_geojson_file_path, columns=["name"]
+    )
+    expected_points, expected_properties = load_sites_from_geojson(
+        geojson_path=mock_saved_geojson_file_path
+    )
+
+    np.testing.assert_array_equal(points, expected_points)
+    assert list(properties.columns) == ["name"]
+    assert (
+        properties.columns["name"].tolist()
+        == expected_properties.columns["name"].tolist()
+    )
+
+
+def _write_sites(sites_geodataframe, file_path):
+    if file_path.endswith(".parquet"):
+        sites_geodataframe.to_parquet(file_path)
+    elif file_path.endswith(".fgb"):
+        sites_geodataframe.to_file(file_path, driver="FlatGeobuf", SPATIAL_INDEX="NO")
+    elif file_path.endswith(".csv"):
+        sites_geodataframe.assign(
+            lon=sites_geodataframe.geometry.x, lat=sites_geodataframe.geometry.y
+        ).drop(columns="geometry").to_csv(file_path, index=False)
+    else:
+        geojson_path = file_path.replace(".sites", ".geojson")
+        sites_geodataframe.to_file(geojson_path, driver="GeoJSON")
+        if file_path.endswith(".sites"):
+            convert_geojson_to_site_store(
+                geojson_path=geojson_path, store_path=file_path
+            )
+
+
+@pytest.mark.parametrize(
+    "file_name",
+    ["sites.parquet", "sites.fgb", "sites.csv", "sites.geojson", "sites.sites"],
+)
+@pytest.mark.parametrize("columns", [None, ["count"]])
+def test_iter_sites(sites_geodataframe, temp_directory, file_name, columns):
+    if not file_name.endswith((".geojson", ".sites")):
+        pytest.importorskip("pyarrow")
+        pytest.importorskip("pyogrio")
+    file_path = os.path.join(temp_directory, file_name)
+    _write_sites(sites_geodataframe, file_path)
+
+    chunks = list(iter_sites(file_path=file_path, columns=columns, chunk_size=2))
+    points, properties = load_sites(file_path=file_path, columns=columns)
+
+    assert [len(chunk_points) for chunk_points, _ in chunks] == [2, 1]
+    np.testing.assert_array_equal(
+        np.concatenate([chunk_points for chunk_points, _ in chunks]), points
+    )
+    for key, column in properties.columns.items():
+        np.testing.assert_array_equal(
+            np.concatenate([chunk.columns[key] for _, chunk in chunks]), column
+        )
+    assert [len(chunk) for _, chunk in chunks] == [2, 1]
+
+
+def test_iter_sites_csv_blocks(temp_directory):
+    pytest.importorskip("pyarrow")
+    file_path = os.path.join(temp_directory, "sites.csv")
+    with open(file_path, "w") as f:
+        f.write("lon,lat,value\n")
+        f.writelines(f"{i},{i},{i}\n" for i in range(5))
+
+    chunks = list(iter_sites(file_path=file_path, chunk_size=2))
+
+    assert [chunk.columns["value"].tolist() for _, chunk in chunks] == [
+        [0, 1],
+        [2, 3],
+        [4],
+    ]
+
+
+def test_voronoi_map_from_csv(
+    mock_saved_geojson_file_path, mock_saved_geojson_mask_file_path, temp_directory
+):
+    pytest.importorskip("pyarrow")
+    points, properties = load_sites_from_geojson(
+        geojson_path=mock_saved_geojson_file_path
+    )
+    csv_path = os.path.join(temp_directory, "sites.csv")
+    with open(csv_path, "w") as f:
+        f.write("lon,lat,name\n")
+        for (lon, lat), name in zip(points.tolist(), properties.columns["name"]):
+            f.write(f"{lon},{lat},{name}\n")
+    geojson_save_path = os.path.join(temp_directory, "from_geojson.geojson")
+    csv_save_path = os.path.join(temp_directory, "from_csv.geojson")
+
+    voronoi_map(
+        features_file_path=mock_saved_geojson_file_path,
+        boundary_file_path=mock_saved_geojson_mask_file_path,
+        save_path=geojson_save_path,
+        property_columns=["name"],
+    )
+    voronoi_map(
+        features_file_path=csv_path,
+        boundary_file_path=mock_saved_geojson_mask_file_path,
+        save_path=csv_save_path,
+    )
+
+    from_geojson = gpd.read_file(geojson_save_path)
+    from_csv = gpd.read_file(csv_save_path)
+    assert list(from_geojson.columns) == ["name", "geometry"]
+    assert from_geojson["name"].tolist() == from_csv["name"].tolist()
+    assert from_geojson.geom_equals(from_csv.geometry).all()
@@ -0,0 +1,174 @@
+import json
+import os
+import pickle
+
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+from scipy.spatial import Voronoi
+from voronoi_mapper.geojson import load_sites_from_geojson
+from voronoi_mapper.models import BoundingBox
+from voronoi_mapper.readers import load_sites
+from voronoi_mapper.site_store import (
+    MappedArray,
+    convert_geojson_to_site_store,
+    open_site_store,
+    write_site_store,
+)
+from voronoi_mapper.tiling import get_cells_tiled
+from voronoi_mapper.voronoi import get_cells_from_voronoi, voronoi_map
+
+
+@pytest.fixture
+def random_points():
+    return np.random.default_rng(0).random((500, 2)) * 10
+
+
+def test_site_store_round_trip(random_points, temp_directory):
+    store_path = os.path.join(temp_directory, "points.sites")
+    ids = np.arange(len(random_points)) * 3
+
+    write_site_store(store_path=store_path, points=random_points, ids=ids)
+    store = open_site_store(store_path=store_path)
+
+    assert isinstance(store.points, np.memmap)
+    assert len(store) == len(random_points)
+    np.testing.assert_array_equal(store.points, random_points)
+    np.testing.assert_array_equal(store.ids, ids)
+
+
+def test_site_store_default_ids_and_empty(temp_directory):
+    store_path = os.path.join(temp_directory, "points.sites")
+    write_site_store(store_path=store_path, points=[[1, 2], [3, 4]])
+    np.testing.assert_array_equal(open_site_store(store_path=store_path).ids, [0, 1])
+
+    write_site_store(store_path=store_path, points=np.empty((0, 2)))
+    assert len(open_site_store(store_path=store_path)) == 0
+
+
+def test_site_store_errors(temp_directory):
+    store_path = os.path.join(temp_directory, "points.sites")
+
+    with pytest.raises(ValueError):
+        write_site_store(store_path=store_path, points=[[1, 2]], ids=[1, 2])
+
+    with open(store_path, "wb") as f:
+        f.write(b"not a site store")
+    with pytest.raises(ValueError):
+        open_site_store(store_path=store_path)
+
+    write_site_store(store_path=store_path, points=[[1, 2]])
+    with open(store_path, "r+b") as f:
+        f.seek(8)
+        f.write(b"\x09")
+    with pytest.raises(ValueError):
+        open_site_store(store_path=store_path)
+
+
+def test_convert_geojson_to_site_store(mock_saved_geojson_file_path, temp_directory):
+    store_path = os.path.join(temp_directory, "converted.sites")
+    points, _ = load_sites_from_geojson(geojson_path=mock_saved_geojson_file_path)
+
+    convert_geojson_to_site_store(
+        geojson_path=mock_saved_geojson_file_path, store_path=store_path
+    )
+    store_points, properties = load_sites(file_path=store_path)
+
+    np.testing.assert_array_equal(store_points, points)
+    np.testing.assert_array_equal(properties.columns["id"], np.arange(len(points)))
+    assert load_sites(file_path=store_path, columns=[])[1].columns == {}
+
+
+def test_convert_geojson_to_site_store_id_property(temp_directory):
+    geojson_path = os.path.join(temp_directory, "with_ids.geojson")
+    store_path = os.path.join(temp_directory, "with_ids.sites")
+    gpd.GeoDataFrame(
+        {"site_id": [7, 3]}, geometry=shapely.points([[0, 0], [1, 1]])
+    ).to_file(geojson_path, driver="GeoJSON")
+
+    convert_geojson_to_site_store(
+        geojson_path=geojson_path, store_path=store_path, id_property="site_id"
+    )
+
+    np.testing.assert_array_equal(open_site_store(store_path=store_path).ids, [7, 3])
+
+
+@pytest.mark.parametrize(
+    "properties",
+    [
+        [{"name": "a"}, {"name": "b"}],
+        [{"site_id": 7}, {}],
+        [{"site_id": 7}, {"site_id": None}],
+        [{"site_id": 7}, {"site_id": 3.5}],
+        [{"site_id": 7}, {"site_id": "3"}],
+    ],
+)
+def test_convert_geojson_to_site_store_bad_id_property(temp_directory, properties):
+    geojson_path = os.path.join(temp_directory, "bad_ids.geojson")
+    store_path = os.path.join(temp_directory, "bad_ids.sites")
+    features = [
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [i, i]},
+            "properties": feature_properties,
+        }
+        for i, feature_properties in enumerate(properties)
+    ]
+    with open(geojson_path, "w") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+
+    with pytest.raises(ValueError):
+        convert_geojson_to_site_store(
+            geojson_path=geojson_path, store_path=store_path, id_property="site_id"
+        )
+    assert not os.path.exists(store_path)
+
+
+def test_mapped_array_pickles_location(random_points, temp_directory):
+    store_path = os.path.join(temp_directory, "points.sites")
+    write_site_store(store_path=store_path, points=random_points)
+    store = open_site_store(store_path=store_path)
+
+    mapped_array = pickle.loads(pickle.dumps(MappedArray.from_memmap(store.points)))
+
+    assert len(pickle.dumps(mapped_array)) < store.points.nbytes
+    np.testing.assert_array_equal(mapped_array.open(), random_points)
+
+
+def test_get_cells_tiled_from_site_store(random_points, temp_directory):
+    store_path = os.path.join(temp_directory, "points.sites")
+    write_site_store(store_path=store_path, points=random_points)
+    bounding_box = BoundingBox(xmin=-1, xmax=11, ymin=-1, ymax=11)
+    expected_cells = get_cells_from_voronoi(
+        voronoi=Voronoi(random_points), bounding_box=bounding_box
+    )
+
+    cells = get_cells_tiled(
+        points=open_site_store(store_path=store_path).points,
+        bounding_box=bounding_box,
+        tiles=(2, 2),
+        max_workers=2,
+    )
+
+    assert np.all(
+        shapely.area(shapely.symmetric_difference(cells, expected_cells)) < 1e-9
+    )
+
+
+def test_voronoi_map_from_site_store(
+    mock_saved_geojson_file_path, mock_saved_geojson_mask_file_path, temp_directory
+):
+    store_path = os.path.join(temp_directory, "sites.sites")
+    save_path = os.path.join(temp_directory, "from_store.geojson")
+    convert_geojson_to_site_store(
+        geojson_path=mock_saved_geojson_file_path, store_path=store_path
+    )
+
+    voronoi_map(
+        features_file_path=store_path,
+        boundary_file_path=mock_saved_geojson_mask_file_path,
+        save_path=save_path,
+    )
+
+    assert list(gpd.read_file(save_path).columns) == ["id", "geometry"]
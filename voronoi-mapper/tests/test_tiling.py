@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+import shapely
+from scipy.spatial import Voronoi
+from voronoi_mapper.models import BoundingBox
+from voronoi_mapper.tiling import (
+    get_cells_for_sites,
+    get_cells_tiled,
+    get_chunk_order,
+    iter_cells_in_chunks,
+    split_sites_into_tiles,
+)
+from voronoi_mapper.voronoi import get_cells_from_voronoi
+
+
+@pytest.fixture
+def clustered_points():
+    rng = np.random.default_rng(0)
+    points = rng.random((600, 2)) * 10
+    points[:200] *= 0.1
+    return points
+
+
+@pytest.fixture
+def clustered_bounding_box():
+    return BoundingBox(xmin=-1, xmax=11, ymin=-1, ymax=11)
+
+
+def test_split_sites_into_tiles(clustered_points):
+    tile_site_indices = split_sites_into_tiles(points=clustered_points, tiles=(3, 2))
+
+    all_indices = np.concatenate(tile_site_indices)
+    assert len(tile_site_indices) == 6
+    assert sorted(all_indices.tolist()) == list(range(len(clustered_points)))
+
+
+def test_get_cells_for_sites(clustered_points, clustered_bounding_box):
+    expected_cells = get_cells_from_voronoi(
+        voronoi=Voronoi(clustered_points), bounding_box=clustered_bounding_box
+    )
+    site_indices = np.array([0, 150, 250, 599])
+
+    cells = get_cells_for_sites(
+        points=clustered_points,
+        site_indices=site_indices,
+        bounding_box=clustered_bounding_box,
+        halo=0.01,
+    )
+
+    assert np.all(
+        shapely.area(shapely.symmetric_difference(cells, expected_cells[site_indices]))
+        < 1e-9
+    )
+
+
+def test_get_cells_for_sites_few_points(mock_voronoi, mock_bounding_box):
+    expected_cells = get_cells_from_voronoi(
+        voronoi=mock_voronoi, bounding_box=mock_bounding_box
+    )
+
+    cells = get_cells_for_sites(
+        points=mock_voronoi.points,
+        site_indices=np.array([1]),
+        bounding_box=mock_bounding_box,
+        halo=0.1,
+    )
+
+    assert cells[0].equals(expected_cells[1])
+
+
+def test_get_cells_tiled_matches_single_process(
+    clustered_points, clustered_bounding_box
+):
+    expected_cells = get_cells_from_voronoi(
+        voronoi=Voronoi(clustered_points), bounding_box=clustered_bounding_box
+    )
+
+    cells = get_cells_tiled(
+        points=clustered_points,
+        bounding_box=clustered_bounding_box,
+        tiles=(3, 3),
+        max_workers=2,
+    )
+
+    assert np.all(
+        shapely.area(shapely.symmetric_difference(cells, expected_cells)) < 1e-9
+    )
+
+
+def test_get_chunk_order(clustered_points):
+    order = get_chunk_order(points=clustered_points, chunk_size=150)
+
+    assert sorted(order.tolist()) == list(range(len(clustered_points)))
+    # two strips of 300 sites, so each run of 150 lies in one, ordered along y
+    for start in range(0, len(order), 150):
+        run = clustered_points[order[start : start + 150]]
+        assert np.all(np.diff(run[:, 1]) >= 0)
+
+
+@pytest.mark.parametrize("tiles", [None, (2, 2)])
+def test_iter_cells_in_chunks(clustered_points, clustered_bounding_box, tiles):
+    expected_cells = get_cells_from_voronoi(
+        voronoi=Voronoi(clustered_points), bounding_box=clustered_bounding_box
+    )
+
+    chunks = list(
+        iter_cells_in_chunks(
+            points=clustered_points,
+            bounding_box=clustered_bounding_box,
+            chunk_size=250,
+            tiles=tiles,
+            max_workers=2,
+        )
+    )
+
+    assert [len(site_indices) for site_indices, _ in chunks] == [250, 250, 100]
+    assert all(np.all(np.diff(site_indices) > 0) for site_indices, _ in chunks)
+    site_indices = np.concatenate([site_indices for site_indices, _ in chunks])
+    cells = np.concatenate([cells for _, cells in chunks])
+    assert sorted(site_indices.tolist()) == list(range(len(clustered_points)))
+    assert np.all(
+        shapely.area(shapely.symmetric_difference(cells, expected_cells[site_indices]))
+        < 1e-9
+    )
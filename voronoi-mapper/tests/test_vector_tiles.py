@@ -0,0 +1,370 @@
+import gzip
+import json
+import sqlite3
+import struct
+
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+from shapely.geometry import MultiPolygon, Polygon, box
+from voronoi_mapper.vector_tiles import (
+    TileLayer,
+    encode_tile,
+    get_tile_features,
+    lon_lat_to_unit_mercator,
+    write_vector_tiles,
+)
+
+
+def _read_varint(data: bytes, position: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[position]
+        value |= (byte & 0x7F) << shift
+        position += 1
+        shift += 7
+        if byte < 0x80:
+            return value, position
+
+
+def _read_fields(data: bytes) -> list[tuple[int, object]]:
+    fields = []
+    position = 0
+    while position < len(data):
+        key, position = _read_varint(data, position)
+        field, wire_type = key >> 3, key & 7
+        if wire_type == 0:
+            value, position = _read_varint(data, position)
+        elif wire_type == 1:
+            value = struct.unpack("<d", data[position : position + 8])[0]
+            position += 8
+        else:
+            length, position = _read_varint(data, position)
+            value = data[position : position + length]
+            position += length
+        fields.append((field, value))
+    return fields
+
+
+def _read_packed(data: bytes) -> list[int]:
+    values = []
+    position = 0
+    while position < len(data):
+        value, position = _read_varint(data, position)
+        values.append(value)
+    return values
+
+
+def _unzigzag(value: int) -> int:
+    return (value >> 1) ^ -(value & 1)
+
+
+def _decode_value(data: bytes):
+    ((field, value),) = _read_fields(data)
+    if field == 1:
+        return value.decode()
+    if field == 6:
+        return _unzigzag(value)
+    if field == 7:
+        return bool(value)
+    return value
+
+
+def _decode_rings(commands: list[int]) -> list[list[tuple[int, int]]]:
+    rings = []
+    x = y = 0
+    position = 0
+    while position < len(commands):
+        command, count = commands[position] & 7, commands[position] >> 3
+        position += 1
+        if command == 7:
+            continue
+        if command == 1:
+            rings.append([])
+        for _ in range(count):
+            x += _unzigzag(commands[position])
+            y += _unzigzag(commands[position + 1])
+            position += 2
+            rings[-1].append((x, y))
+    return rings
+
+
+def _signed_area(ring: list[tuple[int, int]]) -> float:
+    return shapely.Polygon(ring).area * (
+        1 if shapely.Polygon(ring).exterior.is_ccw else -1
+    )
+
+
+def decode_tile(data: bytes) -> dict:
+    """Decode a vector tile into its layers, enough to check what was written."""
+    layers = {}
+    for _, layer_data in _read_fields(data):
+        fields = _read_fields(layer_data)
+        keys = [value.decode() for field, value in fields if field == 3]
+        values = [_decode_value(value) for field, value in fields if field == 4]
+        features = []
+        for feature_data in (value for field, value in fields if field == 2):
+            feature = dict(_read_fields(feature_data))
+            tags = _read_packed(feature.get(2, b""))
+            features.append(
+                {
+                    "id": feature.get(1),
+                    "type": feature[3],
+                    "properties": {
+                        keys[key]: values[value]
+                        for key, value in zip(tags[::2], tags[1::2])
+                    },
+                    "rings": _decode_rings(_read_packed(feature[4])),
+                }
+            )
+        layer = dict(fields)
+        layers[layer[1].decode()] = {
+            "version": layer[15],
+            "extent": layer[5],
+            "features": features,
+        }
+    return layers
+
+
+@pytest.fixture
+def cells_geodataframe():
+    return gpd.GeoDataFrame(
+        {
+            "name": ["a", None, "c"],
+            "count": [1, -2, 3],
+            "share": [0.5, np.nan, 1.5],
+            "flag": [True, False, True],
+            "geometry": [
+                box(-10, -10, 0, 10),
+                box(0, -10, 10, 10).difference(box(2, -2, 4, 2)),
+                MultiPolygon([box(10, -10, 20, -1), box(10, 1, 20, 10)]),
+            ],
+        },
+        index=[4, 7, 9],
+    )
+
+
+def test_lon_lat_to_unit_mercator():
+    points = lon_lat_to_unit_mercator(
+        shapely.points([[-180, 0], [0, 0], [180, 90], [0, -90]])
+    )
+    assert np.allclose(
+        shapely.get_coordinates(points), [[0, 0.5], [0.5, 0.5], [1, 0], [0.5, 1]]
+    )
+
+
+def test_get_tile_features():
+    geometries = np.array(
+        [
+            # reaches all four tiles at zoom 1 from its bounds, but not the
+            # south-east one in reality
+            Polygon([(0.1, 0.1), (0.7, 0.1), (0.1, 0.7)]),
+            box(0.6, 0.6, 0.7, 0.7),
+        ]
+    )
+    tiles, feature_indices, starts = get_tile_features(geometries=geometries, zoom=1)
+    assert tiles.tolist() == [[0, 0], [0, 1], [1, 0], [1, 1]]
+    assert [group.tolist() for group in np.split(feature_indices, starts[1:])] == [
+        [0],
+        [0],
+        [0],
+        [1],
+    ]
+
+
+def test_encode_tile(cells_geodataframe):
+    layer = TileLayer(
+        name="cells",
+        feature_ids=np.array([4, 7]),
+        columns={"name": ["a", None], "count": [1, -2], "items": [[1, 2], None]},
+    )
+    geometries = np.array(
+        [
+            box(0.25, 0.25, 0.5, 0.5).difference(box(0.3, 0.3, 0.4, 0.4)),
+            # smaller than a tile unit
+            box(0.6, 0.6, 0.6 + 1e-5, 0.6 + 1e-5),
+        ]
+    )
+    data = encode_tile(
+        layer=layer, tile=(0, 0, 0), geometries=geometries, rows=np.array([0, 1])
+    )
+
+    layers = decode_tile(data)
+    assert list(layers) == ["cells"]
+    assert layers["cells"]["version"] == 2
+    assert layers["cells"]["extent"] == 4096
+    (feature,) = layers["cells"]["features"]
+    assert feature["id"] == 4
+    assert feature["type"] == 3
+    assert feature["properties"] == {"name": "a", "count": 1, "items": "[1, 2]"}
+    exterior, interior = feature["rings"]
+    assert sorted(exterior) == [(1024, 1024), (1024, 2048), (2048, 1024), (2048, 2048)]
+    assert sorted(set(interior)) == [
+        (1229, 1229),
+        (1229, 1638),
+        (1638, 1229),
+        (1638, 1638),
+    ]
+    assert _signed_area(exterior) > 0
+    assert _signed_area(interior) < 0
+
+
+def test_encode_tile_empty():
+    layer = TileLayer(name="cells", feature_ids=None, columns={})
+    geometries = np.array([box(0.6, 0.6, 0.6 + 1e-5, 0.6 + 1e-5)])
+    assert (
+        encode_tile(
+            layer=layer, tile=(0, 0, 0), geometries=geometries, rows=np.array([0])
+        )
+        is None
+    )
+
+
+def test_encode_tile_clips_to_buffer():
+    layer = TileLayer(name="cells", feature_ids=None, columns={"value": [2.5]})
+    data = encode_tile(
+        layer=layer,
+        tile=(1, 1, 0),
+        geometries=np.array([box(0, 0, 1, 1)]),
+        rows=np.array([0]),
+    )
+    (feature,) = decode_tile(data)["cells"]["features"]
+    assert feature["id"] is None
+    assert feature["properties"] == {"value": 2.5}
+    assert sorted(feature["rings"][0]) == [
+        (-64, 0),
+        (-64, 4160),
+        (4096, 0),
+        (4096, 4160),
+    ]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_write_vector_tiles_directory(tmp_path, cells_geodataframe, max_workers):
+    n_tiles = write_vector_tiles(
+        gdf=cells_geodataframe,
+        save_path=tmp_path / "tiles",
+        min_zoom=0,
+        max_zoom=2,
+        max_workers=max_workers,
+    )
+
+    paths = sorted(
+        str(path.relative_to(tmp_path / "tiles"))
+        for path in (tmp_path / "tiles").rglob("*.pbf")
+    )
+    # the cells straddle the equator and the prime meridian
+    assert paths == [
+        "0/0/0.pbf",
+        "1/0/0.pbf",
+        "1/0/1.pbf",
+        "1/1/0.pbf",
+        "1/1/1.pbf",
+        "2/1/1.pbf",
+        "2/1/2.pbf",
+        "2/2/1.pbf",
+        "2/2/2.pbf",
+    ]
+    assert n_tiles == len(paths)
+
+    layers = decode_tile((tmp_path / "tiles" / "0" / "0" / "0.pbf").read_bytes())
+    features = layers["cells"]["features"]
+    assert [feature["id"] for feature in features] == [4, 7, 9]
+    assert [feature["properties"] for feature in features] == [
+        {"name": "a", "count": 1, "share": 0.5, "flag": True},
+        {"count": -2, "flag": False},
+        {"name": "c", "count": 3, "share": 1.5, "flag": True},
+    ]
+    # the hole and both parts of the multipolygon
+    assert [len(feature["rings"]) for feature in features] == [1, 2, 2]
+
+
+def test_write_vector_tiles_mbtiles(tmp_path, cells_geodataframe):
+    save_path = tmp_path / "cells.mbtiles"
+    save_path.write_bytes(b"old")
+    n_tiles = write_vector_tiles(
+        gdf=cells_geodataframe,
+        save_path=save_path,
+        min_zoom=1,
+        max_zoom=1,
+        layer_name="voronoi",
+        max_workers=1,
+    )
+    assert n_tiles == 4
+
+    connection = sqlite3.connect(save_path)
+    metadata = dict(connection.execute("SELECT name, value FROM metadata"))
+    tiles = connection.execute(
+        "SELECT zoom_level, tile_column, tile_row, tile_data FROM tiles "
+        "ORDER BY tile_column, tile_row"
+    ).fetchall()
+    connection.close()
+
+    assert metadata["format"] == "pbf"
+    assert metadata["minzoom"] == metadata["maxzoom"] == "1"
+    assert metadata["bounds"] == "-10.0,-10.0,20.0,10.0"
+    assert json.loads(metadata["json"]) == {
+        "vector_layers": [
+            {
+                "id": "voronoi",
+                "fields": {
+                    "name": "String",
+                    "count": "Number",
+                    "share": "Number",
+                    "flag": "Boolean",
+                },
+                "minzoom": 1,
+                "maxzoom": 1,
+            }
+        ]
+    }
+    assert [tile[:3] for tile in tiles] == [(1, 0, 0), (1, 0, 1), (1, 1, 0), (1, 1, 1)]
+    # rows count from the south, so row 0 is the southern half, where the cells
+    # only reach down from its northern edge
+    (south_west,) = decode_tile(gzip.decompress(tiles[0][3])).values()
+    ys = [
+        y
+        for feature in south_west["features"]
+        for ring in feature["rings"]
+        for _, y in ring
+    ]
+    assert min(ys) == -64
+    assert max(ys) < 512
+
+
+def test_write_vector_tiles_reprojects(tmp_path, cells_geodataframe):
+    projected = cells_geodataframe.set_crs(4326).to_crs(3857)
+    write_vector_tiles(
+        gdf=projected, save_path=tmp_path / "projected", max_zoom=1, max_workers=1
+    )
+    write_vector_tiles(
+        gdf=cells_geodataframe, save_path=tmp_path / "plain", max_zoom=1, max_workers=1
+    )
+    for path in (tmp_path / "plain").rglob("*.pbf"):
+        projected_path = tmp_path / "projected" / path.relative_to(tmp_path / "plain")
+        assert decode_tile(projected_path.read_bytes()) == decode_tile(
+            path.read_bytes()
+        )
+
+
+def test_write_vector_tiles_string_index(tmp_path, cells_geodataframe):
+    write_vector_tiles(
+        gdf=cells_geodataframe.set_index("name"),
+        save_path=tmp_path / "tiles",
+        max_zoom=0,
+        max_workers=1,
+    )
+    layers = decode_tile((tmp_path / "tiles" / "0" / "0" / "0.pbf").read_bytes())
+    assert [feature["id"] for feature in layers["cells"]["features"]] == [None] * 3
+
+
+@pytest.mark.parametrize("min_zoom, max_zoom", [(-1, 2), (3, 2)])
+def test_write_vector_tiles_bad_zooms(tmp_path, cells_geodataframe, min_zoom, max_zoom):
+    with pytest.raises(ValueError):
+        write_vector_tiles(
+            gdf=cells_geodataframe,
+            save_path=tmp_path / "tiles",
+            min_zoom=min_zoom,
+            max_zoom=max_zoom,
+        )
@@ -1,14 +1,18 @@
-from pdb import set_trace
-
 import geopandas as gpd
+import numpy as np
 import pytest
 from shapely import unary_union
-from shapely.geometry import MultiPolygon, Polygon
+from shapely.geometry import MultiPolygon, Point, Polygon
 from shapely.ops import shape
 from voronoi_mapper.models import BoundingBox, Edges
+from voronoi_mapper.properties import PropertyTable
 from voronoi_mapper.voronoi import (
+    create_geodataframe_from_cells_and_properties,
     create_geodataframe_from_polygons_and_features,
     get_bounding_box,
+    get_bounding_box_from_points,
+    get_cells_from_voronoi,
+    get_line_segment_arrays_from_voronoi,
     get_line_segments_from_voronoi,
     get_polygons_from_voronoi,
     match_point_features_to_polygons,
@@ -46,6 +50,33 @@ def test_get_line_segments_from_voronoi(mock_voronoi, mock_bounding_box):
     )
 
 
+def test_get_line_segment_arrays_from_voronoi(mock_voronoi, mock_bounding_box):
+    voronoi_segments = get_line_segment_arrays_from_voronoi(
+        mock_voronoi, mock_bounding_box
+    )
+
+    expected_segments = np.array(
+        [
+            [[-0.5, 1.5], [-10, 6.25]],
+            [[-0.5, 1.5], [2.5, 1.5]],
+            [[-0.5, 1.5], [10, -9.0]],
+            [[2.5, 1.5], [-6.0, 10]],
+            [[2.5, 1.5], [10, -2.25]],
+        ]
+    )
+
+    assert voronoi_segments.segments.shape == (5, 2, 2)
+    assert np.allclose(voronoi_segments.segments, expected_segments)
+    assert np.allclose(voronoi_segments.bounding_box_intersections["top"], [[-6, 10]])
+    assert np.allclose(
+        voronoi_segments.bounding_box_intersections["right"], [[10, -9], [10, -2.25]]
+    )
+    assert voronoi_segments.bounding_box_intersections["bottom"].shape == (0, 2)
+    assert np.allclose(
+        voronoi_segments.bounding_box_intersections["left"], [[-10, 6.25]]
+    )
+
+
 def test_get_polygons_from_voronoi(
     mock_voronoi, mock_bounding_box, mock_expected_polygons
 ):
@@ -59,6 +90,30 @@ def test_get_polygons_from_voronoi(
     assert unified_polygons.equals(expected_unified_polygon)
 
 
+def test_get_cells_from_voronoi(
+    mock_voronoi, mock_bounding_box, mock_expected_polygons
+):
+    cells = get_cells_from_voronoi(voronoi=mock_voronoi, bounding_box=mock_bounding_box)
+
+    assert len(cells) == len(mock_voronoi.points)
+    for cell, point in zip(cells, mock_voronoi.points):
+        assert cell.contains(Point(point))
+        assert any(
+            cell.symmetric_difference(polygon).area < 1e-9
+            for polygon in mock_expected_polygons
+        )
+
+
+def test_get_cells_from_voronoi_small_bounding_box(mock_voronoi):
+    cells = get_cells_from_voronoi(
+        voronoi=mock_voronoi,
+        bounding_box=BoundingBox(xmin=1.5, xmax=3, ymin=2.5, ymax=4),
+    )
+
+    assert [cell.is_empty for cell in cells] == [True, True, False, True]
+    assert cells[2].equals(Polygon([(1.5, 2.5), (3, 2.5), (3, 4), (1.5, 4)]))
+
+
 def test_point_inside_polygon():
     polygon = Polygon([(0, 0), (2, 0), (2, 2), (0, 2)])
     feature = {"geometry": {"type": "Point", "coordinates": (1, 1)}}
@@ -91,6 +146,21 @@ def test_multiple_points():
     assert result[1][0].equals(polygons[1])
 
 
+def test_multiple_points_from_generator(mock_voronoi, mock_bounding_box):
+    features = [
+        {"geometry": {"type": "Point", "coordinates": point}}
+        for point in mock_voronoi.points.tolist()
+    ]
+    polygon_generator = get_polygons_from_voronoi(
+        voronoi=mock_voronoi, bounding_box=mock_bounding_box
+    )
+    result = match_point_features_to_polygons(polygon_generator, features)
+    assert len(result) == len(features)
+    assert all(
+        polygon.contains(shape(feature["geometry"])) for polygon, feature in result
+    )
+
+
 @pytest.mark.parametrize(
     "matched_polygons_and_features,expected_geodataframe",
     [
@@ -147,6 +217,50 @@ def test_create_geodataframe_from_polygons_and_features(
     assert gdf.equals(expected_geodataframe)
 
 
+def test_create_geodataframe_from_cells_and_properties():
+    cells = np.array(
+        [
+            Polygon([(0, 0), (1, 0), (1, 1)]),
+            Polygon(),
+            Polygon([(1, 1), (2, 1), (2, 2)]),
+        ],
+        dtype=object,
+    )
+    properties = PropertyTable(
+        columns={"name": np.array(["a", "b", "c"], dtype=object)}, length=3
+    )
+
+    gdf = create_geodataframe_from_cells_and_properties(
+        cells=cells, properties=properties
+    )
+
+    assert list(gdf.columns) == ["geometry", "name"]
+    assert gdf.index.tolist() == [0, 2]
+    assert gdf["name"].tolist() == ["a", "c"]
+    assert gdf.geometry.iloc[1].equals(cells[2])
+
+
+def test_create_geodataframe_from_cells_and_properties_site_indices():
+    cells = np.array(
+        [
+            Polygon(),
+            Polygon([(0, 0), (1, 0), (1, 1)]),
+            Polygon([(1, 1), (2, 1), (2, 2)]),
+        ],
+        dtype=object,
+    )
+    properties = PropertyTable(
+        columns={"name": np.array(["a", "b", "c", "d"], dtype=object)}, length=4
+    )
+
+    gdf = create_geodataframe_from_cells_and_properties(
+        cells=cells, properties=properties, site_indices=np.array([0, 1, 3])
+    )
+
+    assert gdf.index.tolist() == [1, 3]
+    assert gdf["name"].tolist() == ["b", "d"]
+
+
 @pytest.mark.parametrize(
     "mask,expected_bounding_box",
     [
@@ -164,3 +278,12 @@ def test_get_bounding_box(mock_voronoi, mask, expected_bounding_box):
     bounding_box = get_bounding_box(voronoi=mock_voronoi, mask=mask)
 
     assert bounding_box == expected_bounding_box
+
+
+def test_get_bounding_box_from_points(mock_points):
+    bounding_box = get_bounding_box_from_points(
+        points=np.array(mock_points),
+        mask=Polygon([(1, 1), (5, 1), (5, 3), (1, 3)]),
+    )
+
+    assert bounding_box == BoundingBox(xmin=-1, xmax=6, ymin=-1, ymax=4)
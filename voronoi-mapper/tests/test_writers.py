@@ -0,0 +1,234 @@
+import json
+import os
+
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+from shapely.geometry import MultiPolygon, box
+from voronoi_mapper.properties import PropertyTable
+from voronoi_mapper.voronoi import voronoi_map
+from voronoi_mapper.writers import get_output_format, write_cell_chunks, write_cells
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+pyogrio = pytest.importorskip("pyogrio")
+
+
+@pytest.fixture
+def cells_geodataframe():
+    return gpd.GeoDataFrame(
+        {
+            "name": ["a", None, "c", "d", "e"],
+            "count": [1, 2, 3, 4, 5],
+            "geometry": [
+                box(0, 0, 1, 1),
+                box(1, 0, 2, 1),
+                MultiPolygon([box(2, 0, 3, 1), box(4, 0, 5, 1)]),
+                box(5, 0, 6, 1),
+                box(6, 0, 7, 1),
+            ],
+        },
+        index=[3, 5, 8, 9, 12],
+        crs=27700,
+    )
+
+
+@pytest.fixture
+def cells_properties():
+    return PropertyTable(
+        columns={
+            "name": np.array(["a", None, "c", "d", "e"], dtype=object),
+            "count": np.array([1, 2, 3, 4, 5]),
+        },
+        length=5,
+    )
+
+
+@pytest.mark.parametrize(
+    "save_path, output_format, expected",
+    [
+        ("cells.geojson", None, "geojson"),
+        ("cells.PARQUET", None, "geoparquet"),
+        ("cells.fgb", None, "flatgeobuf"),
+        ("cells.arrow", None, "wkb_arrow"),
+        ("cells.txt", None, "geojson"),
+        ("cells.geojson", "geoparquet", "geoparquet"),
+    ],
+)
+def test_get_output_format(save_path, output_format, expected):
+    assert get_output_format(save_path=save_path, output_format=output_format) == (
+        expected
+    )
+
+
+def test_get_output_format_unknown():
+    with pytest.raises(ValueError):
+        get_output_format(save_path="cells.geojson", output_format="shapefile")
+
+
+@pytest.mark.parametrize("extension", ["geojson", "parquet", "fgb"])
+def test_write_cells_round_trip(cells_geodataframe, temp_directory, extension):
+    save_path = os.path.join(temp_directory, f"cells.{extension}")
+
+    write_cells(gdf=cells_geodataframe, save_path=save_path, chunk_size=2)
+
+    written = (
+        gpd.read_parquet(save_path)
+        if extension == "parquet"
+        else gpd.read_file(save_path)
+    )
+    # FlatGeobuf reorders features along its spatial index
+    written = written.sort_values("count").reset_index(drop=True)
+    expected = cells_geodataframe.reset_index(drop=True)
+    assert written.crs == expected.crs
+    assert written["name"].tolist() == expected["name"].tolist()
+    assert written["count"].tolist() == expected["count"].tolist()
+    assert written.geom_equals(expected.geometry).all()
+
+
+def test_write_cells_wkb_arrow(cells_geodataframe, temp_directory):
+    save_path = os.path.join(temp_directory, "cells.arrow")
+
+    write_cells(gdf=cells_geodataframe, save_path=save_path, chunk_size=2)
+
+    with pa.ipc.open_file(save_path) as reader:
+        assert reader.num_record_batches == 3
+        table = reader.read_all()
+    field = table.schema.field("geometry")
+    assert field.metadata[b"ARROW:extension:name"] == b"geoarrow.wkb"
+    assert table["count"].to_pylist() == [1, 2, 3, 4, 5]
+    assert shapely.equals(
+        shapely.from_wkb(table["geometry"].to_numpy(zero_copy_only=False)),
+        cells_geodataframe.geometry.to_numpy(),
+    ).all()
+
+
+@pytest.mark.parametrize("extension", ["geojson", "parquet", "fgb", "arrow"])
+def test_write_cell_chunks_matches_write_cells(
+    cells_geodataframe, cells_properties, temp_directory, extension
+):
+    eager_directory = os.path.join(temp_directory, "eager")
+    os.mkdir(eager_directory)
+    eager_path = os.path.join(eager_directory, f"cells.{extension}")
+    streamed_path = os.path.join(temp_directory, f"cells.{extension}")
+    write_cells(gdf=cells_geodataframe, save_path=eager_path, chunk_size=2)
+
+    chunks = [
+        cells_geodataframe.iloc[:2],
+        cells_geodataframe.iloc[2:2],
+        cells_geodataframe.iloc[2:],
+    ]
+    written = write_cell_chunks(
+        chunks=iter(chunks),
+        save_path=streamed_path,
+        properties=cells_properties,
+        crs=cells_geodataframe.crs,
+        chunk_size=2,
+    )
+
+    assert written == len(cells_geodataframe)
+    # the spool file is removed
+    assert sorted(os.listdir(temp_directory)) == sorted(["eager", f"cells.{extension}"])
+    if extension == "arrow":
+        with pa.ipc.open_file(eager_path) as eager, pa.ipc.open_file(
+            streamed_path
+        ) as streamed:
+            assert streamed.read_all().equals(eager.read_all(), check_metadata=True)
+    elif extension == "parquet":
+        assert pq.read_table(streamed_path).equals(
+            pq.read_table(eager_path), check_metadata=True
+        )
+    elif extension == "geojson":
+        with open(eager_path) as eager, open(streamed_path) as streamed:
+            assert streamed.read() == eager.read()
+    else:
+        streamed_info = pyogrio.read_info(streamed_path)
+        eager_info = pyogrio.read_info(eager_path)
+        assert streamed_info["geometry_type"] == eager_info["geometry_type"]
+        assert streamed_info["crs"] == eager_info["crs"]
+        streamed, eager = gpd.read_file(streamed_path), gpd.read_file(eager_path)
+        assert streamed.drop(columns="geometry").equals(eager.drop(columns="geometry"))
+        assert streamed.geom_equals_exact(eager.geometry, tolerance=0).all()
+
+
+def test_write_cell_chunks_column_types(temp_directory):
+    properties = PropertyTable(
+        columns={
+            "name": np.array([None, None, "c", "d"], dtype=object),
+            "missing": np.full(4, None, dtype=object),
+            "ids": np.array([[1], None, [2, 3], []], dtype=object),
+            "flag": np.array([True, False, True, False]),
+            "value": np.array([0.5, np.nan, 1.5, 2.5]),
+        },
+        length=4,
+    )
+    gdf = gpd.GeoDataFrame(
+        {"geometry": [box(x, 0, x + 1, 1) for x in range(4)], **properties.columns}
+    )
+    eager_path = os.path.join(temp_directory, "eager.arrow")
+    streamed_path = os.path.join(temp_directory, "streamed.arrow")
+    write_cells(gdf=gdf, save_path=eager_path)
+
+    # the first chunk has no names, the column is still typed from every row
+    write_cell_chunks(
+        chunks=iter([gdf.iloc[:2], gdf.iloc[2:]]),
+        save_path=streamed_path,
+        properties=properties,
+    )
+
+    with pa.ipc.open_file(eager_path) as eager, pa.ipc.open_file(
+        streamed_path
+    ) as streamed:
+        assert streamed.read_all().equals(eager.read_all(), check_metadata=True)
+
+
+def test_write_cell_chunks_empty(cells_properties, temp_directory):
+    save_path = os.path.join(temp_directory, "cells.parquet")
+
+    written = write_cell_chunks(
+        chunks=iter([]), save_path=save_path, properties=cells_properties
+    )
+
+    assert written == 0
+    assert len(gpd.read_parquet(save_path)) == 0
+    geo_metadata = json.loads(pq.read_schema(save_path).metadata[b"geo"])
+    assert "bbox" not in geo_metadata["columns"]["geometry"]
+
+
+@pytest.mark.parametrize(
+    "geometries, expected",
+    [
+        ([box(0, 0, 1, 1)], ["Polygon"]),
+        (
+            [box(0, 0, 1, 1), MultiPolygon([box(2, 0, 3, 1)])],
+            ["Polygon", "MultiPolygon"],
+        ),
+        # any other geometry type makes the column hold any type
+        ([box(0, 0, 1, 1), shapely.Point(0, 0)], []),
+    ],
+)
+def test_write_geoparquet_metadata(temp_directory, geometries, expected):
+    save_path = os.path.join(temp_directory, "cells.parquet")
+
+    write_cells(gdf=gpd.GeoDataFrame(geometry=geometries), save_path=save_path)
+
+    column = json.loads(pq.read_schema(save_path).metadata[b"geo"])["columns"][
+        "geometry"
+    ]
+    assert column["geometry_types"] == expected
+    assert len(column["bbox"]) == 4
+
+
+def test_voronoi_map_geoparquet(
+    mock_saved_geojson_file_path, mock_saved_geojson_mask_file_path, temp_directory
+):
+    save_path = os.path.join(temp_directory, "saved_file.parquet")
+
+    voronoi_map(
+        features_file_path=mock_saved_geojson_file_path,
+        boundary_file_path=mock_saved_geojson_mask_file_path,
+        save_path=save_path,
+    )
+
+    assert len(gpd.read_parquet(save_path)) > 0
@@ -0,0 +1,98 @@
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+from voronoi_mapper.locate import SiteLocator
+from voronoi_mapper.properties import PropertyTable
+from voronoi_mapper.readers import DEFAULT_CHUNK_SIZE, iter_sites
+
+AGGREGATE_STATISTICS = ("sum", "mean", "min", "max")
+
+# each chunk of events is split into pieces this size across the locate threads
+_LOCATE_CHUNK_SIZE = 65_536
+
+
+def aggregate_events(
+    events_file_path: Path | str,
+    locator: SiteLocator,
+    columns: Sequence[str] = (),
+    statistics: Sequence[str] = ("sum", "mean"),
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_workers: int | None = None,
+) -> PropertyTable:
+    """
+    Count the events in every cell and reduce their values, in one pass over the events.
+
+    Events are read in chunks, found in cells by their nearest site and added to
+    running totals with `np.bincount`, so only one chunk is held in memory at a time.
+
+    Parameters:
+    - events_file_path (Path | str): A point layer in any format `iter_sites` reads.
+    - locator (SiteLocator): Finds the cell of each event.
+    - columns (Sequence[str]): Numeric event properties to reduce. Missing values
+      are left out.
+    - statistics (Sequence[str]): Reductions of each column, any of
+      `AGGREGATE_STATISTICS`.
+    - chunk_size (int): Events read at a time.
+    - max_workers (int | None): Threads to locate events with, see `SiteLocator.locate`.
+
+    Returns:
+    - PropertyTable: A row per site with the "event_count" column and a
+      "<column>_<statistic>" column per reduction. Reductions of cells without
+      values are NaN.
+    """
+    unknown = sorted(set(statistics) - set(AGGREGATE_STATISTICS))
+    if unknown:
+        raise ValueError(
+            f"Unknown statistics {unknown}, expected any of {list(AGGREGATE_STATISTICS)}."
+        )
+
+    n_sites = len(locator.site_status)
+    counts = np.zeros(n_sites, dtype=np.int64)
+    value_counts = {column: np.zeros(n_sites, dtype=np.int64) for column in columns}
+    sums = {column: np.zeros(n_sites) for column in columns}
+    minima = {column: np.full(n_sites, np.inf) for column in columns}
+    maxima = {column: np.full(n_sites, -np.inf) for column in columns}
+
+    for points, properties in iter_sites(
+        file_path=events_file_path, columns=columns, chunk_size=chunk_size
+    ):
+        sites = locator.locate(
+            points=points, chunk_size=_LOCATE_CHUNK_SIZE, max_workers=max_workers
+        )
+        located = sites >= 0
+        sites = sites[located]
+        counts += np.bincount(sites, minlength=n_sites)
+
+        for column in columns:
+            # chunks of GeoJSON without the property have no column for it
+            if column not in properties.columns:
+                continue
+            values = np.asarray(properties.columns[column], dtype=np.float64)[located]
+            has_value = ~np.isnan(values)
+            value_sites, values = sites[has_value], values[has_value]
+
+            value_counts[column] += np.bincount(value_sites, minlength=n_sites)
+            sums[column] += np.bincount(value_sites, weights=values, minlength=n_sites)
+            if "min" in statistics:
+                np.minimum.at(minima[column], value_sites, values)
+            if "max" in statistics:
+                np.maximum.at(maxima[column], value_sites, values)
+
+    result = {"event_count": counts}
+    for column in columns:
+        has_values = value_counts[column] > 0
+        reductions = {
+            "sum": np.where(has_values, sums[column], np.nan),
+            "mean": np.divide(
+                sums[column],
+                value_counts[column],
+                out=np.full(n_sites, np.nan),
+                where=has_values,
+            ),
+            "min": np.where(has_values, minima[column], np.nan),
+            "max": np.where(has_values, maxima[column], np.nan),
+        }
+        for statistic in statistics:
+            result[f"{column}_{statistic}"] = reductions[statistic]
+    return PropertyTable(columns=result, length=n_sites)
@@ -0,0 +1,152 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Sequence
+
+import shapely
+from shapely.geometry import MultiPolygon, Polygon
+from voronoi_mapper.cache import StageCache, load_mask_geojson_cached
+from voronoi_mapper.geometry import PreparedMask
+from voronoi_mapper.instrumentation import Instrumentation, measure_stage
+from voronoi_mapper.models import BoundingBox
+from voronoi_mapper.voronoi import map_layer
+
+_worker_mask: PreparedMask | None = None
+_worker_cache: StageCache | None = None
+
+
+def _init_worker(
+    mask: Polygon | MultiPolygon,
+    tile_size: float | None,
+    cache_dir: Path | str | None,
+):  # pragma: no cover
+    global _worker_mask, _worker_cache
+    _worker_mask = PreparedMask(mask=mask, tile_size=tile_size)
+    _worker_cache = None if cache_dir is None else StageCache(directory=cache_dir)
+
+
+def _map_layer_in_worker(
+    features_file_path: Path | str,
+    save_path: Path | str,
+    bounding_box: BoundingBox | None,
+    output_format: str | None,
+    property_columns: Sequence[str] | None,
+    coalesce_tolerance: float | None,
+    chunk_size: int | None,
+):  # pragma: no cover
+    map_layer(
+        features_file_path=features_file_path,
+        mask=_worker_mask,
+        save_path=save_path,
+        bounding_box=bounding_box,
+        cache=_worker_cache,
+        output_format=output_format,
+        property_columns=property_columns,
+        coalesce_tolerance=coalesce_tolerance,
+        chunk_size=chunk_size,
+    )
+
+
+def voronoi_map_batch(
+    features_file_paths: Sequence[Path | str],
+    boundary_file_path: Path | str,
+    save_paths: Sequence[Path | str],
+    bounding_box: BoundingBox | None = None,
+    mask_tile_size: float | None = None,
+    max_workers: int | None = 1,
+    cache_dir: Path | str | None = None,
+    instrumentation: Instrumentation | None = None,
+    output_format: str | None = None,
+    property_columns: Sequence[str] | None = None,
+    mask_simplify_tolerance: float | None = None,
+    mask_coverage: bool = False,
+    coalesce_tolerance: float | None = None,
+    chunk_size: int | None = None,
+):
+    """
+    Map many point layers against one boundary, loading and preparing it only once.
+
+    Parameters:
+    - features_file_paths (Sequence[Path | str]): Point layers to map, in any format
+      `load_sites` reads.
+    - boundary_file_path (Path | str): The GeoJSON boundary shared by every layer.
+    - save_paths (Sequence[Path | str]): Where to save the cells of each layer.
+    - bounding_box (BoundingBox | None): Box for every layer, by default one is
+      worked out per layer.
+    - mask_tile_size (float | None): Cut the mask into tiles of this size for clipping.
+    - max_workers (int | None): Layers are mapped in this process when 1, otherwise
+      across a pool of processes that each prepare the mask once. None uses
+      every CPU.
+    - cache_dir (Path | str | None): Cache the mask and the stages of every layer
+      here, see `StageCache`.
+    - instrumentation (Instrumentation | None): Receives the stages of the shared
+      mask and, when mapping in this process, of every layer.
+    - output_format (str | None): Format of every output, see `write_cells`.
+    - property_columns (Sequence[str] | None): Properties to read from every layer,
+      all of them by default.
+    - mask_simplify_tolerance (float | None): Simplify the mask to this tolerance.
+    - mask_coverage (bool): Union the boundary features as a coverage, see
+      `load_mask_geojson`.
+    - coalesce_tolerance (float | None): Merge the sites of each layer closer than
+      this first, see `coalesce_sites`.
+    - chunk_size (int | None): Stream the cells of every layer this many sites at
+      a time, see `voronoi_map`.
+
+    Each layer goes through the same stages as `voronoi_map`, only the mask is
+    loaded and prepared once for the whole batch.
+    """
+    if len(features_file_paths) != len(save_paths):
+        raise ValueError(
+            f"Got {len(features_file_paths)} feature files "
+            f"but {len(save_paths)} save paths."
+        )
+
+    cache = None if cache_dir is None else StageCache(directory=cache_dir)
+
+    with measure_stage(instrumentation, "load_mask") as stage:
+        mask = load_mask_geojson_cached(
+            geojson_path=boundary_file_path,
+            cache=cache,
+            bounding_box=bounding_box,
+            simplify_tolerance=mask_simplify_tolerance,
+            coverage=mask_coverage,
+        )
+        stage.items = int(shapely.get_num_coordinates(mask))
+
+    if max_workers == 1:
+        with measure_stage(instrumentation, "prepare_mask") as stage:
+            prepared_mask = PreparedMask(mask=mask, tile_size=mask_tile_size)
+            stage.items = len(prepared_mask.parts)
+
+        for features_file_path, save_path in zip(features_file_paths, save_paths):
+            map_layer(
+                features_file_path=features_file_path,
+                mask=prepared_mask,
+                save_path=save_path,
+                bounding_box=bounding_box,
+                cache=cache,
+                instrumentation=instrumentation,
+                output_format=output_format,
+                property_columns=property_columns,
+                coalesce_tolerance=coalesce_tolerance,
+                chunk_size=chunk_size,
+            )
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(mask, mask_tile_size, cache_dir),
+    ) as executor:
+        # consume the results so errors from the workers are raised here
+        list(
+            executor.map(
+                _map_layer_in_worker,
+                features_file_paths,
+                save_paths,
+                [bounding_box] * len(save_paths),
+                [output_format] * len(save_paths),
+                [property_columns] * len(save_paths),
+                [coalesce_tolerance] * len(save_paths),
+                [chunk_size] * len(save_paths),
+            )
+        )
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Callable, Sequence, TypeVar
+
+import numpy as np
+import shapely
+from shapely.geometry import MultiPolygon, Polygon
+from voronoi_mapper.geojson import load_mask_geojson, load_sites_from_geojson
+from voronoi_mapper.models import BoundingBox
+from voronoi_mapper.properties import PropertyTable
+from voronoi_mapper.readers import load_sites
+
+T = TypeVar("T")
+
+_ENTRY_SUFFIX = ".pkl"
+
+
+def _hash_file(file_path: Path | str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _encode_param(value: Any) -> str:
+    # the repr of a geometry is cut short, so geometries are keyed on their WKB
+    if isinstance(value, shapely.Geometry):
+        return hashlib.sha256(shapely.to_wkb(value)).hexdigest()
+    return repr(value)
+
+
+class StageCache:
+    """A content-addressed on-disk cache for the results of pipeline stages.
+
+    Entries are keyed by the stage name, the hashes of its input files and its
+    parameters, so an entry is only reused while the inputs are unchanged. The
+    least recently used entries are evicted once the directory holds more than
+    `max_bytes`. Entries are pickled, so only point it at a directory you trust.
+    """
+
+    def __init__(self, directory: Path | str, max_bytes: int = 1 << 30):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._file_hashes: dict[tuple[str, int, int], str] = {}
+
+    def _get_file_hash(self, file_path: Path | str) -> str:
+        stat = os.stat(file_path)
+        signature = (str(Path(file_path).resolve()), stat.st_size, stat.st_mtime_ns)
+        if signature not in self._file_hashes:
+            self._file_hashes[signature] = _hash_file(file_path=file_path)
+        return self._file_hashes[signature]
+
+    def key(
+        self,
+        stage: str,
+        file_paths: Sequence[Path | str],
+        params: dict[str, Any] | None = None,
+    ) -> str:
+        content = {
+            "stage": stage,
+            "files": [self._get_file_hash(file_path) for file_path in file_paths],
+            "params": params or {},
+        }
+        encoded = json.dumps(content, sort_keys=True, default=_encode_param).encode(
+            "utf-8"
+        )
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / f"{key}{_ENTRY_SUFFIX}"
+
+    def get(self, key: str) -> Any | None:
+        """Get a cached value, or None if there is no entry for the key."""
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        # mark as recently used for eviction
+        os.utime(entry_path)
+        return value
+
+    def put(self, key: str, value: Any):
+        entry_path = self._entry_path(key)
+        temp_path = entry_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(temp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, entry_path)
+        self._evict()
+
+    def _evict(self):
+        entries = [
+            (entry.stat().st_mtime_ns, entry.stat().st_size, entry)
+            for entry in self.directory.glob(f"*{_ENTRY_SUFFIX}")
+        ]
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda entry: entry[0]):
+            if total_bytes <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total_bytes -= size
+
+
+def cached_stage(
+    cache: StageCache | None,
+    stage: str,
+    file_paths: Sequence[Path | str],
+    params: dict[str, Any] | None,
+    compute: Callable[[], T],
+    dump: Callable[[T], Any] = lambda value: value,
+    load: Callable[[Any], T] = lambda value: value,
+) -> T:
+    """Run a stage, or reuse its cached result when a cache is given.
+
+    `dump` and `load` convert the result to and from the stored form.
+    """
+    if cache is None:
+        return compute()
+
+    key = cache.key(stage=stage, file_paths=file_paths, params=params)
+    stored = cache.get(key)
+    if stored is not None:
+        return load(stored)
+
+    value = compute()
+    cache.put(key, dump(value))
+    return value
+
+
+def load_sites_cached(
+    file_path: Path | str,
+    cache: StageCache | None,
+    columns: Sequence[str] | None = None,
+) -> tuple[np.ndarray, PropertyTable]:
+    """Load sites through the cache, except site stores which are memory mapped.
+
+    Mapping a site store is quicker than hashing and unpickling it, and keeps
+    its pages shared with the tile workers.
+    """
+    if Path(file_path).suffix.lower() == ".sites":
+        return load_sites(file_path=file_path, columns=columns)
+    return cached_stage(
+        cache=cache,
+        stage="sites",
+        file_paths=[file_path],
+        params={"columns": None if columns is None else list(columns)},
+        compute=lambda: load_sites(file_path=file_path, columns=columns),
+    )
+
+
+def load_mask_geojson_cached(
+    geojson_path: Path | str,
+    cache: StageCache | None,
+    bounding_box: BoundingBox | None = None,
+    simplify_tolerance: float | None = None,
+    coverage: bool = False,
+) -> Polygon | MultiPolygon:
+    return cached_stage(
+        cache=cache,
+        stage="mask",
+        file_paths=[geojson_path],
+        params={
+            "bounding_box": bounding_box,
+            "simplify_tolerance": simplify_tolerance,
+            "coverage": coverage,
+        },
+        compute=lambda: load_mask_geojson(
+            geojson_path=geojson_path,
+            bounding_box=bounding_box,
+            simplify_tolerance=simplify_tolerance,
+            coverage=coverage,
+        ),
+        dump=shapely.to_wkb,
+        load=shapely.from_wkb,
+    )
@@ -0,0 +1,81 @@
+import json
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+from voronoi_mapper.properties import PropertyTable
+
+
+def _number_by_first_appearance(labels: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Renumber group labels 0, 1, ... in the order groups first appear.
+
+    Returns the new labels and the first row of each group.
+    """
+    _, first_rows, inverse = np.unique(labels, return_index=True, return_inverse=True)
+    order = np.argsort(first_rows)
+    ranks = np.empty_like(order)
+    ranks[order] = np.arange(len(order))
+    return ranks[inverse.reshape(-1)], first_rows[order]
+
+
+def coalesce_sites(
+    points: np.ndarray, tolerance: float = 0.0
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Merge sites closer together than a tolerance into one site.
+
+    Sites are merged transitively, so a chain of sites each within the tolerance
+    of the next becomes a single site. With a tolerance of 0 only exact
+    duplicates are merged.
+
+    Parameters:
+    - points (np.ndarray): An (N, 2) array of sites.
+    - tolerance (float): Largest distance between sites that are merged.
+
+    Returns:
+    - tuple[np.ndarray, np.ndarray]: The coordinates of the remaining sites, in the
+      order of their first input point, and the remaining site index of every input point.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+
+    if tolerance == 0:
+        # as complex numbers, coordinate pairs sort and compare in one go
+        coordinates = np.ascontiguousarray(points).view(np.complex128).reshape(-1)
+        _, labels = np.unique(coordinates, return_inverse=True)
+    else:
+        pairs = cKDTree(points).query_pairs(r=tolerance, output_type="ndarray")
+        graph = coo_matrix(
+            (np.ones(len(pairs), dtype=bool), (pairs[:, 0], pairs[:, 1])),
+            shape=(len(points), len(points)),
+        )
+        _, labels = connected_components(graph, directed=False)
+
+    feature_sites, first_rows = _number_by_first_appearance(labels.reshape(-1))
+    return points[first_rows], feature_sites
+
+
+def coalesce_properties(
+    properties: PropertyTable, feature_sites: np.ndarray, n_sites: int
+) -> PropertyTable:
+    """Reduce the properties of the features merged into each site.
+
+    Every column keeps the value of the site's first feature, with its type,
+    so sites that merged nothing keep their properties as they were. The
+    "feature_count" column counts the merged features, and "feature_indices"
+    lists their input rows as a JSON array.
+    """
+    _, first_rows = np.unique(feature_sites, return_index=True)
+    order = np.argsort(feature_sites, kind="stable")
+    starts = np.searchsorted(feature_sites[order], np.arange(n_sites)).tolist()
+    ends = starts[1:] + [len(feature_sites)]
+    sorted_rows = order.tolist()
+
+    columns = {key: column[first_rows] for key, column in properties.columns.items()}
+    columns["feature_count"] = np.diff(starts + [len(feature_sites)]).astype(np.int64)
+    columns["feature_indices"] = np.fromiter(
+        (json.dumps(sorted_rows[start:end]) for start, end in zip(starts, ends)),
+        dtype=object,
+        count=n_sites,
+    )
+    return PropertyTable(columns=columns, length=n_sites)
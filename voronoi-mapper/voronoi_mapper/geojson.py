@@ -1,35 +1,229 @@
 import json
 from pathlib import Path
+from typing import Any, Generator, Sequence, TextIO
 
+import numpy as np
+import shapely
 from shapely import get_coordinates
 from shapely.geometry import shape
 from shapely.ops import unary_union
+from voronoi_mapper.models import BoundingBox
+from voronoi_mapper.properties import PropertyColumns, PropertyTable
 
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
 
-def _load_geojson_file(geojson_path: str | Path):
-    # TODO: extend to yaml
+
+class _JSONStream:
+    """Decodes JSON values one at a time from a file, holding only a small buffer."""
+
+    def __init__(self, file: TextIO, buffer_size: int):
+        self._file = file
+        self._buffer_size = buffer_size
+        self._buffer = ""
+        self._position = 0
+        self._exhausted = False
+
+    def _read_more(self) -> bool:
+        if self._exhausted:
+            return False
+        chunk = self._file.read(self._buffer_size)
+        if not chunk:
+            self._exhausted = True
+            return False
+        self._buffer = self._buffer[self._position :] + chunk
+        self._position = 0
+        return True
+
+    def next_character(self) -> str:
+        """Skip whitespace and return the next character without consuming it."""
+        while True:
+            while (
+                self._position < len(self._buffer)
+                and self._buffer[self._position] in _WHITESPACE
+            ):
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._read_more():
+                raise ValueError("Unexpected end of GeoJSON file.")
+
+    def expect(self, character: str):
+        found = self.next_character()
+        if found != character:
+            raise ValueError(
+                f"Expected '{character}' in GeoJSON file, found '{found}'."
+            )
+        self._position += 1
+
+    def decode(self) -> Any:
+        """Decode the next complete JSON value, reading more of the file as needed."""
+        self.next_character()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                if not self._read_more():
+                    raise
+                continue
+            # a number could carry on into the next chunk
+            if end == len(self._buffer) and self._read_more():
+                continue
+            self._position = end
+            return value
+
+
+def iter_geojson_features(
+    geojson_path: str | Path, buffer_size: int = 1 << 20
+) -> Generator[dict, None, None]:
+    """Yield the features of a GeoJSON FeatureCollection one at a time.
+
+    The file is read incrementally, so only the current feature and a buffer
+    of `buffer_size` characters are held in memory.
+    """
     with open(geojson_path, "r", encoding="utf-8") as f:
-        points_geojson_obj = json.load(f)
-    return points_geojson_obj
+        stream = _JSONStream(file=f, buffer_size=buffer_size)
+        stream.expect("{")
+        if stream.next_character() == "}":
+            return
+
+        while True:
+            key = stream.decode()
+            stream.expect(":")
+            if key != "features":
+                stream.decode()
+            else:
+                stream.expect("[")
+                if stream.next_character() != "]":
+                    while True:
+                        yield stream.decode()
+                        if stream.next_character() != ",":
+                            break
+                        stream.expect(",")
+                stream.expect("]")
+
+            if stream.next_character() != ",":
+                break
+            stream.expect(",")
+        stream.expect("}")
+
+
+def _get_point_coordinates(geometry: dict) -> list[float]:
+    """Get the x and y of a point geometry, or the first coordinate of any other."""
+    if geometry["type"] == "Point":
+        return geometry["coordinates"][:2]
+    return get_coordinates(shape(geometry))[0].tolist()
+
+
+def _select_properties(
+    feature_properties: dict | None, columns: Sequence[str] | None
+) -> dict | None:
+    if columns is None or not feature_properties:
+        return feature_properties
+    return {
+        key: feature_properties[key] for key in columns if key in feature_properties
+    }
+
+
+def load_sites_from_geojson(
+    geojson_path: str | Path,
+    buffer_size: int = 1 << 20,
+    columns: Sequence[str] | None = None,
+) -> tuple[np.ndarray, PropertyTable]:
+    """Stream point features into an (N, 2) float64 array and typed property columns.
+
+    Only the properties named in `columns` are kept when it is given.
+    """
+    points = np.empty((1024, 2), dtype=np.float64)
+    properties = PropertyColumns()
+
+    for feature in iter_geojson_features(
+        geojson_path=geojson_path, buffer_size=buffer_size
+    ):
+        if len(properties) == len(points):
+            points = np.resize(points, (2 * len(points), 2))
+        points[len(properties)] = _get_point_coordinates(feature["geometry"])
+        properties.append(_select_properties(feature.get("properties"), columns))
+
+    return points[: len(properties)].copy(), properties.to_table()
+
+
+def iter_sites_from_geojson(
+    geojson_path: str | Path,
+    chunk_size: int,
+    buffer_size: int = 1 << 20,
+    columns: Sequence[str] | None = None,
+) -> Generator[tuple[np.ndarray, PropertyTable], None, None]:
+    """Stream point features in chunks of up to `chunk_size` sites.
+
+    Property columns are typed per chunk, so a property missing from every
+    feature of a chunk is missing from its table.
+    """
+    points = []
+    properties = PropertyColumns()
+
+    for feature in iter_geojson_features(
+        geojson_path=geojson_path, buffer_size=buffer_size
+    ):
+        points.append(_get_point_coordinates(feature["geometry"]))
+        properties.append(_select_properties(feature.get("properties"), columns))
+        if len(points) == chunk_size:
+            yield np.array(points, dtype=np.float64), properties.to_table()
+            points = []
+            properties = PropertyColumns()
+
+    if points:
+        yield np.array(points, dtype=np.float64), properties.to_table()
 
 
 def load_points_and_features_from_geojson(
     geojson_path: str | Path,
 ) -> tuple[list[list[float]], list[dict[str, str]]]:
-    geojson_obj = _load_geojson_file(geojson_path=geojson_path)
-
-    features = geojson_obj["features"]
-    geom = [shape(i["geometry"]) for i in features]
-    points = [get_coordinates(x).tolist() for x in geom]
-    points = [item[0] for item in points]
+    features = list(iter_geojson_features(geojson_path=geojson_path))
+    points = [_get_point_coordinates(feature["geometry"]) for feature in features]
 
     return points, features
 
 
-def load_mask_geojson(geojson_path: str | Path):
-    boundary_geojson_obj = _load_geojson_file(geojson_path=geojson_path)
+def load_mask_geojson(
+    geojson_path: str | Path,
+    bounding_box: BoundingBox | None = None,
+    simplify_tolerance: float | None = None,
+    coverage: bool = False,
+):
+    """
+    Load the features of a GeoJSON file and union them into one mask.
+
+    Parameters:
+    - geojson_path (str | Path): The GeoJSON boundary file.
+    - bounding_box (BoundingBox | None): Features outside this box are left out
+      before the union.
+    - simplify_tolerance (float | None): Simplify the unioned mask to this
+      tolerance, keeping its topology valid.
+    - coverage (bool): Use the faster coverage union, which is only correct for
+      features that do not overlap, such as administrative areas.
+    """
+    geometries = np.array(
+        [
+            shape(feature["geometry"])
+            for feature in iter_geojson_features(geojson_path=geojson_path)
+        ],
+        dtype=object,
+    )
+
+    if bounding_box is not None:
+        box = shapely.box(
+            bounding_box.xmin, bounding_box.ymin, bounding_box.xmax, bounding_box.ymax
+        )
+        geometries = geometries[shapely.intersects(geometries, box)]
 
-    geometries = [shape(x["geometry"]) for x in boundary_geojson_obj["features"]]
+    if coverage:
+        unified_shape = shapely.coverage_union_all(geometries)
+    else:
+        unified_shape = unary_union(geoms=geometries)
 
-    unified_shape = unary_union(geoms=geometries)
+    if simplify_tolerance is not None:
+        unified_shape = shapely.simplify(
+            unified_shape, tolerance=simplify_tolerance, preserve_topology=True
+        )
     return unified_shape
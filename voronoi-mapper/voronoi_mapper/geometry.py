@@ -1,14 +1,23 @@
-from typing import Generator, Literal
+from __future__ import annotations
 
-import geopandas as gpd
+import copy
+from typing import TYPE_CHECKING, Generator, Iterable, Literal
+
+import numpy as np
+import shapely
+from shapely import STRtree
 from shapely.geometry import MultiPolygon, Polygon, shape
 from voronoi_mapper.models import (
+    EDGE_ORDER,
     BoundingBox,
     Edges,
     Intersection,
     IntersectionException,
 )
 
+if TYPE_CHECKING:
+    import geopandas as gpd
+
 
 def calculate_gradient(point_a: list[float], point_b: list[float]) -> float | None:
     """Calculate the gradient of the line segment between point A and point B."""
@@ -140,62 +149,300 @@ def get_intersection_with_bounding_box(
     return main_intersection
 
 
+def get_intersections_with_bounding_box(
+    origins: np.ndarray, directions: np.ndarray, bounding_box: BoundingBox
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Calculate where each ray leaves a bounding box, for many rays at once.
+
+    Rays are clipped parametrically, Liang-Barsky style, so axis-aligned and
+    nearly parallel rays need no slopes and no special cases.
+
+    Parameters:
+    - origins (np.ndarray): An (N, 2) array of ray start points.
+    - directions (np.ndarray): An (N, 2) array of ray directions.
+    - bounding_box (BoundingBox): An instance of BoundingBox defining the area of interest.
+
+    Returns:
+    - tuple[np.ndarray, np.ndarray]: An (N, 2) array of intersection coordinates and an
+      (N,) array of edge codes, which index into `EDGE_ORDER`. Rays that never
+      cross the bounding box, or have no direction, get NaN coordinates and an
+      edge code of -1.
+    """
+    origins = np.asarray(origins, dtype=float).reshape(-1, 2)
+    directions = np.asarray(directions, dtype=float).reshape(-1, 2)
+
+    lower = np.array([bounding_box.xmin, bounding_box.ymin])
+    upper = np.array([bounding_box.xmax, bounding_box.ymax])
+
+    # ray parameters where each axis enters and leaves the box's slab, a ray
+    # that does not move along an axis is in that slab always or never
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_lower = (lower - origins) / directions
+        t_upper = (upper - origins) / directions
+    moving = directions != 0
+    in_slab = (origins >= lower) & (origins <= upper)
+    t_enter = np.where(
+        moving, np.minimum(t_lower, t_upper), np.where(in_slab, -np.inf, np.inf)
+    )
+    t_leave = np.where(
+        moving, np.maximum(t_lower, t_upper), np.where(in_slab, np.inf, -np.inf)
+    )
+
+    # ties at a corner are given to the top/bottom edge
+    crosses_vertical_edge = t_leave[:, 0] < t_leave[:, 1]
+    t_exit = np.where(crosses_vertical_edge, t_leave[:, 0], t_leave[:, 1])
+    hit = np.isfinite(t_exit) & (t_exit >= np.maximum(t_enter.max(axis=1), 0))
+
+    # The crossed axis is set exactly so that points on the same edge share
+    # the same value. The other axis walks along the slope, which is finite
+    # for the axis a ray leaves by, and is kept on the box despite rounding.
+    exit_bounds = np.where(directions > 0, upper, lower)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_on_horizontal = origins[:, 0] + (exit_bounds[:, 1] - origins[:, 1]) * (
+            directions[:, 0] / directions[:, 1]
+        )
+        y_on_vertical = origins[:, 1] + (exit_bounds[:, 0] - origins[:, 0]) * (
+            directions[:, 1] / directions[:, 0]
+        )
+    coordinates = np.where(
+        crosses_vertical_edge[:, None],
+        np.column_stack([exit_bounds[:, 0], y_on_vertical]),
+        np.column_stack([x_on_horizontal, exit_bounds[:, 1]]),
+    )
+    coordinates = np.clip(coordinates, lower, upper)
+    coordinates[~hit] = np.nan
+
+    edge_codes = np.where(
+        crosses_vertical_edge,
+        np.where(
+            directions[:, 0] > 0,
+            EDGE_ORDER.index(Edges.right),
+            EDGE_ORDER.index(Edges.left),
+        ),
+        np.where(
+            directions[:, 1] > 0,
+            EDGE_ORDER.index(Edges.top),
+            EDGE_ORDER.index(Edges.bottom),
+        ),
+    )
+    edge_codes[~hit] = -1
+    return coordinates, edge_codes
+
+
 def get_bounding_segments(
-    bounding_box: BoundingBox, bounding_box_intersections: dict[str, list]
-):
-    bounding_segments = []
-    for k, list_of_intersections in bounding_box_intersections.items():
-        if k in [Edges.top.value, Edges.bottom.value]:
-            y_val = bounding_box.ymax if k == Edges.top.value else bounding_box.ymin
-            start_point = (
-                bounding_box.xmin,
-                y_val,
-            )
-            end_point = (
-                bounding_box.xmax,
-                y_val,
-            )
-
-            list_of_intersections = sorted(list_of_intersections)
-            list_of_intersections.insert(0, start_point)
-            list_of_intersections.append(end_point)
-        else:
-            x_val = bounding_box.xmax if k == Edges.right.value else bounding_box.xmin
-            start_point = (
-                x_val,
-                bounding_box.ymin,
-            )
-            end_point = (
-                x_val,
-                bounding_box.ymax,
-            )
-            list_of_intersections.sort(key=lambda x: x[1])
-            list_of_intersections.insert(0, start_point)
-            list_of_intersections.append(end_point)
-
-        bounding_segments.extend(
-            [
-                (list_of_intersections[i], list_of_intersections[i + 1])
-                for i in range(len(list_of_intersections) - 1)
-            ]
+    bounding_box: BoundingBox,
+    bounding_box_intersections: dict[str, np.ndarray | list],
+) -> np.ndarray:
+    """
+    Split the outline of a bounding box at the points where ridges meet it.
+
+    Parameters:
+    - bounding_box (BoundingBox): An instance of BoundingBox defining the area of interest.
+    - bounding_box_intersections (dict[str, np.ndarray | list]): Maps each edge value
+      to an (M, 2) array of points on that edge.
+
+    Returns:
+    - np.ndarray: An (N, 2, 2) array of segments, edge by edge in `EDGE_ORDER`, each
+      edge running from its lower to its upper end. Repeated points are skipped.
+    """
+    horizontal = np.array([edge in (Edges.top, Edges.bottom) for edge in EDGE_ORDER])
+    # the coordinate every point on an edge shares, and the range along it
+    edge_values = {
+        Edges.top: bounding_box.ymax,
+        Edges.right: bounding_box.xmax,
+        Edges.bottom: bounding_box.ymin,
+        Edges.left: bounding_box.xmin,
+    }
+    fixed = np.array([edge_values[edge] for edge in EDGE_ORDER])
+    starts = np.where(horizontal, bounding_box.xmin, bounding_box.ymin)
+    ends = np.where(horizontal, bounding_box.xmax, bounding_box.ymax)
+
+    intersections = [
+        np.asarray(bounding_box_intersections.get(edge.value, []), dtype=float).reshape(
+            -1, 2
         )
-    return bounding_segments
+        for edge in EDGE_ORDER
+    ]
+    edge_codes = np.concatenate(
+        [
+            np.repeat(np.arange(len(EDGE_ORDER)), [len(i) for i in intersections]),
+            np.arange(len(EDGE_ORDER)),
+            np.arange(len(EDGE_ORDER)),
+        ]
+    )
+    positions = np.concatenate(
+        [
+            *(
+                coordinates[:, 0 if is_horizontal else 1]
+                for coordinates, is_horizontal in zip(intersections, horizontal)
+            ),
+            starts,
+            ends,
+        ]
+    )
+
+    order = np.lexsort((positions, edge_codes))
+    edge_codes, positions = edge_codes[order], positions[order]
+    repeated = np.zeros(len(order), dtype=bool)
+    repeated[1:] = (edge_codes[1:] == edge_codes[:-1]) & (
+        positions[1:] == positions[:-1]
+    )
+    edge_codes, positions = edge_codes[~repeated], positions[~repeated]
+
+    points = np.where(
+        horizontal[edge_codes, None],
+        np.column_stack([positions, fixed[edge_codes]]),
+        np.column_stack([fixed[edge_codes], positions]),
+    )
+    same_edge = np.flatnonzero(edge_codes[1:] == edge_codes[:-1])
+    return np.stack([points[same_edge], points[same_edge + 1]], axis=1)
+
+
+def match_points_to_polygons(
+    points: np.ndarray | Iterable, polygons: Iterable[Polygon]
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Match points to the polygons that contain them using a spatial index.
+
+    Parameters:
+    - points (np.ndarray | Iterable): An (N, 2) array of coordinates or a sequence of shapely points.
+    - polygons (Iterable[Polygon]): The polygons to match against, materialised once.
+
+    Returns:
+    - tuple[np.ndarray, np.ndarray]: Matching point indices and polygon indices, sorted by point.
+      Points outside every polygon are left out and a point inside several polygons
+      is matched to the first one.
+    """
+    points = np.asarray(points)
+    if points.dtype != object:
+        points = shapely.points(points) if len(points) else np.empty(0, dtype=object)
+    polygons = np.asarray(list(polygons), dtype=object)
+
+    tree = STRtree(points)
+    polygon_indices, point_indices = tree.query(polygons, predicate="contains")
+
+    order = np.lexsort((polygon_indices, point_indices))
+    point_indices, polygon_indices = point_indices[order], polygon_indices[order]
+    _, first_matches = np.unique(point_indices, return_index=True)
+
+    return point_indices[first_matches], polygon_indices[first_matches]
 
 
 def match_point_features_to_polygons(
     polygons: list[Polygon] | Generator[Polygon, None, None], features: list
 ) -> list[tuple[Polygon, dict]]:
-    polygon_point_pairs = []
-    for feature in features:
-        for polygon in polygons:
-            if not polygon.contains(shape(feature["geometry"])):
-                continue
-            polygon_point_pairs.append((polygon, feature))
-            break
-    return polygon_point_pairs
+    polygons = list(polygons)
+    point_indices, polygon_indices = match_points_to_polygons(
+        points=[shape(feature["geometry"]) for feature in features],
+        polygons=polygons,
+    )
+    return [
+        (polygons[polygon_index], features[point_index])
+        for point_index, polygon_index in zip(point_indices, polygon_indices)
+    ]
+
+
+def _split_into_tiles(parts: np.ndarray, tile_size: float) -> np.ndarray:
+    """Cut polygons along a square grid so that each piece covers one tile."""
+    if len(parts) == 0:
+        return parts
+
+    xmin, ymin, xmax, ymax = shapely.total_bounds(parts)
+    x_edges = np.arange(xmin, xmax + tile_size, tile_size)
+    y_edges = np.arange(ymin, ymax + tile_size, tile_size)
+    tile_x, tile_y = np.meshgrid(x_edges[:-1], y_edges[:-1])
+    tiles = shapely.box(
+        tile_x.ravel(),
+        tile_y.ravel(),
+        tile_x.ravel() + tile_size,
+        tile_y.ravel() + tile_size,
+    )
+
+    tile_indices, part_indices = STRtree(parts).query(tiles, predicate="intersects")
+    pieces = shapely.intersection(parts[part_indices], tiles[tile_indices])
+    return pieces[shapely.area(pieces) > 0]
+
+
+class PreparedMask:
+    """A clipping mask split into parts held in a spatial index.
+
+    A copy of the full mask is prepared for fast containment checks, leaving the
+    caller's geometry as it is, and when `tile_size` is given, its parts are cut
+    into grid tiles so that clipping a cell only touches the nearby pieces of a
+    detailed boundary.
+    """
+
+    def __init__(self, mask: Polygon | MultiPolygon, tile_size: float | None = None):
+        self.mask = copy.copy(mask)
+        shapely.prepare(self.mask)
+        self.tile_size = tile_size
+
+        parts = shapely.get_parts(mask)
+        if tile_size is not None:
+            parts = _split_into_tiles(parts=parts, tile_size=tile_size)
+        self.parts = parts
+        self.tree = STRtree(self.parts)
+
+    def classify(self, cells: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Sort cells into fully inside, fully outside and boundary cells.
+
+        Returns:
+        - tuple[np.ndarray, np.ndarray]: A boolean array marking cells fully inside the mask,
+          and a (2, N) array of cell and part index pairs for cells crossing the boundary.
+          Cells in neither are fully outside.
+        """
+        cell_indices, part_indices = self.tree.query(cells, predicate="intersects")
+
+        inside = np.zeros(len(cells), dtype=bool)
+        candidates = np.unique(cell_indices)
+        inside[candidates] = shapely.contains_properly(self.mask, cells[candidates])
+
+        on_boundary = ~inside[cell_indices]
+        return inside, np.stack([cell_indices[on_boundary], part_indices[on_boundary]])
+
+    def clip(self, cells: np.ndarray) -> np.ndarray:
+        """Clip cells to the mask, cells outside the mask become empty polygons."""
+        cells = np.asarray(cells, dtype=object)
+        inside, (cell_indices, part_indices) = self.classify(cells=cells)
+
+        clipped = np.full(len(cells), Polygon(), dtype=object)
+        clipped[inside] = cells[inside]
+
+        pieces = shapely.intersection(cells[cell_indices], self.parts[part_indices])
+        has_area = shapely.area(pieces) > 0
+        cell_indices, pieces = cell_indices[has_area], pieces[has_area]
+
+        split_cells, counts = np.unique(cell_indices, return_counts=True)
+        single = np.isin(cell_indices, split_cells[counts == 1])
+        clipped[cell_indices[single]] = pieces[single]
+        for cell_index in split_cells[counts > 1]:
+            clipped[cell_index] = shapely.union_all(pieces[cell_indices == cell_index])
+
+        return clipped
 
 
 def clip_polygons_to_mask(
-    gdf: gpd.GeoDataFrame, mask: MultiPolygon
+    gdf: gpd.GeoDataFrame,
+    mask: Polygon | MultiPolygon | PreparedMask,
+    tile_size: float | None = None,
 ) -> gpd.GeoDataFrame:
-    return gdf.clip(mask=mask)
+    """
+    Clip the polygons of a GeoDataFrame to a mask, dropping those left empty.
+
+    Only cells crossing the mask boundary are intersected, cells fully inside
+    are kept as they are. `tile_size` cuts the mask into grid tiles first and
+    is ignored when `mask` is already a PreparedMask.
+    """
+    import geopandas as gpd
+
+    if not isinstance(mask, PreparedMask):
+        mask = PreparedMask(mask=mask, tile_size=tile_size)
+
+    clipped = mask.clip(cells=gdf.geometry.to_numpy())
+    keep = ~shapely.is_empty(clipped)
+
+    gdf = gdf[keep].copy()
+    gdf[gdf.geometry.name] = gpd.GeoSeries(clipped[keep], index=gdf.index, crs=gdf.crs)
+    return gdf
@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Sequence
+
+import numpy as np
+import shapely
+from scipy.spatial import Voronoi, cKDTree
+from shapely.geometry import MultiPolygon, Polygon
+from voronoi_mapper.geojson import load_mask_geojson, load_sites_from_geojson
+from voronoi_mapper.geometry import PreparedMask
+from voronoi_mapper.locate import DEFAULT_CHUNK_SIZE, SiteLocator
+from voronoi_mapper.models import BoundingBox
+from voronoi_mapper.properties import PropertyColumns, PropertyTable
+from voronoi_mapper.tiling import get_cells_for_sites
+from voronoi_mapper.voronoi import (
+    create_geodataframe_from_cells_and_properties,
+    get_bounding_box,
+    get_cells_from_voronoi,
+)
+
+if TYPE_CHECKING:
+    import geopandas as gpd
+
+
+class VoronoiMap:
+    """A Voronoi map that can be updated site by site.
+
+    Holds the sites, their cells, the cells clipped to the mask and the site
+    properties. Adding, removing or moving sites only rebuilds the cells of the
+    changed sites and the sites near them, and only those cells are clipped again.
+    Sites are referred to by integer ids, which start as the row numbers of the
+    initial points and are never reused.
+    """
+
+    def __init__(
+        self,
+        points: np.ndarray,
+        mask: Polygon | MultiPolygon | PreparedMask,
+        properties: PropertyTable | None = None,
+        bounding_box: BoundingBox | None = None,
+        mask_tile_size: float | None = None,
+    ):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.site_ids = np.arange(len(self.points), dtype=np.int64)
+        self.properties = (
+            PropertyTable(columns={}, length=len(self.points))
+            if properties is None
+            else properties
+        )
+        self.mask = (
+            mask
+            if isinstance(mask, PreparedMask)
+            else PreparedMask(mask=mask, tile_size=mask_tile_size)
+        )
+
+        voronoi = Voronoi(self.points)
+        self.bounding_box = (
+            get_bounding_box(voronoi=voronoi, mask=self.mask.mask)
+            if bounding_box is None
+            else bounding_box
+        )
+        self.cells = get_cells_from_voronoi(
+            voronoi=voronoi, bounding_box=self.bounding_box
+        )
+        self.clipped = self.mask.clip(cells=self.cells)
+        self._next_id = len(self.points)
+        self._locator: SiteLocator | None = None
+
+    @classmethod
+    def from_files(
+        cls,
+        features_file_path: Path | str,
+        boundary_file_path: Path | str,
+        bounding_box: BoundingBox | None = None,
+        mask_tile_size: float | None = None,
+    ) -> "VoronoiMap":
+        points, properties = load_sites_from_geojson(geojson_path=features_file_path)
+        mask = load_mask_geojson(geojson_path=boundary_file_path)
+        return cls(
+            points=points,
+            mask=mask,
+            properties=properties,
+            bounding_box=bounding_box,
+            mask_tile_size=mask_tile_size,
+        )
+
+    def _get_positions(self, site_ids: Sequence[int]) -> np.ndarray:
+        site_ids = np.asarray(site_ids, dtype=np.int64).reshape(-1)
+        order = np.argsort(self.site_ids)
+        found = np.searchsorted(self.site_ids, site_ids, sorter=order)
+        positions = order[np.minimum(found, len(order) - 1)]
+        if len(positions) and np.any(self.site_ids[positions] != site_ids):
+            missing = np.setdiff1d(site_ids, self.site_ids)
+            raise KeyError(f"Unknown site ids {missing.tolist()}.")
+        return positions
+
+    def _get_affected_sites(
+        self,
+        tree: cKDTree,
+        n_kept: int,
+        regions: np.ndarray,
+        centres: np.ndarray,
+    ) -> np.ndarray:
+        """Find the kept sites whose cells can change where the given cells change.
+
+        `regions` are the cells of the removed sites before the update and of the
+        added sites after it, and the kept sites are the first `n_kept` points.
+        The cell of a kept site can only change when its cell among the kept
+        sites alone meets one of these regions, so when it is the nearest kept
+        site to a point of a region. Such a site is no further from the region's
+        centre than the nearest kept site to the centre plus twice the reach of
+        the region from the centre, so a ball query with that radius finds them
+        all. No cells are compared, so cells left with a tiny gap between them
+        by rounding are never missed.
+        """
+        coordinates, region_indices = shapely.get_coordinates(
+            regions, return_index=True
+        )
+        reach = np.zeros(len(regions))
+        np.maximum.at(
+            reach,
+            region_indices,
+            np.linalg.norm(coordinates - centres[region_indices], axis=1),
+        )
+        # regions of sites whose cells miss the bounding box change nothing
+        changes = np.flatnonzero(~shapely.is_empty(regions))
+        if n_kept == 0 or len(changes) == 0:
+            return np.empty(0, dtype=np.intp)
+
+        # the nearest kept site is among the added sites and one more
+        n_added = len(self.points) - n_kept
+        distances, indices = tree.query(
+            centres[changes], k=min(n_added + 1, len(self.points))
+        )
+        distances = distances.reshape(len(changes), -1)
+        indices = indices.reshape(len(changes), -1)
+        distances = np.where(indices < n_kept, distances, np.inf)
+        radii = distances.min(axis=1) + 2 * reach[changes]
+
+        candidates = tree.query_ball_point(
+            centres[changes], r=radii * (1 + 1e-9), return_sorted=False
+        )
+        affected = np.concatenate(
+            [np.asarray(sites, dtype=np.intp) for sites in candidates]
+        )
+        return np.unique(affected[affected < n_kept])
+
+    def _update(
+        self,
+        removed_positions: np.ndarray,
+        added_points: np.ndarray,
+        added_ids: np.ndarray,
+        added_properties: PropertyTable,
+    ):
+        if len(removed_positions) == 0 and len(added_points) == 0:
+            return
+        removed_cells = self.cells[removed_positions]
+        removed_points = self.points[removed_positions]
+        self._locator = None
+
+        keep = np.ones(len(self.points), dtype=bool)
+        keep[removed_positions] = False
+        n_kept = np.count_nonzero(keep)
+
+        self.points = np.concatenate([self.points[keep], added_points])
+        self.site_ids = np.concatenate([self.site_ids[keep], added_ids])
+        self.properties = self.properties.take(np.flatnonzero(keep)).concat(
+            added_properties
+        )
+        self.cells = np.concatenate(
+            [self.cells[keep], np.empty(len(added_points), dtype=object)]
+        )
+        self.clipped = np.concatenate(
+            [self.clipped[keep], np.empty(len(added_points), dtype=object)]
+        )
+
+        # one tree over the new sites serves the neighbour search and every
+        # local diagram
+        tree = cKDTree(self.points)
+        xmin, ymin = self.points.min(axis=0)
+        xmax, ymax = self.points.max(axis=0)
+        area = max((xmax - xmin) * (ymax - ymin), np.finfo(float).tiny)
+        halo = 3 * np.sqrt(area / len(self.points))
+
+        added_positions = np.arange(len(added_points)) + n_kept
+        added_cells = get_cells_for_sites(
+            points=self.points,
+            site_indices=added_positions,
+            bounding_box=self.bounding_box,
+            halo=halo,
+            tree=tree,
+        )
+        affected = self._get_affected_sites(
+            tree=tree,
+            n_kept=n_kept,
+            regions=np.concatenate([removed_cells, added_cells]),
+            centres=np.concatenate([removed_points, added_points]),
+        )
+        self.cells[added_positions] = added_cells
+        self.cells[affected] = get_cells_for_sites(
+            points=self.points,
+            site_indices=affected,
+            bounding_box=self.bounding_box,
+            halo=halo,
+            tree=tree,
+        )
+
+        changed_positions = np.concatenate([affected, added_positions])
+        self.clipped[changed_positions] = self.mask.clip(
+            cells=self.cells[changed_positions]
+        )
+
+    def add_sites(
+        self,
+        points: np.ndarray,
+        properties: Sequence[dict[str, Any] | None] | None = None,
+    ) -> np.ndarray:
+        """Add sites, with one properties dict per site, and return their new ids."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        property_columns = PropertyColumns()
+        for site_properties in properties or [None] * len(points):
+            property_columns.append(site_properties)
+
+        site_ids = np.arange(self._next_id, self._next_id + len(points))
+        self._next_id += len(points)
+
+        self._update(
+            removed_positions=np.empty(0, dtype=np.intp),
+            added_points=points,
+            added_ids=site_ids,
+            added_properties=property_columns.to_table(),
+        )
+        return site_ids
+
+    def remove_sites(self, site_ids: Sequence[int]):
+        """Remove sites by id, giving their area to the neighbouring sites."""
+        self._update(
+            removed_positions=self._get_positions(site_ids=site_ids),
+            added_points=np.empty((0, 2)),
+            added_ids=np.empty(0, dtype=np.int64),
+            added_properties=PropertyTable(columns={}, length=0),
+        )
+
+    def move_site(self, site_id: int, point: Sequence[float]):
+        """Move a site to a new position, keeping its id and properties."""
+        positions = self._get_positions(site_ids=[site_id])
+        self._update(
+            removed_positions=positions,
+            added_points=np.asarray(point, dtype=np.float64).reshape(1, 2),
+            added_ids=self.site_ids[positions],
+            added_properties=self.properties.take(positions),
+        )
+
+    def locate(
+        self,
+        points: np.ndarray,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_workers: int | None = None,
+    ) -> np.ndarray:
+        """Get the id of the site whose clipped cell each point falls in.
+
+        Points outside every clipped cell get -1. See `SiteLocator.locate`.
+        """
+        if self._locator is None:
+            self._locator = SiteLocator(
+                sites=self.points,
+                cells=self.cells,
+                clipped=self.clipped,
+                mask=self.mask.mask,
+                bounding_box=self.bounding_box,
+            )
+        positions = self._locator.locate(
+            points=points, chunk_size=chunk_size, max_workers=max_workers
+        )
+        return np.where(positions >= 0, self.site_ids[positions], -1)
+
+    def to_geodataframe(self) -> gpd.GeoDataFrame:
+        """Get the clipped cells and their properties, indexed by site id."""
+        gdf = create_geodataframe_from_cells_and_properties(
+            cells=self.clipped, properties=self.properties
+        )
+        gdf.index = self.site_ids[gdf.index]
+        return gdf
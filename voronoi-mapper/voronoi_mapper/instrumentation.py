@@ -0,0 +1,101 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Generator
+
+
+@dataclass
+class StageEvent:
+    """Measurements of one pipeline stage.
+
+    CPU time only covers this process, not worker processes. `peak_bytes` is the
+    peak of memory traced by tracemalloc above its level at the stage start, and
+    None unless memory tracing was asked for.
+    """
+
+    stage: str
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    items: int = 0
+    peak_bytes: int | None = None
+
+
+class Instrumentation:
+    """Receives the start and end of every pipeline stage, does nothing by default.
+
+    Subclass and override `stage_started` and `stage_finished` to collect the
+    measurements. Set `trace_memory` to measure peak memory with tracemalloc,
+    which slows down allocation heavy stages.
+    """
+
+    trace_memory: bool = False
+
+    def stage_started(self, stage: str):
+        pass
+
+    def stage_finished(self, event: StageEvent):
+        pass
+
+
+class StageReport(Instrumentation):
+    """Collect the events of every stage and write them out as JSON."""
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.events: list[StageEvent] = []
+
+    def stage_finished(self, event: StageEvent):
+        self.events.append(event)
+
+    def to_dict(self) -> dict:
+        return {
+            "stages": [asdict(event) for event in self.events],
+            "total_wall_seconds": sum(event.wall_seconds for event in self.events),
+        }
+
+    def write_json(self, save_path: Path | str):
+        with open(save_path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+@contextmanager
+def measure_stage(
+    instrumentation: Instrumentation | None, stage: str
+) -> Generator[StageEvent, None, None]:
+    """Measure the stage run in the body of the with block.
+
+    The body can set `items` on the yielded event. The event is reported even if
+    the body raises. Without instrumentation nothing is measured.
+    """
+    event = StageEvent(stage=stage)
+    if instrumentation is None:
+        yield event
+        return
+
+    instrumentation.stage_started(stage)
+
+    started_tracing = False
+    if instrumentation.trace_memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracing = True
+        tracemalloc.reset_peak()
+        start_bytes, _ = tracemalloc.get_traced_memory()
+
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    try:
+        yield event
+    finally:
+        # a failed stage is still reported, with the time it ran for
+        event.wall_seconds = time.perf_counter() - start_wall
+        event.cpu_seconds = time.process_time() - start_cpu
+
+        if instrumentation.trace_memory:
+            event.peak_bytes = tracemalloc.get_traced_memory()[1] - start_bytes
+            if started_tracing:
+                tracemalloc.stop()
+
+        instrumentation.stage_finished(event)
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+import numpy as np
+import shapely
+from scipy.spatial import cKDTree
+from shapely.geometry import MultiPolygon, Polygon
+from voronoi_mapper.models import BoundingBox
+
+if TYPE_CHECKING:
+    import geopandas as gpd
+
+DEFAULT_CHUNK_SIZE = 1_048_576
+
+# where the cell of each site lies against the mask
+_OUTSIDE = 0
+_BOUNDARY = 1
+_INSIDE = 2
+
+
+class SiteLocator:
+    """Finds the clipped cell each point falls in, from the nearest site.
+
+    Voronoi cells are the regions nearest to their site, so a point is in the
+    cell of its nearest site as long as it is inside the mask and the bounding
+    box. Only points nearest to a site whose cell was cut by the mask are
+    checked against the mask itself. A copy of the mask is prepared, the one
+    passed in is left as it is.
+    """
+
+    def __init__(
+        self,
+        sites: np.ndarray,
+        cells: np.ndarray,
+        clipped: np.ndarray,
+        mask: Polygon | MultiPolygon,
+        bounding_box: BoundingBox,
+    ):
+        self.tree = cKDTree(np.asarray(sites, dtype=np.float64).reshape(-1, 2))
+        self.mask = copy.copy(mask)
+        shapely.prepare(self.mask)
+        self.bounding_box = bounding_box
+
+        # cells inside the mask are kept as they are when clipping
+        self.site_status = np.full(len(cells), _BOUNDARY, dtype=np.int8)
+        self.site_status[shapely.is_empty(clipped)] = _OUTSIDE
+        self.site_status[shapely.equals_exact(cells, clipped, tolerance=0)] = _INSIDE
+
+        # GEOS builds the point index of a prepared geometry on first use, so
+        # build it here rather than in several threads at once
+        shapely.intersects_xy(self.mask, 0.0, 0.0)
+
+    @classmethod
+    def from_clipped_cells(
+        cls,
+        sites: np.ndarray,
+        cells: gpd.GeoDataFrame,
+        mask: Polygon | MultiPolygon,
+    ) -> SiteLocator:
+        """Build a locator for the clipped cells `voronoi_map` returns, indexed by site.
+
+        `mask` is the mask the cells were clipped to. Without the unclipped cells
+        there is no telling which cells the mask left whole, so every point near
+        a kept site is checked against the mask, and the bounds of all clipped
+        cells stand in for the bounding box.
+        """
+        clipped = np.full(len(sites), Polygon(), dtype=object)
+        clipped[cells.index.to_numpy()] = cells.geometry.to_numpy()
+        xmin, ymin, xmax, ymax = shapely.total_bounds(clipped)
+        return cls(
+            sites=sites,
+            # no cell equals its clipped cell, so none is taken to be inside
+            cells=np.full(len(sites), None, dtype=object),
+            clipped=clipped,
+            mask=mask,
+            bounding_box=BoundingBox(xmin=xmin, xmax=xmax, ymin=ymin, ymax=ymax),
+        )
+
+    def _locate_chunk(self, points: np.ndarray, located: np.ndarray):
+        _, nearest = self.tree.query(points)
+        status = self.site_status[nearest]
+
+        x, y = points[:, 0], points[:, 1]
+        in_box = (
+            (x >= self.bounding_box.xmin)
+            & (x <= self.bounding_box.xmax)
+            & (y >= self.bounding_box.ymin)
+            & (y <= self.bounding_box.ymax)
+        )
+        found = in_box & (status == _INSIDE)
+        check = in_box & (status == _BOUNDARY)
+        found[check] = shapely.intersects_xy(self.mask, x[check], y[check])
+        located[:] = np.where(found, nearest, -1)
+
+    def locate(
+        self,
+        points: np.ndarray,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_workers: int | None = None,
+    ) -> np.ndarray:
+        """
+        Find the site whose clipped cell each point falls in.
+
+        Parameters:
+        - points (np.ndarray): An (N, 2) array of points.
+        - chunk_size (int): Points looked up at a time.
+        - max_workers (int | None): Chunks are looked up in this thread when 1,
+          otherwise across a pool of threads. None uses the default pool size.
+
+        Returns:
+        - np.ndarray: The index of the site of every point, or -1 for points
+          outside the mask or the bounding box.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        located = np.empty(len(points), dtype=np.intp)
+        starts = range(0, len(points), chunk_size)
+
+        def locate_chunk(start: int):
+            stop = start + chunk_size
+            self._locate_chunk(points=points[start:stop], located=located[start:stop])
+
+        if max_workers == 1:
+            for start in starts:
+                locate_chunk(start)
+            return located
+
+        # the tree lookup and the mask check both release the GIL
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # consume the results so errors from the threads are raised here
+            list(executor.map(locate_chunk, starts))
+        return located
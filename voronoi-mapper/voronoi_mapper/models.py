@@ -1,6 +1,8 @@
 from dataclasses import dataclass
 from enum import Enum
 
+import numpy as np
+
 
 class Edges(Enum):
     top = "top"
@@ -9,6 +11,10 @@ class Edges(Enum):
     left = "left"
 
 
+# Order used when edges are encoded as integers in array based helpers.
+EDGE_ORDER: tuple[Edges, ...] = (Edges.top, Edges.right, Edges.bottom, Edges.left)
+
+
 @dataclass
 class Intersection:
     coordinates: tuple[float, float]
@@ -23,4 +29,17 @@ class BoundingBox:
     ymax: float
 
 
+@dataclass
+class VoronoiSegments:
+    """Array form of the line segments of a Voronoi diagram within a bounding box.
+
+    `segments` has shape (N, 2, 2), one start and end point per segment.
+    `bounding_box_intersections` maps each edge value to an (M, 2) array of the
+    points where infinite ridges meet that edge.
+    """
+
+    segments: np.ndarray
+    bounding_box_intersections: dict[str, np.ndarray]
+
+
 class IntersectionException(BaseException): ...
@@ -1,13 +1,15 @@
 from pathlib import Path
-from pdb import set_trace
 
-import geopandas as gpd
 import matplotlib.pyplot as plt
+import numpy as np
+import shapely
 from matplotlib import patches
 from matplotlib.axes import Axes
+from matplotlib.collections import LineCollection, PolyCollection
 from scipy.spatial import Voronoi, voronoi_plot_2d
 from shapely.geometry import MultiPolygon, Polygon
 from voronoi_mapper.models import BoundingBox
+from voronoi_mapper.voronoi import get_line_segment_arrays_from_voronoi
 
 
 def plot_voronoi(
@@ -16,8 +18,27 @@ def plot_voronoi(
     bounding_box: BoundingBox | None = None,
     boundary: Polygon | MultiPolygon | None = None,
     show: bool = False,
+    fast: bool = False,
+    rasterized: bool = False,
+    dpi: float | None = None,
 ):
-    _, ax = plt.subplots(figsize=(8, 6))
+    """
+    Plot a Voronoi diagram with its bounding box and boundary, and save it.
+
+    Parameters:
+    - voronoi (Voronoi): The diagram to plot.
+    - save_path (Path | str): Where to save the figure, in the format of its extension.
+    - bounding_box (BoundingBox | None): Drawn as a rectangle, and sets the plotted area.
+    - boundary (Polygon | MultiPolygon | None): Drawn filled under the diagram.
+    - show (bool): Show the figure after saving it.
+    - fast (bool): Draw all ridges as one LineCollection and all boundary parts
+      as one PolyCollection, leaving out Voronoi vertices and detail smaller
+      than a pixel. Use it for large diagrams or detailed boundaries.
+    - rasterized (bool): Draw ridges, sites and the boundary as a bitmap inside
+      vector formats such as PDF or SVG, which keeps large plots small.
+    - dpi (float | None): Resolution to save at, the figure's own by default.
+    """
+    fig, ax = plt.subplots(figsize=(8, 6))
     ax: Axes = ax
 
     # gridlines
@@ -25,14 +46,34 @@ def plot_voronoi(
     ax.grid(which="minor", color="#CCCCCC", linestyle=":", linewidth=0.35)
     ax.minorticks_on()
 
-    voronoi_plot_2d(
-        voronoi,
-        ax=ax,
-        show_vertices=True,
-        line_colors="blue",
-        line_width=2,
-        point_size=5,
-    )
+    if fast:
+        view_box = (
+            _get_view_box(voronoi=voronoi) if bounding_box is None else bounding_box
+        )
+        ax.set_xlim((view_box.xmin - 1, view_box.xmax + 1))
+        ax.set_ylim((view_box.ymin - 1, view_box.ymax + 1))
+        pixel_size = _get_pixel_size(ax=ax, dpi=dpi or fig.dpi)
+
+        artists = [
+            _plot_ridges(
+                ax=ax, voronoi=voronoi, bounding_box=view_box, pixel_size=pixel_size
+            ),
+            *ax.plot(voronoi.points[:, 0], voronoi.points[:, 1], ".", markersize=5),
+        ]
+        if boundary is not None:
+            artists.append(
+                _plot_boundary(ax=ax, boundary=boundary, pixel_size=pixel_size)
+            )
+    else:
+        voronoi_plot_2d(
+            voronoi,
+            ax=ax,
+            show_vertices=True,
+            line_colors="blue",
+            line_width=2,
+            point_size=5,
+        )
+        artists = [*ax.lines, *ax.collections]
 
     # bounding box
     if bounding_box is not None:
@@ -52,22 +93,26 @@ def plot_voronoi(
         ax.set_ylim((bounding_box.ymin - 1, bounding_box.ymax + 1))
 
     # boundary
-    if boundary is not None:
+    if boundary is not None and not fast:
         if boundary.geom_type == "Polygon":
-            plot_polygon(ax, boundary)
+            artists.append(plot_polygon(ax, boundary))
 
         elif boundary.geom_type == "MultiPolygon":
             for polygon in boundary.geoms:
-                plot_polygon(ax, polygon)
+                artists.append(plot_polygon(ax, polygon))
+
+    for artist in artists:
+        artist.set_rasterized(rasterized)
 
     # titles
     ax.set_xlabel("Longitude")
     ax.set_ylabel("Latitude")
     ax.set_title("Voronoi Diagram")
 
-    plt.savefig(save_path)
+    plt.savefig(save_path, dpi=dpi)
     if show:
         plt.show()  # pragma: no cover
+    plt.close(fig)
 
 
 def plot_polygon(ax: Axes, polygon: Polygon):
@@ -77,6 +122,93 @@ def plot_polygon(ax: Axes, polygon: Polygon):
     Parameters:
         ax (matplotlib axes): The axes on which to plot.
         polygon (Shapely Polygon): The polygon to plot.
+
+    Returns:
+        The filled matplotlib polygon.
     """
     x, y = polygon.exterior.xy
-    ax.fill(x, y, alpha=0.5, color="orange")  # Fill the polygon with transparency
+    # Fill the polygon with transparency
+    (filled,) = ax.fill(x, y, alpha=0.5, color="orange")
+    return filled
+
+
+def _get_view_box(voronoi: Voronoi) -> BoundingBox:
+    """Get the area voronoi_plot_2d would show, the sites with a 10% margin."""
+    min_x, min_y = voronoi.points.min(axis=0)
+    max_x, max_y = voronoi.points.max(axis=0)
+    margin_x, margin_y = 0.1 * (max_x - min_x), 0.1 * (max_y - min_y)
+    return BoundingBox(
+        xmin=min_x - margin_x,
+        xmax=max_x + margin_x,
+        ymin=min_y - margin_y,
+        ymax=max_y + margin_y,
+    )
+
+
+def _get_pixel_size(ax: Axes, dpi: float) -> float:
+    """Get the largest width or height in data units of one pixel in the saved figure."""
+    extent = ax.get_window_extent()
+    scale = dpi / ax.figure.dpi
+    (xmin, xmax), (ymin, ymax) = ax.get_xlim(), ax.get_ylim()
+    return max(
+        (xmax - xmin) / (extent.width * scale), (ymax - ymin) / (extent.height * scale)
+    )
+
+
+def _plot_ridges(
+    ax: Axes, voronoi: Voronoi, bounding_box: BoundingBox, pixel_size: float
+) -> LineCollection:
+    """Draw the ridges within the bounding box as one collection.
+
+    Ridge ends are snapped to the pixel grid, and ridges that then start and
+    end in the same pixel, or repeat another ridge, are left out.
+    """
+    segments = get_line_segment_arrays_from_voronoi(
+        voronoi=voronoi, bounding_box=bounding_box
+    ).segments
+    pixels = np.round(segments / pixel_size).astype(np.int64)
+    # put the ends of each ridge in a fixed order so repeats match
+    starts, ends = pixels[:, 0], pixels[:, 1]
+    swap = (starts[:, 0] > ends[:, 0]) | (
+        (starts[:, 0] == ends[:, 0]) & (starts[:, 1] > ends[:, 1])
+    )
+    pixels[swap] = pixels[swap, ::-1]
+    visible = np.any(pixels[:, 0] != pixels[:, 1], axis=1)
+    # one opaque value per ridge compares faster than rows
+    keys = np.ascontiguousarray(pixels[visible]).reshape(-1, 4).view("V32")
+    _, first = np.unique(keys, return_index=True)
+
+    ridges = LineCollection(
+        segments[visible][np.sort(first)], colors="blue", linewidths=2
+    )
+    ax.add_collection(ridges)
+    return ridges
+
+
+def _plot_boundary(
+    ax: Axes, boundary: Polygon | MultiPolygon, pixel_size: float
+) -> PolyCollection:
+    """Draw the exteriors of all boundary parts as one collection.
+
+    Exteriors are simplified to a pixel, so their vertex count follows the
+    size of the plot rather than the detail of the boundary.
+    """
+    exteriors = shapely.simplify(
+        shapely.get_exterior_ring(shapely.get_parts(boundary)),
+        tolerance=pixel_size,
+        preserve_topology=False,
+    )
+    coordinates, part_indices = shapely.get_coordinates(exteriors, return_index=True)
+    starts = np.flatnonzero(np.diff(part_indices)) + 1
+    polygons = PolyCollection(
+        [
+            part
+            for part in np.split(coordinates, starts)
+            # parts smaller than a pixel collapse to a line or nothing
+            if len(part) >= 4
+        ],
+        facecolors="orange",
+        alpha=0.5,
+    )
+    ax.add_collection(polygons)
+    return polygons
@@ -0,0 +1,109 @@
+from dataclasses import dataclass
+from numbers import Integral, Real
+from typing import Any
+
+import numpy as np
+
+
+def _to_typed_array(values: list[Any]) -> np.ndarray:
+    """Convert a column of values to the narrowest fitting NumPy array.
+
+    Booleans and integers keep their type when no value is missing, numbers
+    with missing values become float64 with NaN, anything else is an object array.
+    """
+    if all(isinstance(value, bool) for value in values):
+        return np.array(values, dtype=bool)
+    if all(
+        isinstance(value, Integral) and not isinstance(value, bool) for value in values
+    ):
+        return np.array(values, dtype=np.int64)
+    if all(
+        value is None or (isinstance(value, Real) and not isinstance(value, bool))
+        for value in values
+    ):
+        return np.array(
+            [np.nan if value is None else value for value in values], dtype=np.float64
+        )
+
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+def _get_missing_column(length: int, dtype: np.dtype) -> np.ndarray:
+    """Make a column of missing values that can join a column of the given type."""
+    if dtype.kind in "iuf":
+        return np.full(length, np.nan, dtype=np.float64)
+    return np.full(length, None, dtype=object)
+
+
+@dataclass
+class PropertyTable:
+    """Typed property columns, where row i holds the properties of site i."""
+
+    columns: dict[str, np.ndarray]
+    length: int = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    def take(self, site_indices: np.ndarray) -> "PropertyTable":
+        """Select the rows of the given sites, in the given order."""
+        site_indices = np.asarray(site_indices, dtype=np.intp)
+        return PropertyTable(
+            columns={key: column[site_indices] for key, column in self.columns.items()},
+            length=len(site_indices),
+        )
+
+    def concat(self, other: "PropertyTable") -> "PropertyTable":
+        """Append the rows of another table, filling columns missing on either side."""
+        columns = {}
+        for key in {**self.columns, **other.columns}:
+            column = self.columns.get(key, other.columns.get(key))
+            parts = [
+                (
+                    table.columns[key]
+                    if key in table.columns
+                    else _get_missing_column(length=len(table), dtype=column.dtype)
+                )
+                for table in (self, other)
+            ]
+            if any(part.dtype == object for part in parts):
+                parts = [part.astype(object) for part in parts]
+            columns[key] = np.concatenate(parts)
+        return PropertyTable(columns=columns, length=len(self) + len(other))
+
+
+class PropertyColumns:
+    """Feature properties stored column by column rather than as a dict per feature.
+
+    Every column has one value per appended feature, features without a
+    property get None in that column.
+    """
+
+    def __init__(self):
+        self.columns: dict[str, list[Any]] = {}
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def append(self, properties: dict[str, Any] | None):
+        for key, value in (properties or {}).items():
+            column = self.columns.get(key)
+            if column is None:
+                column = self.columns[key] = [None] * self._length
+            column.append(value)
+
+        self._length += 1
+        for column in self.columns.values():
+            if len(column) < self._length:
+                column.append(None)
+
+    def to_table(self) -> PropertyTable:
+        """Convert the collected columns to typed arrays, emptying this store."""
+        columns = {}
+        while self.columns:
+            key, values = self.columns.popitem()
+            columns[key] = _to_typed_array(values)
+        return PropertyTable(columns=dict(reversed(columns.items())), length=len(self))
@@ -0,0 +1,370 @@
+import json
+from pathlib import Path
+from typing import Iterator, Sequence
+
+import numpy as np
+import shapely
+from voronoi_mapper.geojson import iter_sites_from_geojson, load_sites_from_geojson
+from voronoi_mapper.properties import PropertyTable
+from voronoi_mapper.site_store import load_sites_from_site_store
+
+# byte order, geometry type and two float64 coordinates
+_WKB_POINT_SIZE = 21
+_WKB_LITTLE_ENDIAN_POINT = np.array([1, 0, 0, 0], dtype=np.uint8)
+
+DEFAULT_CHUNK_SIZE = 1_048_576
+
+
+_MISSING_FORMATS_MESSAGE = (
+    "Reading GeoParquet, FlatGeobuf or CSV sites needs pyarrow and pyogrio, "
+    "install them with `pip install voronoi-mapper[formats]`."
+)
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as error:  # pragma: no cover
+        raise ImportError(_MISSING_FORMATS_MESSAGE) from error
+    return pyarrow
+
+
+def _arrow_column_to_array(column) -> np.ndarray:
+    """Convert an Arrow column to the NumPy types PropertyTable columns use.
+
+    Booleans and integers keep their type when no value is missing, numbers
+    with missing values become float64 with NaN, anything else is an object array.
+    """
+    pa = _import_pyarrow()
+    if pa.types.is_boolean(column.type) and column.null_count == 0:
+        return column.to_numpy(zero_copy_only=False).astype(bool)
+    if pa.types.is_integer(column.type) and column.null_count == 0:
+        return column.to_numpy(zero_copy_only=False).astype(np.int64)
+    if pa.types.is_integer(column.type) or pa.types.is_floating(column.type):
+        return column.to_numpy(zero_copy_only=False).astype(np.float64)
+    return column.to_numpy(zero_copy_only=False).astype(object)
+
+
+def _table_to_properties(table, columns: Sequence[str]) -> PropertyTable:
+    return PropertyTable(
+        columns={
+            key: _arrow_column_to_array(table.column(key).combine_chunks())
+            for key in columns
+        },
+        length=table.num_rows,
+    )
+
+
+def _get_points_from_wkb(wkb: np.ndarray) -> np.ndarray:
+    """Get the x and y of point geometries, or the first coordinate of any other."""
+    geometries = shapely.from_wkb(wkb)
+    coordinates, indices = shapely.get_coordinates(geometries, return_index=True)
+    if len(np.unique(indices)) != len(geometries):
+        raise ValueError("Every site needs a geometry with at least one coordinate.")
+    first = np.searchsorted(indices, np.arange(len(geometries)))
+    return np.ascontiguousarray(coordinates[first], dtype=np.float64)
+
+
+def _get_points_from_wkb_column(column) -> np.ndarray:
+    """Get site coordinates from an Arrow column of WKB geometries.
+
+    Columns of only little-endian 2D points are decoded straight from the Arrow
+    buffers, anything else goes through shapely.
+    """
+    pa = _import_pyarrow()
+    offset_type = np.int64 if pa.types.is_large_binary(column.type) else np.int32
+    _, offsets_buffer, data_buffer = column.buffers()
+    offsets = np.frombuffer(offsets_buffer, dtype=offset_type)[
+        column.offset : column.offset + len(column) + 1
+    ]
+
+    if column.null_count == 0 and np.all(np.diff(offsets) == _WKB_POINT_SIZE):
+        records = np.frombuffer(data_buffer, dtype=np.uint8)[offsets[0] : offsets[-1]]
+        records = records.reshape(-1, _WKB_POINT_SIZE)
+        is_point = (records[:, 0] == 1) & np.all(
+            records[:, 1:5] == _WKB_LITTLE_ENDIAN_POINT, axis=1
+        )
+        if np.all(is_point):
+            points = records[:, 5:].copy().view("<f8").astype(np.float64)
+            # empty points are stored as NaN and need the error below
+            if not np.isnan(points).any():
+                return points
+
+    return _get_points_from_wkb(column.to_numpy(zero_copy_only=False))
+
+
+def _get_points_from_columns(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    points = np.empty((len(x), 2), dtype=np.float64)
+    points[:, 0] = x
+    points[:, 1] = y
+    return points
+
+
+def _get_geoparquet_columns(
+    schema, columns: Sequence[str] | None
+) -> tuple[str, str, Sequence[str]]:
+    """Get the primary geometry column, its encoding and the property columns."""
+    geo_metadata = json.loads(schema.metadata[b"geo"])
+    geometry_name = geo_metadata["primary_column"]
+    encoding = geo_metadata["columns"][geometry_name]["encoding"].lower()
+    if columns is None:
+        columns = [name for name in schema.names if name != geometry_name]
+    return geometry_name, encoding, columns
+
+
+def _get_geoparquet_points(geometry, encoding: str) -> np.ndarray:
+    if encoding == "point":
+        return _get_points_from_columns(
+            x=geometry.field("x").to_numpy(zero_copy_only=False),
+            y=geometry.field("y").to_numpy(zero_copy_only=False),
+        )
+    return _get_points_from_wkb_column(geometry)
+
+
+def load_sites_from_geoparquet(
+    parquet_path: str | Path, columns: Sequence[str] | None = None
+) -> tuple[np.ndarray, PropertyTable]:
+    """
+    Load sites from the primary geometry column of a GeoParquet file.
+
+    Parameters:
+    - parquet_path (str | Path): A GeoParquet file with WKB or native point geometry.
+    - columns (Sequence[str] | None): Properties to read, all of them by default.
+      Other columns are never read from the file.
+
+    Returns:
+    - tuple[np.ndarray, PropertyTable]: An (N, 2) float64 array and typed property columns.
+    """
+    _import_pyarrow()
+    import pyarrow.parquet as pq
+
+    geometry_name, encoding, columns = _get_geoparquet_columns(
+        schema=pq.read_schema(parquet_path), columns=columns
+    )
+    table = pq.read_table(parquet_path, columns=[geometry_name, *columns])
+    points = _get_geoparquet_points(
+        geometry=table.column(geometry_name).combine_chunks(), encoding=encoding
+    )
+    return points, _table_to_properties(table=table, columns=columns)
+
+
+def iter_sites_from_geoparquet(
+    parquet_path: str | Path,
+    columns: Sequence[str] | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[tuple[np.ndarray, PropertyTable]]:
+    """Read sites from a GeoParquet file in chunks of up to `chunk_size` rows."""
+    pa = _import_pyarrow()
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(parquet_path)
+    geometry_name, encoding, columns = _get_geoparquet_columns(
+        schema=parquet_file.schema_arrow, columns=columns
+    )
+    for batch in parquet_file.iter_batches(
+        batch_size=chunk_size, columns=[geometry_name, *columns]
+    ):
+        table = pa.Table.from_batches([batch])
+        points = _get_geoparquet_points(
+            geometry=table.column(geometry_name).combine_chunks(), encoding=encoding
+        )
+        yield points, _table_to_properties(table=table, columns=columns)
+
+
+def _get_flatgeobuf_sites(
+    table, geometry_name: str | None, columns: Sequence[str] | None
+) -> tuple[np.ndarray, PropertyTable]:
+    geometry_name = geometry_name or "wkb_geometry"
+    points = _get_points_from_wkb_column(table.column(geometry_name).combine_chunks())
+
+    if columns is None:
+        columns = [name for name in table.column_names if name != geometry_name]
+    return points, _table_to_properties(table=table, columns=columns)
+
+
+def load_sites_from_flatgeobuf(
+    flatgeobuf_path: str | Path, columns: Sequence[str] | None = None
+) -> tuple[np.ndarray, PropertyTable]:
+    """Load sites from a FlatGeobuf file, reading only the properties in `columns`."""
+    _import_pyarrow()
+    try:
+        from pyogrio import read_arrow
+    except ImportError as error:  # pragma: no cover
+        raise ImportError(_MISSING_FORMATS_MESSAGE) from error
+
+    meta, table = read_arrow(flatgeobuf_path, columns=columns)
+    return _get_flatgeobuf_sites(
+        table=table, geometry_name=meta["geometry_name"], columns=columns
+    )
+
+
+def iter_sites_from_flatgeobuf(
+    flatgeobuf_path: str | Path,
+    columns: Sequence[str] | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[tuple[np.ndarray, PropertyTable]]:
+    """Read sites from a FlatGeobuf file in chunks of up to `chunk_size` features."""
+    pa = _import_pyarrow()
+    try:
+        from pyogrio import open_arrow
+    except ImportError as error:  # pragma: no cover
+        raise ImportError(_MISSING_FORMATS_MESSAGE) from error
+
+    with open_arrow(
+        flatgeobuf_path, columns=columns, batch_size=chunk_size, use_pyarrow=True
+    ) as (meta, reader):
+        for batch in reader:
+            yield _get_flatgeobuf_sites(
+                table=pa.Table.from_batches([batch]),
+                geometry_name=meta["geometry_name"],
+                columns=columns,
+            )
+
+
+def _get_csv_options(columns: Sequence[str] | None, x_column: str, y_column: str):
+    from pyarrow import csv
+
+    include_columns = None if columns is None else [x_column, y_column, *columns]
+    return csv.ConvertOptions(include_columns=include_columns, strings_can_be_null=True)
+
+
+def _get_csv_sites(
+    table, columns: Sequence[str] | None, x_column: str, y_column: str
+) -> tuple[np.ndarray, PropertyTable]:
+    points = _get_points_from_columns(
+        x=table.column(x_column).to_numpy(),
+        y=table.column(y_column).to_numpy(),
+    )
+
+    if columns is None:
+        columns = [
+            name for name in table.column_names if name not in (x_column, y_column)
+        ]
+    return points, _table_to_properties(table=table, columns=columns)
+
+
+def load_sites_from_csv(
+    csv_path: str | Path,
+    columns: Sequence[str] | None = None,
+    x_column: str = "lon",
+    y_column: str = "lat",
+) -> tuple[np.ndarray, PropertyTable]:
+    """Load sites from the longitude and latitude columns of a CSV file.
+
+    Only the properties in `columns` are parsed, all other columns when it is None.
+    Empty values are read as missing.
+    """
+    _import_pyarrow()
+    from pyarrow import csv
+
+    table = csv.read_csv(
+        csv_path,
+        convert_options=_get_csv_options(
+            columns=columns, x_column=x_column, y_column=y_column
+        ),
+    )
+    return _get_csv_sites(
+        table=table, columns=columns, x_column=x_column, y_column=y_column
+    )
+
+
+def iter_sites_from_csv(
+    csv_path: str | Path,
+    columns: Sequence[str] | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    x_column: str = "lon",
+    y_column: str = "lat",
+) -> Iterator[tuple[np.ndarray, PropertyTable]]:
+    """Read sites from a CSV file block by block, in chunks of up to `chunk_size` rows.
+
+    Column types are worked out from the first block.
+    """
+    pa = _import_pyarrow()
+    from pyarrow import csv
+
+    reader = csv.open_csv(
+        csv_path,
+        convert_options=_get_csv_options(
+            columns=columns, x_column=x_column, y_column=y_column
+        ),
+    )
+    for batch in reader:
+        for start in range(0, batch.num_rows, chunk_size):
+            yield _get_csv_sites(
+                table=pa.Table.from_batches([batch.slice(start, chunk_size)]),
+                columns=columns,
+                x_column=x_column,
+                y_column=y_column,
+            )
+
+
+def _iter_sites_from_geojson(
+    geojson_path: str | Path,
+    columns: Sequence[str] | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[tuple[np.ndarray, PropertyTable]]:
+    return iter_sites_from_geojson(
+        geojson_path=geojson_path, chunk_size=chunk_size, columns=columns
+    )
+
+
+def _iter_sites_from_site_store(
+    store_path: str | Path,
+    columns: Sequence[str] | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[tuple[np.ndarray, PropertyTable]]:
+    # the store is memory mapped, so slicing it only reads each chunk
+    points, properties = load_sites_from_site_store(store_path, columns=columns)
+    for start in range(0, len(points), chunk_size):
+        stop = min(start + chunk_size, len(points))
+        yield np.asarray(points[start:stop]), properties.take(np.arange(start, stop))
+
+
+SITE_READERS = {
+    ".geojson": load_sites_from_geojson,
+    ".json": load_sites_from_geojson,
+    ".parquet": load_sites_from_geoparquet,
+    ".geoparquet": load_sites_from_geoparquet,
+    ".fgb": load_sites_from_flatgeobuf,
+    ".csv": load_sites_from_csv,
+    ".sites": load_sites_from_site_store,
+}
+
+
+SITE_CHUNK_READERS = {
+    ".geojson": _iter_sites_from_geojson,
+    ".json": _iter_sites_from_geojson,
+    ".parquet": iter_sites_from_geoparquet,
+    ".geoparquet": iter_sites_from_geoparquet,
+    ".fgb": iter_sites_from_flatgeobuf,
+    ".csv": iter_sites_from_csv,
+    ".sites": _iter_sites_from_site_store,
+}
+
+
+def load_sites(
+    file_path: str | Path, columns: Sequence[str] | None = None
+) -> tuple[np.ndarray, PropertyTable]:
+    """Load sites with the reader matching the file extension, GeoJSON by default.
+
+    Returns an (N, 2) float64 array and the properties named in `columns`, or
+    all properties when it is None.
+    """
+    reader = SITE_READERS.get(Path(file_path).suffix.lower(), load_sites_from_geojson)
+    return reader(file_path, columns=columns)
+
+
+def iter_sites(
+    file_path: str | Path,
+    columns: Sequence[str] | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[tuple[np.ndarray, PropertyTable]]:
+    """Read sites in chunks with the reader matching the file extension.
+
+    Like `load_sites`, but only one chunk of up to `chunk_size` sites is held in
+    memory at a time, so files larger than memory can be read.
+    """
+    reader = SITE_CHUNK_READERS.get(
+        Path(file_path).suffix.lower(), _iter_sites_from_geojson
+    )
+    return reader(file_path, columns=columns, chunk_size=chunk_size)
@@ -0,0 +1,140 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+from voronoi_mapper.geojson import load_sites_from_geojson
+from voronoi_mapper.properties import PropertyTable
+
+# A site store is a fixed size header followed by an (N, 2) little-endian
+# float64 coordinate block and an (N,) little-endian int64 id block. The header
+# is padded to 64 bytes so both blocks stay aligned for memory mapping.
+_MAGIC = b"VMSITES\0"
+_VERSION = 1
+_HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("n_sites", "<u8")])
+_HEADER_SIZE = 64
+
+
+@dataclass
+class SiteStore:
+    """Memory mapped sites, where row i of `points` has id `ids[i]`."""
+
+    points: np.memmap
+    ids: np.memmap
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+
+@dataclass(frozen=True)
+class MappedArray:
+    """Where a memory mapped array lives, so other processes can map it again.
+
+    Pickling a np.memmap copies its data, pickling this only copies the path.
+    """
+
+    filename: str
+    offset: int
+    shape: tuple[int, ...]
+    dtype: str
+
+    @classmethod
+    def from_memmap(cls, array: np.memmap) -> "MappedArray":
+        return cls(
+            filename=array.filename,
+            offset=array.offset,
+            shape=array.shape,
+            dtype=array.dtype.str,
+        )
+
+    def open(self) -> np.memmap:
+        return np.memmap(
+            self.filename,
+            dtype=self.dtype,
+            mode="r",
+            offset=self.offset,
+            shape=self.shape,
+        )
+
+
+def write_site_store(
+    store_path: Path | str, points: np.ndarray, ids: np.ndarray | None = None
+):
+    """Write sites, and ids defaulting to their row numbers, to a site store file."""
+    points = np.asarray(points, dtype="<f8").reshape(-1, 2)
+    ids = np.arange(len(points)) if ids is None else np.asarray(ids)
+    if len(ids) != len(points):
+        raise ValueError(f"Got {len(ids)} ids for {len(points)} sites.")
+
+    header = np.zeros(1, dtype=_HEADER)
+    header[0] = (_MAGIC, _VERSION, len(points))
+
+    with open(store_path, "wb") as f:
+        f.write(header.tobytes().ljust(_HEADER_SIZE, b"\0"))
+        f.write(np.ascontiguousarray(points).tobytes())
+        f.write(ids.astype("<i8").tobytes())
+
+
+def open_site_store(store_path: Path | str) -> SiteStore:
+    """Memory map a site store read only, without reading its blocks."""
+    header = np.fromfile(store_path, dtype=_HEADER, count=1)
+    if len(header) == 0 or header[0]["magic"] != _MAGIC.rstrip(b"\0"):
+        raise ValueError(f"{store_path} is not a site store.")
+    if header[0]["version"] != _VERSION:
+        raise ValueError(
+            f"Unsupported site store version {header[0]['version']} in {store_path}."
+        )
+
+    n_sites = int(header[0]["n_sites"])
+    if n_sites == 0:
+        return SiteStore(
+            points=np.empty((0, 2), dtype="<f8"), ids=np.empty(0, dtype="<i8")
+        )
+
+    points = np.memmap(
+        store_path, dtype="<f8", mode="r", offset=_HEADER_SIZE, shape=(n_sites, 2)
+    )
+    ids = np.memmap(
+        store_path,
+        dtype="<i8",
+        mode="r",
+        offset=_HEADER_SIZE + points.nbytes,
+        shape=(n_sites,),
+    )
+    return SiteStore(points=points, ids=ids)
+
+
+def load_sites_from_site_store(
+    store_path: Path | str, columns: Sequence[str] | None = None
+) -> tuple[np.ndarray, PropertyTable]:
+    """Load memory mapped sites with their ids as the only "id" property column."""
+    store = open_site_store(store_path=store_path)
+    properties = (
+        {} if columns is not None and "id" not in columns else {"id": store.ids}
+    )
+    return store.points, PropertyTable(columns=properties, length=len(store))
+
+
+def convert_geojson_to_site_store(
+    geojson_path: Path | str, store_path: Path | str, id_property: str | None = None
+):
+    """Convert GeoJSON point features to a site store.
+
+    Ids come from the integer `id_property` of each feature, or else its row number.
+    Every feature needs an integer `id_property` when it is given.
+    """
+    points, properties = load_sites_from_geojson(
+        geojson_path=geojson_path, columns=[] if id_property is None else [id_property]
+    )
+    ids = None
+    if id_property is not None:
+        ids = properties.columns.get(id_property, np.empty(0, dtype=np.int64))
+        if len(ids) != len(points):
+            raise ValueError(f"No feature in {geojson_path} has {id_property!r}.")
+        # features without the property make the column float with NaN
+        if not np.issubdtype(ids.dtype, np.integer):
+            raise ValueError(
+                f"{id_property!r} is missing or not an integer in some features of "
+                f"{geojson_path}."
+            )
+    write_site_store(store_path=store_path, points=points, ids=ids)
@@ -0,0 +1,338 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Generator
+
+import numpy as np
+import shapely
+from scipy.spatial import Voronoi, cKDTree
+from voronoi_mapper.models import BoundingBox
+from voronoi_mapper.site_store import MappedArray
+from voronoi_mapper.voronoi import get_cells_from_voronoi
+
+# smallest number of sites Qhull reliably builds a 2D diagram from
+_MIN_VORONOI_SITES = 4
+
+_worker_points: np.ndarray | None = None
+_worker_tree: cKDTree | None = None
+
+
+def _get_window(points: np.ndarray, halo: float) -> tuple[float, float, float, float]:
+    xmin, ymin = points.min(axis=0) - halo
+    xmax, ymax = points.max(axis=0) + halo
+    return xmin, ymin, xmax, ymax
+
+
+def _check_cells_are_exact(
+    cells: np.ndarray,
+    sites: np.ndarray,
+    window: tuple[float, float, float, float],
+    site_extent: tuple[float, float, float, float],
+    tree: cKDTree,
+) -> np.ndarray:
+    """Check which cells built from the sites in a window match the full diagram.
+
+    A cell built from fewer sites can only be too big, and it is exact when its
+    own site is nearest to every one of its vertices. That holds without a
+    lookup when the circle around a vertex through its site stays inside the
+    window, as every site in the window was used. Window sides beyond the extent
+    of all sites are treated as open. Other vertices are checked against `tree`.
+    """
+    xmin, ymin, xmax, ymax = window
+    extent_xmin, extent_ymin, extent_xmax, extent_ymax = site_extent
+    xmin = -np.inf if xmin <= extent_xmin else xmin
+    ymin = -np.inf if ymin <= extent_ymin else ymin
+    xmax = np.inf if xmax >= extent_xmax else xmax
+    ymax = np.inf if ymax >= extent_ymax else ymax
+
+    coordinates, cell_indices = shapely.get_coordinates(cells, return_index=True)
+    radii = np.linalg.norm(coordinates - sites[cell_indices], axis=1)
+    inside = (
+        (coordinates[:, 0] - radii >= xmin)
+        & (coordinates[:, 0] + radii <= xmax)
+        & (coordinates[:, 1] - radii >= ymin)
+        & (coordinates[:, 1] + radii <= ymax)
+    )
+
+    nearest_distances, _ = tree.query(coordinates[~inside])
+    closer_site = nearest_distances < radii[~inside] * (1 - 1e-9)
+    return np.bincount(cell_indices[~inside][closer_site], minlength=len(cells)) == 0
+
+
+def _group_sites(sites: np.ndarray, size: float) -> list[np.ndarray]:
+    """Group sites by the square of a grid of the given size they fall in."""
+    squares = np.floor((sites - sites.min(axis=0)) / size).astype(np.int64)
+    _, group_ids = np.unique(squares, axis=0, return_inverse=True)
+    order = np.argsort(group_ids.reshape(-1), kind="stable")
+    boundaries = np.flatnonzero(np.diff(group_ids.reshape(-1)[order])) + 1
+    return np.split(order, boundaries)
+
+
+def _get_sites_in_window(
+    points: np.ndarray, tree: cKDTree, window: tuple[float, float, float, float]
+) -> np.ndarray:
+    xmin, ymin, xmax, ymax = window
+    center = [(xmin + xmax) / 2, (ymin + ymax) / 2]
+    radius = np.hypot(xmax - xmin, ymax - ymin) / 2
+    candidates = np.asarray(tree.query_ball_point(center, r=radius), dtype=np.intp)
+    candidates = candidates[
+        (points[candidates, 0] >= xmin)
+        & (points[candidates, 0] <= xmax)
+        & (points[candidates, 1] >= ymin)
+        & (points[candidates, 1] <= ymax)
+    ]
+    return np.sort(candidates)
+
+
+def get_cells_for_sites(
+    points: np.ndarray,
+    site_indices: np.ndarray,
+    bounding_box: BoundingBox,
+    halo: float,
+    tree: cKDTree | None = None,
+) -> np.ndarray:
+    """Build the cells of some sites from Voronoi diagrams of only their neighbourhood.
+
+    Nearby sites are grouped and each group's diagram is built from the sites
+    within `halo` of it. Cells that do not match the full diagram are rebuilt
+    with the halo doubled, until every cell is exact or the whole point set is
+    used. `tree` is a cKDTree over `points`, built here when not given.
+
+    Returns an array of polygons aligned with `site_indices`.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    site_indices = np.asarray(site_indices, dtype=np.intp)
+    site_extent = _get_window(points=points, halo=0)
+    tree = cKDTree(points) if tree is None else tree
+
+    cells = np.full(len(site_indices), None, dtype=object)
+    pending = np.arange(len(site_indices))
+    while len(pending):
+        still_pending = [pending[:0]]
+        for group in _group_sites(sites=points[site_indices[pending]], size=10 * halo):
+            group = pending[group]
+            window = _get_window(points=points[site_indices[group]], halo=halo)
+            local_indices = _get_sites_in_window(
+                points=points, tree=tree, window=window
+            )
+            covers_all_points = len(local_indices) == len(points)
+            if len(local_indices) < _MIN_VORONOI_SITES and not covers_all_points:
+                still_pending.append(group)
+                continue
+
+            local_cells = get_cells_from_voronoi(
+                voronoi=Voronoi(points[local_indices]), bounding_box=bounding_box
+            )
+            positions = np.searchsorted(local_indices, site_indices[group])
+            group_cells = local_cells[positions]
+
+            if covers_all_points:
+                exact = np.ones(len(group), dtype=bool)
+            else:
+                exact = _check_cells_are_exact(
+                    cells=group_cells,
+                    sites=points[site_indices[group]],
+                    window=window,
+                    site_extent=site_extent,
+                    tree=tree,
+                )
+
+            cells[group[exact]] = group_cells[exact]
+            still_pending.append(group[~exact])
+
+        pending = np.concatenate(still_pending)
+        halo *= 2
+
+    return cells
+
+
+def _init_worker(
+    points: np.ndarray | MappedArray, tree: cKDTree | None
+):  # pragma: no cover
+    global _worker_points, _worker_tree
+    if isinstance(points, MappedArray):
+        points = points.open()
+    _worker_points = points
+    _worker_tree = cKDTree(points) if tree is None else tree
+
+
+def _get_tile_cells(
+    site_indices: np.ndarray, bounding_box: BoundingBox, halo: float
+) -> np.ndarray:  # pragma: no cover
+    return get_cells_for_sites(
+        points=_worker_points,
+        site_indices=site_indices,
+        bounding_box=bounding_box,
+        halo=halo,
+        tree=_worker_tree,
+    )
+
+
+def split_sites_into_tiles(
+    points: np.ndarray, tiles: tuple[int, int]
+) -> list[np.ndarray]:
+    """Assign every site to one tile of an (nx, ny) grid over the site extent.
+
+    Returns the site indices of each non-empty tile.
+    """
+    nx, ny = tiles
+    xmin, ymin, xmax, ymax = _get_window(points=points, halo=0)
+    width = (xmax - xmin) or 1.0
+    height = (ymax - ymin) or 1.0
+
+    tile_x = np.minimum(((points[:, 0] - xmin) / width * nx).astype(np.intp), nx - 1)
+    tile_y = np.minimum(((points[:, 1] - ymin) / height * ny).astype(np.intp), ny - 1)
+    tile_ids = tile_y * nx + tile_x
+
+    order = np.argsort(tile_ids, kind="stable")
+    boundaries = np.flatnonzero(np.diff(tile_ids[order])) + 1
+    return np.split(order, boundaries)
+
+
+def _get_default_halo(points: np.ndarray) -> float:
+    """Three times the mean site spacing."""
+    xmin, ymin, xmax, ymax = _get_window(points=points, halo=0)
+    area = max((xmax - xmin) * (ymax - ymin), np.finfo(float).tiny)
+    return 3 * np.sqrt(area / len(points))
+
+
+def _get_worker_initargs(
+    points: np.ndarray,
+) -> tuple[np.ndarray, tuple[np.ndarray | MappedArray, cKDTree | None]]:
+    """Get the points as float64 and what `_init_worker` is passed for them."""
+    if isinstance(points, np.memmap) and points.dtype == np.float64:
+        # workers map the file themselves and build their own tree, rather
+        # than receiving copies of both
+        return points, (MappedArray.from_memmap(points), None)
+    points = np.asarray(points, dtype=np.float64)
+    return points, (points, cKDTree(points))
+
+
+def get_cells_tiled(
+    points: np.ndarray,
+    bounding_box: BoundingBox,
+    tiles: tuple[int, int],
+    halo: float | None = None,
+    max_workers: int | None = None,
+) -> np.ndarray:
+    """
+    Build every site's cell tile by tile across a pool of worker processes.
+
+    Parameters:
+    - points (np.ndarray): An (N, 2) array of sites.
+    - bounding_box (BoundingBox): The box the cells are clipped to.
+    - tiles (tuple[int, int]): The number of tiles along x and y.
+    - halo (float | None): Margin of neighbouring sites included around each tile,
+      defaults to three times the mean site spacing.
+    - max_workers (int | None): Passed on to ProcessPoolExecutor. Memory mapped
+      points are mapped again by each worker rather than copied to it.
+
+    Returns:
+    - np.ndarray: Polygons aligned with `points`, matching `get_cells_from_voronoi`
+      on the full diagram.
+    """
+    points, initargs = _get_worker_initargs(points=points)
+    halo = _get_default_halo(points=points) if halo is None else halo
+
+    tile_site_indices = split_sites_into_tiles(points=points, tiles=tiles)
+
+    cells = np.empty(len(points), dtype=object)
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=initargs,
+    ) as executor:
+        tile_cells = executor.map(
+            _get_tile_cells,
+            tile_site_indices,
+            [bounding_box] * len(tile_site_indices),
+            [halo] * len(tile_site_indices),
+        )
+        for site_indices, site_cells in zip(tile_site_indices, tile_cells):
+            cells[site_indices] = site_cells
+
+    return cells
+
+
+def get_chunk_order(points: np.ndarray, chunk_size: int) -> np.ndarray:
+    """Order sites so that every run of `chunk_size` of them lies close together.
+
+    Sites are cut into vertical strips of equal counts, about as wide as a run is
+    tall, and ordered along y within each strip.
+    """
+    n_strips = max(1, round(np.sqrt(len(points) / chunk_size)))
+    strips = np.empty(len(points), dtype=np.intp)
+    strips[np.argsort(points[:, 0], kind="stable")] = (
+        np.arange(len(points)) * n_strips // max(len(points), 1)
+    )
+    return np.lexsort((points[:, 1], strips))
+
+
+def iter_cells_in_chunks(
+    points: np.ndarray,
+    bounding_box: BoundingBox,
+    chunk_size: int,
+    tiles: tuple[int, int] | None = None,
+    halo: float | None = None,
+    max_workers: int | None = None,
+) -> Generator[tuple[np.ndarray, np.ndarray], None, None]:
+    """
+    Build the cells of `chunk_size` nearby sites at a time.
+
+    Chunks follow `get_chunk_order` and each one is built by `get_cells_for_sites`
+    from diagrams of only the sites around it, so neither a diagram of all sites
+    nor all of their cells is held.
+
+    Parameters:
+    - points (np.ndarray): An (N, 2) array of sites.
+    - bounding_box (BoundingBox): The box the cells are clipped to.
+    - chunk_size (int): The number of sites built at a time.
+    - tiles (tuple[int, int] | None): Split the sites of each chunk into this many
+      tiles along x and y, built across a pool of worker processes. Without it,
+      chunks are built in this process.
+    - halo (float | None): As in `get_cells_tiled`.
+    - max_workers (int | None): As in `get_cells_tiled`, only used with `tiles`.
+
+    Returns:
+    - Generator[tuple[np.ndarray, np.ndarray], None, None]: The ascending site
+      indices of each chunk and their polygons, matching `get_cells_from_voronoi`
+      on the full diagram.
+    """
+    if tiles is None:
+        points = np.asarray(points, dtype=np.float64)
+    else:
+        points, initargs = _get_worker_initargs(points=points)
+    halo = _get_default_halo(points=points) if halo is None else halo
+    order = get_chunk_order(points=points, chunk_size=chunk_size)
+    chunks = (
+        np.sort(order[start : start + chunk_size])
+        for start in range(0, len(points), chunk_size)
+    )
+
+    if tiles is None:
+        tree = cKDTree(points)
+        for site_indices in chunks:
+            yield site_indices, get_cells_for_sites(
+                points=points,
+                site_indices=site_indices,
+                bounding_box=bounding_box,
+                halo=halo,
+                tree=tree,
+            )
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=initargs,
+    ) as executor:
+        for site_indices in chunks:
+            positions = split_sites_into_tiles(points=points[site_indices], tiles=tiles)
+            tile_cells = executor.map(
+                _get_tile_cells,
+                [site_indices[tile] for tile in positions],
+                [bounding_box] * len(positions),
+                [halo] * len(positions),
+            )
+            cells = np.empty(len(site_indices), dtype=object)
+            for tile, site_cells in zip(positions, tile_cells):
+                cells[tile] = site_cells
+            yield site_indices, cells
@@ -0,0 +1,540 @@
+from __future__ import annotations
+
+import gzip
+import json
+import math
+import sqlite3
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+import numpy as np
+import shapely
+
+if TYPE_CHECKING:
+    import geopandas as gpd
+    import pandas as pd
+
+TILE_EXTENT = 4096
+
+# tile units drawn around every tile, so that outlines of cells crossing a
+# tile edge are not drawn along it
+TILE_BUFFER = 64
+
+# web mercator stops short of the poles
+MAX_LATITUDE = 85.0511287798066
+
+# protobuf wire types
+_VARINT = 0
+_FIXED64 = 1
+_LENGTH_DELIMITED = 2
+
+# geometry commands of the vector tile spec
+_MOVE_TO = 1
+_LINE_TO = 2
+_CLOSE_PATH = 7
+
+_POLYGON = 3
+
+
+@dataclass
+class TileLayer:
+    """The features of a layer, shared by the tiles they are cut into."""
+
+    name: str
+    feature_ids: np.ndarray | None
+    columns: dict[str, list]
+
+
+_worker_layer: TileLayer | None = None
+
+
+def _encode_varint(value: int) -> bytes:
+    if value < 0x80:
+        return bytes((value,))
+    encoded = bytearray()
+    while value > 0x7F:
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def _encode_varints(values: np.ndarray) -> tuple[bytes, np.ndarray]:
+    """Encode non-negative integers as consecutive protobuf varints.
+
+    Returns the varints and the offset each of them ends at.
+    """
+    values = np.asarray(values, dtype=np.uint64).reshape(-1)
+    # 7 bits per byte, and a 64 bit integer takes up to 10 bytes
+    shifts = np.arange(10, dtype=np.uint64) * np.uint64(7)
+    groups = (values[:, None] >> shifts) & np.uint64(0x7F)
+    n_bytes = 1 + np.count_nonzero(values[:, None] >> shifts[1:], axis=1)
+    continued = np.arange(10) < (n_bytes - 1)[:, None]
+    encoded = groups.astype(np.uint8) | (continued * 0x80).astype(np.uint8)
+    return encoded[np.arange(10) < n_bytes[:, None]].tobytes(), np.cumsum(n_bytes)
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+@lru_cache(maxsize=None)
+def _encode_key(field: int, wire_type: int) -> bytes:
+    return _encode_varint((field << 3) | wire_type)
+
+
+def _encode_varint_field(field: int, value: int) -> bytes:
+    return _encode_key(field, _VARINT) + _encode_varint(value)
+
+
+def _encode_bytes_field(field: int, payload: bytes) -> bytes:
+    return (
+        _encode_key(field, _LENGTH_DELIMITED) + _encode_varint(len(payload)) + payload
+    )
+
+
+def _encode_value(value) -> bytes | None:
+    """Encode a property as a vector tile value, or None when it is missing."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, bool):
+        return _encode_varint_field(7, int(value))
+    if isinstance(value, int):
+        return _encode_varint_field(6, _zigzag(value))
+    if isinstance(value, float):
+        return _encode_key(3, _FIXED64) + struct.pack("<d", value)
+    if not isinstance(value, str):
+        # such as the lists of merged sites
+        value = json.dumps(value, default=str)
+    return _encode_bytes_field(1, value.encode())
+
+
+def _encode_geometries(polygons: np.ndarray) -> tuple[bytes, list[int]]:
+    """Encode polygons as vector tile geometry commands, all in one go.
+
+    The polygons are in whole tile units, with exteriors of positive and
+    interiors of negative area. Returns the commands of every polygon one after
+    another, and the offset the commands of each polygon start at, plus the end.
+    Empty polygons have no commands.
+    """
+    parts, part_polygons = shapely.get_parts(polygons, return_index=True)
+    rings, ring_parts = shapely.get_rings(parts, return_index=True)
+    coordinates, coordinate_rings = shapely.get_coordinates(rings, return_index=True)
+    coordinates = coordinates.astype(np.int64)
+
+    # the closing point of every ring is left out, ClosePath returns to the
+    # start, and so are points rounded onto the point before them
+    same_ring = coordinate_rings[1:] == coordinate_rings[:-1]
+    keep = np.append(same_ring, False)
+    keep[1:] &= ~(same_ring & np.all(coordinates[1:] == coordinates[:-1], axis=1))
+    coordinates, coordinate_rings = coordinates[keep], coordinate_rings[keep]
+
+    # rings rounded down to no area are dropped, holes go with their exterior
+    ring_lengths = np.bincount(coordinate_rings, minlength=len(rings))
+    ring_starts = np.cumsum(ring_lengths) - ring_lengths
+    following = np.arange(1, len(coordinates) + 1)
+    following[ring_starts + ring_lengths - 1] = ring_starts
+    cross_products = (
+        coordinates[:, 0] * coordinates[following, 1]
+        - coordinates[following, 0] * coordinates[:, 1]
+    )
+    ring_areas = np.bincount(
+        coordinate_rings, weights=cross_products, minlength=len(rings)
+    )
+    kept_rings = ring_areas != 0
+    ring_polygons = part_polygons[ring_parts][kept_rings]
+    ring_lengths = ring_lengths[kept_rings]
+    ring_starts = np.cumsum(ring_lengths) - ring_lengths
+    kept = kept_rings[coordinate_rings]
+    coordinates = coordinates[kept]
+    coordinate_rings = (np.cumsum(kept_rings) - 1)[coordinate_rings[kept]]
+
+    # every point is relative to the one before it in the same polygon
+    deltas = np.diff(coordinates, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+    first_rings = np.flatnonzero(np.diff(ring_polygons, prepend=-1))
+    deltas[ring_starts[first_rings]] = coordinates[ring_starts[first_rings]]
+    parameters = ((deltas << 1) ^ (deltas >> 63)).astype(np.uint64)
+
+    # each ring is a MoveTo with its first point, a LineTo with the rest of
+    # its points and a ClosePath
+    ring_sizes = 2 * ring_lengths + 3
+    ring_offsets = np.cumsum(ring_sizes) - ring_sizes
+    commands = np.empty(ring_sizes.sum(), dtype=np.uint64)
+    commands[ring_offsets] = _MOVE_TO | (1 << 3)
+    commands[ring_offsets + 3] = _LINE_TO | ((ring_lengths - 1) << 3)
+    commands[ring_offsets + ring_sizes - 1] = _CLOSE_PATH | (1 << 3)
+    positions = np.arange(len(coordinates)) - ring_starts[coordinate_rings]
+    parameter_offsets = ring_offsets[coordinate_rings] + 1 + 2 * positions
+    parameter_offsets[positions > 0] += 1
+    commands[parameter_offsets] = parameters[:, 0]
+    commands[parameter_offsets + 1] = parameters[:, 1]
+
+    encoded, ends = _encode_varints(commands)
+    polygon_ends = np.cumsum(
+        np.bincount(ring_polygons, weights=ring_sizes, minlength=len(polygons))
+    ).astype(np.intp)
+    byte_ends = np.append(0, ends)[polygon_ends]
+    return encoded, [0, *byte_ends.tolist()]
+
+
+def _get_tile_polygons(
+    geometries: np.ndarray, tile: tuple[int, int, int], extent: int, buffer: int
+) -> np.ndarray:
+    """Clip geometries in unit mercator coordinates to a tile, in whole tile units."""
+    zoom, x, y = tile
+    margin = buffer / extent
+    clipped = shapely.clip_by_rect(
+        geometries,
+        (x - margin) / 2**zoom,
+        (y - margin) / 2**zoom,
+        (x + 1 + margin) / 2**zoom,
+        (y + 1 + margin) / 2**zoom,
+    )
+    in_tile = shapely.transform(
+        clipped,
+        lambda coordinates: np.round((coordinates * 2**zoom - [x, y]) * extent),
+    )
+    # with y pointing down, tile exteriors are counter-clockwise in shapely's terms
+    return shapely.orient_polygons(in_tile, exterior_cw=False)
+
+
+def encode_tile(
+    layer: TileLayer,
+    tile: tuple[int, int, int],
+    geometries: np.ndarray,
+    rows: np.ndarray,
+    extent: int = TILE_EXTENT,
+    buffer: int = TILE_BUFFER,
+) -> bytes | None:
+    """
+    Encode the features of a layer that reach a tile as a Mapbox vector tile.
+
+    Parameters:
+    - layer (TileLayer): The layer the features belong to.
+    - tile (tuple[int, int, int]): The zoom, x and y of the tile.
+    - geometries (np.ndarray): The polygons of the features in unit mercator
+      coordinates, x and y from 0 to 1 with y pointing south.
+    - rows (np.ndarray): The row of each feature in the layer.
+    - extent (int): Tile units along each side of the tile.
+    - buffer (int): Tile units kept around the tile.
+
+    Returns:
+    - bytes | None: The tile, or None when every feature is smaller than a tile unit.
+    """
+    polygons = _get_tile_polygons(
+        geometries=geometries, tile=tile, extent=extent, buffer=buffer
+    )
+    encoded_geometries, offsets = _encode_geometries(polygons)
+    keys = {}
+    values = {}
+    features = []
+    for index, row in enumerate(rows.tolist()):
+        start, end = offsets[index], offsets[index + 1]
+        if start == end:
+            continue
+
+        tags = []
+        for key, column in layer.columns.items():
+            value = _encode_value(column[row])
+            if value is None:
+                continue
+            tags.append(keys.setdefault(key, len(keys)))
+            tags.append(values.setdefault(value, len(values)))
+
+        feature = b""
+        if layer.feature_ids is not None:
+            feature += _encode_varint_field(1, int(layer.feature_ids[row]))
+        feature += _encode_bytes_field(2, b"".join(map(_encode_varint, tags)))
+        feature += _encode_varint_field(3, _POLYGON)
+        feature += _encode_bytes_field(4, encoded_geometries[start:end])
+        features.append(_encode_bytes_field(2, feature))
+
+    if not features:
+        return None
+
+    encoded_layer = b"".join(
+        [
+            _encode_varint_field(15, 2),
+            _encode_bytes_field(1, layer.name.encode()),
+            *features,
+            *(_encode_bytes_field(3, key.encode()) for key in keys),
+            *(_encode_bytes_field(4, value) for value in values),
+            _encode_varint_field(5, extent),
+        ]
+    )
+    return _encode_bytes_field(3, encoded_layer)
+
+
+def lon_lat_to_unit_mercator(geometries: np.ndarray) -> np.ndarray:
+    """Project geometries from longitude and latitude to unit web mercator.
+
+    x and y run from 0 to 1 across the world, with y pointing south as in tile
+    numbering. Latitudes beyond the reach of web mercator are clamped.
+    """
+
+    def project(coordinates: np.ndarray) -> np.ndarray:
+        longitudes = coordinates[:, 0]
+        latitudes = np.radians(np.clip(coordinates[:, 1], -MAX_LATITUDE, MAX_LATITUDE))
+        x = (longitudes + 180) / 360
+        y = (1 - np.arcsinh(np.tan(latitudes)) / np.pi) / 2
+        return np.column_stack([x, y])
+
+    return shapely.transform(geometries, project)
+
+
+def get_tile_features(
+    geometries: np.ndarray,
+    zoom: int,
+    buffer_fraction: float = TILE_BUFFER / TILE_EXTENT,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find the tiles at a zoom level each geometry reaches.
+
+    Tiles are first picked from the bounds of each geometry, and then a spatial
+    index of the geometries keeps the tiles each one really reaches.
+
+    Parameters:
+    - geometries (np.ndarray): Geometries in unit mercator coordinates.
+    - zoom (int): The zoom level of the tiles.
+    - buffer_fraction (float): Fraction of a tile around each tile that counts
+      as part of it.
+
+    Returns:
+    - tuple[np.ndarray, np.ndarray, np.ndarray]: The x and y of every tile reached,
+      and the indices of the geometries reaching each one, as a start index per
+      tile into the last array, which is grouped by tile.
+    """
+    n_tiles = 2**zoom
+    bounds = shapely.bounds(geometries) * n_tiles
+    lower = np.clip(np.floor(bounds[:, :2] - buffer_fraction), 0, n_tiles - 1)
+    upper = np.clip(np.floor(bounds[:, 2:] + buffer_fraction), 0, n_tiles - 1)
+    lower, upper = lower.astype(np.int64), upper.astype(np.int64)
+
+    # every tile within the bounds of some geometry
+    spans = upper - lower + 1
+    counts = spans[:, 0] * spans[:, 1]
+    geometry_indices = np.repeat(np.arange(len(geometries)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    xs = lower[geometry_indices, 0] + offsets // spans[geometry_indices, 1]
+    ys = lower[geometry_indices, 1] + offsets % spans[geometry_indices, 1]
+    tile_keys = np.unique(xs * n_tiles + ys)
+    tile_xs, tile_ys = tile_keys // n_tiles, tile_keys % n_tiles
+
+    tile_boxes = shapely.box(
+        (tile_xs - buffer_fraction) / n_tiles,
+        (tile_ys - buffer_fraction) / n_tiles,
+        (tile_xs + 1 + buffer_fraction) / n_tiles,
+        (tile_ys + 1 + buffer_fraction) / n_tiles,
+    )
+    tile_indices, feature_indices = shapely.STRtree(geometries).query(
+        tile_boxes, predicate="intersects"
+    )
+    order = np.lexsort((feature_indices, tile_indices))
+    tile_indices, feature_indices = tile_indices[order], feature_indices[order]
+
+    reached = np.unique(tile_indices)
+    starts = np.searchsorted(tile_indices, reached)
+    return (
+        np.column_stack([tile_xs[reached], tile_ys[reached]]),
+        feature_indices,
+        starts,
+    )
+
+
+def _iter_tile_tasks(
+    geometries: np.ndarray, min_zoom: int, max_zoom: int, simplify_tolerance: float
+) -> Iterator[tuple[tuple[int, int, int], np.ndarray, np.ndarray]]:
+    """Yield every tile with the simplified geometries and rows of the features in it."""
+    for zoom in range(min_zoom, max_zoom + 1):
+        pixel_size = 1 / (2**zoom * TILE_EXTENT)
+        # cells share their edges, so they are simplified together to keep
+        # neighbours from gaining gaps or overlaps
+        simplified = shapely.coverage_simplify(
+            geometries, tolerance=simplify_tolerance * pixel_size
+        )
+        tiles, feature_indices, starts = get_tile_features(
+            geometries=simplified, zoom=zoom
+        )
+        ends = np.append(starts[1:], len(feature_indices))
+        for (x, y), start, end in zip(tiles.tolist(), starts, ends):
+            rows = feature_indices[start:end]
+            yield (zoom, x, y), simplified[rows], rows
+
+
+def _init_worker(layer: TileLayer):  # pragma: no cover
+    global _worker_layer
+    _worker_layer = layer
+
+
+def _encode_tile_in_worker(
+    task: tuple[tuple[int, int, int], np.ndarray, np.ndarray],
+) -> tuple[tuple[int, int, int], bytes | None]:  # pragma: no cover
+    tile, geometries, rows = task
+    return tile, encode_tile(
+        layer=_worker_layer, tile=tile, geometries=geometries, rows=rows
+    )
+
+
+def _write_tile_directory(
+    tiles: Iterable[tuple[tuple[int, int, int], bytes]], save_path: Path
+) -> int:
+    n_tiles = 0
+    for (zoom, x, y), data in tiles:
+        tile_path = save_path / str(zoom) / str(x) / f"{y}.pbf"
+        tile_path.parent.mkdir(parents=True, exist_ok=True)
+        tile_path.write_bytes(data)
+        n_tiles += 1
+    return n_tiles
+
+
+def _write_mbtiles(
+    tiles: Iterable[tuple[tuple[int, int, int], bytes]],
+    save_path: Path,
+    metadata: dict[str, str],
+) -> int:
+    save_path.unlink(missing_ok=True)
+    connection = sqlite3.connect(save_path)
+    try:
+        connection.execute("CREATE TABLE metadata (name TEXT, value TEXT)")
+        connection.execute(
+            "CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, "
+            "tile_row INTEGER, tile_data BLOB)"
+        )
+        connection.execute(
+            "CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row)"
+        )
+        connection.executemany("INSERT INTO metadata VALUES (?, ?)", metadata.items())
+        # MBTiles numbers rows from the south
+        connection.executemany(
+            "INSERT INTO tiles VALUES (?, ?, ?, ?)",
+            (
+                (zoom, x, 2**zoom - 1 - y, gzip.compress(data))
+                for (zoom, x, y), data in tiles
+            ),
+        )
+        connection.commit()
+        (n_tiles,) = connection.execute("SELECT COUNT(*) FROM tiles").fetchone()
+    finally:
+        connection.close()
+    return n_tiles
+
+
+def _get_field_type(column: pd.Series) -> str:
+    if column.dtype.kind == "b":
+        return "Boolean"
+    if column.dtype.kind in "iuf":
+        return "Number"
+    return "String"
+
+
+def _get_mbtiles_metadata(
+    gdf: gpd.GeoDataFrame, layer_name: str, min_zoom: int, max_zoom: int
+) -> dict[str, str]:
+    xmin, ymin, xmax, ymax = gdf.total_bounds.tolist()
+    fields = {
+        key: _get_field_type(column)
+        for key, column in gdf.drop(columns=gdf.geometry.name).items()
+    }
+    vector_layer = {
+        "id": layer_name,
+        "fields": fields,
+        "minzoom": min_zoom,
+        "maxzoom": max_zoom,
+    }
+    return {
+        "name": layer_name,
+        "format": "pbf",
+        "minzoom": str(min_zoom),
+        "maxzoom": str(max_zoom),
+        "bounds": f"{xmin},{ymin},{xmax},{ymax}",
+        "json": json.dumps({"vector_layers": [vector_layer]}),
+    }
+
+
+def write_vector_tiles(
+    gdf: gpd.GeoDataFrame,
+    save_path: Path | str,
+    min_zoom: int = 0,
+    max_zoom: int = 12,
+    layer_name: str = "cells",
+    simplify_tolerance: float = 1.0,
+    max_workers: int | None = None,
+) -> int:
+    """
+    Cut polygons into z/x/y Mapbox vector tiles for web maps.
+
+    Every zoom level gets its own copy of the polygons simplified to a fraction
+    of a tile unit, so low zoom tiles stay small. Features smaller than a tile
+    unit are left out of a tile, and tiles left with no features are not written.
+
+    Parameters:
+    - gdf (gpd.GeoDataFrame): The polygons and their properties, in longitude and
+      latitude when it has no crs. An integer index becomes the feature ids.
+    - save_path (Path | str): An MBTiles file when it ends in `.mbtiles`, otherwise
+      a directory of `{z}/{x}/{y}.pbf` tiles.
+    - min_zoom (int): The lowest zoom level to cut.
+    - max_zoom (int): The highest zoom level to cut.
+    - layer_name (str): The name of the layer in every tile.
+    - simplify_tolerance (float): How far polygons are simplified, in tile units of
+      each zoom level.
+    - max_workers (int | None): Tiles are encoded in this process when 1, otherwise
+      across a pool of processes. None uses every CPU.
+
+    Returns:
+    - int: The number of tiles written.
+    """
+    if not 0 <= min_zoom <= max_zoom:
+        raise ValueError(
+            f"Expected 0 <= min_zoom <= max_zoom, got {min_zoom} and {max_zoom}."
+        )
+
+    if gdf.crs is not None and not gdf.crs.equals("EPSG:4326"):
+        gdf = gdf.to_crs("EPSG:4326")
+
+    index = gdf.index.to_numpy()
+    layer = TileLayer(
+        name=layer_name,
+        feature_ids=(
+            index if index.dtype.kind in "iu" and np.all(index >= 0) else None
+        ),
+        columns={
+            key: column.astype(object).where(column.notna(), None).tolist()
+            for key, column in gdf.drop(columns=gdf.geometry.name).items()
+        },
+    )
+    tasks = _iter_tile_tasks(
+        geometries=lon_lat_to_unit_mercator(gdf.geometry.to_numpy()),
+        min_zoom=min_zoom,
+        max_zoom=max_zoom,
+        simplify_tolerance=simplify_tolerance,
+    )
+
+    def write(encoded_tiles: Iterable[tuple[tuple[int, int, int], bytes | None]]):
+        tiles = ((tile, data) for tile, data in encoded_tiles if data is not None)
+        if Path(save_path).suffix.lower() == ".mbtiles":
+            return _write_mbtiles(
+                tiles=tiles,
+                save_path=Path(save_path),
+                metadata=_get_mbtiles_metadata(
+                    gdf=gdf, layer_name=layer_name, min_zoom=min_zoom, max_zoom=max_zoom
+                ),
+            )
+        return _write_tile_directory(tiles=tiles, save_path=Path(save_path))
+
+    if max_workers == 1:
+        return write(
+            (
+                tile,
+                encode_tile(layer=layer, tile=tile, geometries=geometries, rows=rows),
+            )
+            for tile, geometries, rows in tasks
+        )
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers, initializer=_init_worker, initargs=(layer,)
+    ) as executor:
+        return write(executor.map(_encode_tile_in_worker, tasks, chunksize=16))
@@ -1,114 +1,285 @@
-import json
+from __future__ import annotations
+
+from itertools import chain
 from pathlib import Path
-from pdb import set_trace
-from typing import Generator
+from typing import TYPE_CHECKING, Generator, Iterable, Sequence
 
-import geopandas as gpd
 import numpy as np
+import shapely
 from scipy.spatial import Voronoi
-from shapely.geometry import LineString, MultiPolygon, Polygon
+from shapely.geometry import MultiPolygon, Polygon
 from shapely.ops import polygonize
-from voronoi_mapper.geojson import (
-    load_mask_geojson,
-    load_points_and_features_from_geojson,
+from voronoi_mapper.cache import (
+    StageCache,
+    cached_stage,
+    load_mask_geojson_cached,
+    load_sites_cached,
 )
+from voronoi_mapper.coalesce import coalesce_properties, coalesce_sites
 from voronoi_mapper.geometry import (
+    PreparedMask,
     clip_polygons_to_mask,
     get_bounding_segments,
-    get_intersection_with_bounding_box,
+    get_intersections_with_bounding_box,
     match_point_features_to_polygons,
 )
-from voronoi_mapper.models import BoundingBox, Edges
-from voronoi_mapper.plot import plot_voronoi
+from voronoi_mapper.instrumentation import Instrumentation, measure_stage
+from voronoi_mapper.models import EDGE_ORDER, BoundingBox, VoronoiSegments
+from voronoi_mapper.properties import PropertyTable
+from voronoi_mapper.writers import write_cell_chunks, write_cells
+
+if TYPE_CHECKING:
+    import geopandas as gpd
 
 
-def _remove_coordinate_duplicates_from_list(coordinate_list: list[list[float]]):
-    """Remove duplicate coordinates from list."""
-    unique_tuples = set(tuple(item) for item in coordinate_list)
-    return [list(item) for item in unique_tuples]
+def _remove_coordinate_duplicates(coordinates: np.ndarray) -> np.ndarray:
+    """Remove duplicate coordinates from an (N, 2) array."""
+    return np.unique(coordinates.reshape(-1, 2), axis=0)
 
 
-def _remove_segment_duplicates_from_list(segments: list[list[list[float]]]):
-    """Remove duplicate segments from list.
+def _remove_segment_duplicates(segments: np.ndarray) -> np.ndarray:
+    """Remove duplicate segments from an (N, 2, 2) array.
 
     Segment AB is treated as different to segment BA.
     """
-    unique_segments = set(tuple(map(tuple, segment)) for segment in segments)
-    return [list(map(list, segment)) for segment in unique_segments]
+    unique_segments = np.unique(segments.reshape(-1, 4), axis=0)
+    return unique_segments.reshape(-1, 2, 2)
 
 
-def get_line_segments_from_voronoi(
-    voronoi: Voronoi, bounding_box: BoundingBox
-) -> tuple[list[list[float]], dict[str, list[list[float]]]]:
-    """Get the list of line segments within a bounding box from a scipy Voronoi object."""
+def _get_infinite_ridges(voronoi: Voronoi) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Find the infinite ridges of a Voronoi diagram and the direction they head in.
+
+    Returns the indices of the infinite ridges, the index of the finite vertex each
+    one starts from and an (N, 2) array of unit directions pointing away from the
+    centre of the points.
+    """
+    ridge_vertices = np.asarray(voronoi.ridge_vertices, dtype=np.intp).reshape(-1, 2)
+    ridge_indices = np.flatnonzero(np.any(ridge_vertices < 0, axis=1))
+
+    # the finite end of the ridge, the other end is -1
+    vertex_indices = ridge_vertices[ridge_indices].max(axis=1)
+
+    # Essentially a vectorised copy of the far point calculation in
+    # voronoi_plot_2d.
     center = voronoi.points.mean(axis=0)
-    segments: list[tuple[float, float]] = []
-    bounding_box_intersections: dict[str, list[list[float]]] = {
-        Edges.top.value: [],
-        Edges.right.value: [],
-        Edges.bottom.value: [],
-        Edges.left.value: [],
-    }
-    # Essentially a copy of the code from voronoi_plot_2d but with extension of
-    # infinity edges to a bounding box.
-    for pointidx, simplex in zip(voronoi.ridge_points, voronoi.ridge_vertices):
-        simplex = np.asarray(simplex)
-        if np.all(simplex >= 0):
-            segments.append(voronoi.vertices[simplex].tolist())
-            continue
-
-        i = simplex[simplex >= 0][0]
-
-        t = voronoi.points[pointidx[1]] - voronoi.points[pointidx[0]]
-        t /= np.linalg.norm(t)
-        n = np.array([-t[1], t[0]])
-
-        midpoint = voronoi.points[pointidx].mean(axis=0)
-        direction = np.sign(np.dot(midpoint - center, n)) * n
-
-        # intersection with bounding box
-        intersection = get_intersection_with_bounding_box(
-            coordinates=(voronoi.vertices[i], voronoi.vertices[i] + direction),
-            bounding_box=bounding_box,
-        )
+    point_pairs = voronoi.points[voronoi.ridge_points[ridge_indices]]
 
-        segments.append([voronoi.vertices[i], intersection.coordinates])
+    tangents = point_pairs[:, 1] - point_pairs[:, 0]
+    tangents /= np.linalg.norm(tangents, axis=1)[:, None]
+    normals = np.column_stack([-tangents[:, 1], tangents[:, 0]])
 
-        bounding_box_intersections[intersection.edge.value].append(
-            intersection.coordinates
-        )
+    midpoints = point_pairs.mean(axis=1)
+    signs = np.sign(np.einsum("ij,ij->i", midpoints - center, normals))
+    directions = signs[:, None] * normals
+
+    return ridge_indices, vertex_indices, directions
+
+
+def get_line_segment_arrays_from_voronoi(
+    voronoi: Voronoi, bounding_box: BoundingBox
+) -> VoronoiSegments:
+    """Get the line segments within a bounding box from a scipy Voronoi object.
+
+    Finite ridges are taken as they are and infinite ridges are extended to the
+    bounding box, with all ridges handled as whole arrays.
+    """
+    ridge_vertices = np.asarray(voronoi.ridge_vertices, dtype=np.intp).reshape(-1, 2)
+    finite_ridges = np.all(ridge_vertices >= 0, axis=1)
+    finite_segments = voronoi.vertices[ridge_vertices[finite_ridges]]
 
-    segments = _remove_segment_duplicates_from_list(segments=segments)
+    _, vertex_indices, directions = _get_infinite_ridges(voronoi=voronoi)
+    origins = voronoi.vertices[vertex_indices]
 
-    for k, v in bounding_box_intersections.items():
-        bounding_box_intersections[k] = _remove_coordinate_duplicates_from_list(
-            coordinate_list=v
+    intersections, edge_codes = get_intersections_with_bounding_box(
+        origins=origins, directions=directions, bounding_box=bounding_box
+    )
+    # rays that miss the bounding box add nothing inside it
+    hit = edge_codes >= 0
+    origins, intersections, edge_codes = (
+        origins[hit],
+        intersections[hit],
+        edge_codes[hit],
+    )
+    infinite_segments = np.stack([origins, intersections], axis=1)
+
+    segments = _remove_segment_duplicates(
+        segments=np.concatenate([finite_segments.reshape(-1, 2, 2), infinite_segments])
+    )
+
+    bounding_box_intersections = {
+        edge.value: _remove_coordinate_duplicates(
+            coordinates=intersections[edge_codes == code]
         )
+        for code, edge in enumerate(EDGE_ORDER)
+    }
+
+    return VoronoiSegments(
+        segments=segments, bounding_box_intersections=bounding_box_intersections
+    )
 
-    return segments, bounding_box_intersections
+
+def get_line_segments_from_voronoi(
+    voronoi: Voronoi, bounding_box: BoundingBox
+) -> tuple[list[list[float]], dict[str, list[list[float]]]]:
+    """Get the list of line segments within a bounding box from a scipy Voronoi object."""
+    voronoi_segments = get_line_segment_arrays_from_voronoi(
+        voronoi=voronoi, bounding_box=bounding_box
+    )
+
+    bounding_box_intersections = {
+        k: v.tolist() for k, v in voronoi_segments.bounding_box_intersections.items()
+    }
+
+    return voronoi_segments.segments.tolist(), bounding_box_intersections
 
 
 def get_polygons_from_voronoi(
     voronoi: Voronoi, bounding_box: BoundingBox
 ) -> Generator[Polygon, None, None]:
-    segments, bounding_box_intersections = get_line_segments_from_voronoi(
+    voronoi_segments = get_line_segment_arrays_from_voronoi(
         voronoi=voronoi, bounding_box=bounding_box
     )
 
     bounding_segments = get_bounding_segments(
-        bounding_box=bounding_box, bounding_box_intersections=bounding_box_intersections
+        bounding_box=bounding_box,
+        bounding_box_intersections=voronoi_segments.bounding_box_intersections,
     )
 
-    segments.extend(bounding_segments)
+    segments = np.concatenate([voronoi_segments.segments, bounding_segments])
+
+    return polygonize(shapely.linestrings(segments))
 
-    segments = [LineString(coordinates=segment) for segment in segments]
 
-    return polygonize(segments)
+def _get_region_vertices_per_site(voronoi: Voronoi) -> tuple[np.ndarray, np.ndarray]:
+    """Flatten the region of every site into site index and vertex index arrays.
+
+    Vertex indices of -1, which mark unbounded regions, are left in.
+    """
+    region_lengths = np.fromiter(
+        (len(region) for region in voronoi.regions),
+        dtype=np.intp,
+        count=len(voronoi.regions),
+    )
+    region_starts = np.cumsum(region_lengths) - region_lengths
+    region_vertices = np.fromiter(
+        chain.from_iterable(voronoi.regions),
+        dtype=np.intp,
+        count=region_lengths.sum(),
+    )
+
+    site_lengths = region_lengths[voronoi.point_region]
+    site_starts = np.cumsum(site_lengths) - site_lengths
+    site_indices = np.repeat(np.arange(len(voronoi.points)), site_lengths)
+
+    offsets = np.arange(site_lengths.sum()) - np.repeat(site_starts, site_lengths)
+    vertex_indices = region_vertices[
+        np.repeat(region_starts[voronoi.point_region], site_lengths) + offsets
+    ]
+    return site_indices, vertex_indices
+
+
+def _get_cell_outlines(
+    voronoi: Voronoi, bounding_box: BoundingBox
+) -> tuple[np.ndarray, np.ndarray]:
+    """Gather the coordinates whose convex hull gives each site's cell.
+
+    Returns site indices in ascending order and an (N, 2) array of the matching
+    coordinates. Sites with fewer than two coordinates have no area and are left out.
+    """
+    n_points = len(voronoi.points)
+    corners = np.array(
+        [
+            [bounding_box.xmin, bounding_box.ymin],
+            [bounding_box.xmin, bounding_box.ymax],
+            [bounding_box.xmax, bounding_box.ymax],
+            [bounding_box.xmax, bounding_box.ymin],
+        ]
+    )
+
+    site_indices, vertex_indices = _get_region_vertices_per_site(voronoi=voronoi)
+    finite = vertex_indices >= 0
+    site_indices = site_indices[finite]
+    site_coordinates = voronoi.vertices[vertex_indices[finite]]
+
+    # far points are placed beyond the bounding box so the hull covers the
+    # whole of the unbounded part of the cell inside the box
+    ridge_indices, origin_indices, directions = _get_infinite_ridges(voronoi=voronoi)
+    origins = voronoi.vertices[origin_indices]
+    reach = np.linalg.norm(corners[None] - origins[:, None], axis=2).max(axis=1)
+    far_points = origins + 2 * (reach[:, None] + 1) * directions
+    far_point_sites = voronoi.ridge_points[ridge_indices]
+
+    # a corner lies in the cell of its nearest site
+    corner_distances = np.sum((voronoi.points[None] - corners[:, None]) ** 2, axis=2)
+    corner_sites = np.argmin(corner_distances, axis=1)
+
+    site_indices = np.concatenate(
+        [site_indices, far_point_sites[:, 0], far_point_sites[:, 1], corner_sites]
+    )
+    site_coordinates = np.concatenate(
+        [site_coordinates, far_points, far_points, corners]
+    )
+
+    counts = np.bincount(site_indices, minlength=n_points)
+    keep = counts[site_indices] >= 2
+    order = np.argsort(site_indices[keep], kind="stable")
+    return site_indices[keep][order], site_coordinates[keep][order]
+
+
+def _build_cells(
+    site_indices: np.ndarray,
+    site_coordinates: np.ndarray,
+    start: int,
+    stop: int,
+    bounding_box: BoundingBox,
+) -> np.ndarray:
+    """Build the cells of sites `start` to `stop` from their sorted outline coordinates."""
+    first, last = np.searchsorted(site_indices, [start, stop])
+
+    # Lines are used rather than multipoints as they skip creating a point
+    # object per coordinate, only the hull of the coordinates matters.
+    outlines = shapely.linestrings(
+        site_coordinates[first:last],
+        indices=site_indices[first:last] - start,
+        out=np.empty(stop - start, dtype=object),
+    )
+
+    cells = shapely.clip_by_rect(
+        shapely.convex_hull(outlines),
+        bounding_box.xmin,
+        bounding_box.ymin,
+        bounding_box.xmax,
+        bounding_box.ymax,
+    )
+    cells[shapely.get_type_id(cells) != shapely.GeometryType.POLYGON] = Polygon()
+    return cells
+
+
+def get_cells_from_voronoi(voronoi: Voronoi, bounding_box: BoundingBox) -> np.ndarray:
+    """Build the cell of every site directly from its Voronoi region.
+
+    Each cell is the convex hull of its finite region vertices, far points along
+    its infinite ridges and the bounding box corners closest to its site, clipped
+    to the bounding box. The returned array of polygons is aligned with
+    `voronoi.points`, with an empty polygon for sites whose cell misses the box.
+    """
+    site_indices, site_coordinates = _get_cell_outlines(
+        voronoi=voronoi, bounding_box=bounding_box
+    )
+    return _build_cells(
+        site_indices=site_indices,
+        site_coordinates=site_coordinates,
+        start=0,
+        stop=len(voronoi.points),
+        bounding_box=bounding_box,
+    )
 
 
 def create_geodataframe_from_polygons_and_features(
     matched_polygons_and_features: list[tuple[Polygon, dict]]
 ) -> gpd.GeoDataFrame:
+    import geopandas as gpd
+
     gdf = gpd.GeoDataFrame(
         [
             {"geometry": matched_polygon, **matched_feature["properties"]}
@@ -119,6 +290,30 @@ def create_geodataframe_from_polygons_and_features(
     return gdf
 
 
+def create_geodataframe_from_cells_and_properties(
+    cells: np.ndarray,
+    properties: PropertyTable,
+    site_indices: np.ndarray | None = None,
+) -> gpd.GeoDataFrame:
+    """Build a GeoDataFrame indexed by site from cells aligned with property rows.
+
+    Cell i belongs to site `site_indices[i]`, or to site i when they are not
+    given. Sites with an empty cell are left out.
+    """
+    import geopandas as gpd
+
+    cell_indices = np.flatnonzero(~shapely.is_empty(cells))
+    site_indices = (
+        cell_indices if site_indices is None else np.asarray(site_indices)[cell_indices]
+    )
+    gdf = gpd.GeoDataFrame(
+        {"geometry": cells[cell_indices], **properties.take(site_indices).columns},
+        index=site_indices,
+    )
+    gdf = gdf.set_geometry("geometry")
+    return gdf
+
+
 def get_bounding_box(voronoi: Voronoi, mask: Polygon | MultiPolygon) -> BoundingBox:
     finite_vertices = voronoi.vertices[np.all(np.isfinite(voronoi.vertices), axis=1)]
 
@@ -141,36 +336,291 @@ def get_bounding_box(voronoi: Voronoi, mask: Polygon | MultiPolygon) -> Bounding
     )
 
 
-def voronoi_map(
-    features_file_path: Path | str,
-    boundary_file_path: Path | str,
-    bounding_box: BoundingBox | None = None,
-    save_path: Path | str | None = None,
-):
-    points, features = load_points_and_features_from_geojson(
-        geojson_path=features_file_path
+def get_bounding_box_from_points(
+    points: np.ndarray, mask: Polygon | MultiPolygon
+) -> BoundingBox:
+    """Get a bounding box around the points and the mask without a Voronoi diagram."""
+    min_x, min_y = np.min(points, axis=0)
+    max_x, max_y = np.max(points, axis=0)
+
+    mask_min_x, mask_min_y, mask_max_x, mask_max_y = mask.bounds
+
+    return BoundingBox(
+        xmin=min(min_x, mask_min_x) - 1,
+        xmax=max(max_x, mask_max_x) + 1,
+        ymin=min(min_y, mask_min_y) - 1,
+        ymax=max(max_y, mask_max_y) + 1,
     )
-    mask = load_mask_geojson(geojson_path=boundary_file_path)
 
-    voronoi = Voronoi(points)
+
+def get_cells(
+    points: np.ndarray,
+    mask: Polygon | MultiPolygon,
+    bounding_box: BoundingBox | None = None,
+    tiles: tuple[int, int] | None = None,
+    max_workers: int | None = None,
+    instrumentation: Instrumentation | None = None,
+) -> np.ndarray:
+    """Build every site's cell, in one diagram or tile by tile when `tiles` is given.
+
+    The bounding box defaults to one around the sites and the mask.
+    """
+    if tiles is None:
+        with measure_stage(instrumentation, "voronoi") as stage:
+            voronoi = Voronoi(points)
+            stage.items = len(voronoi.vertices)
+
+        bounding_box = (
+            get_bounding_box(voronoi=voronoi, mask=mask)
+            if bounding_box is None
+            else bounding_box
+        )
+
+        with measure_stage(instrumentation, "cells") as stage:
+            cells = get_cells_from_voronoi(voronoi=voronoi, bounding_box=bounding_box)
+            stage.items = len(cells)
+        return cells
+
+    # imported here as the tiling module builds on this one
+    from voronoi_mapper.tiling import get_cells_tiled
 
     bounding_box = (
-        get_bounding_box(voronoi=voronoi, mask=mask)
+        get_bounding_box_from_points(points=points, mask=mask)
         if bounding_box is None
         else bounding_box
     )
 
-    polygons = get_polygons_from_voronoi(voronoi=voronoi, bounding_box=bounding_box)
+    with measure_stage(instrumentation, "cells") as stage:
+        cells = get_cells_tiled(
+            points=points,
+            bounding_box=bounding_box,
+            tiles=tiles,
+            max_workers=max_workers,
+        )
+        stage.items = len(cells)
+    return cells
+
 
-    matched_points = match_point_features_to_polygons(
-        polygons=polygons, features=features
-    )
+def iter_cells(
+    points: np.ndarray,
+    mask: Polygon | MultiPolygon,
+    chunk_size: int,
+    bounding_box: BoundingBox | None = None,
+    tiles: tuple[int, int] | None = None,
+    max_workers: int | None = None,
+) -> Generator[tuple[np.ndarray, np.ndarray], None, None]:
+    """Build the cells of `get_cells` for `chunk_size` nearby sites at a time.
+
+    Yields the site indices of each chunk with their cells. No diagram of all
+    sites is built, see `iter_cells_in_chunks`, so the bounding box defaults to
+    one around the sites and the mask as in tiled runs.
+    """
+    # imported here as the tiling module builds on this one
+    from voronoi_mapper.tiling import iter_cells_in_chunks
 
-    gdf = create_geodataframe_from_polygons_and_features(
-        matched_polygons_and_features=matched_points
+    bounding_box = (
+        get_bounding_box_from_points(points=points, mask=mask)
+        if bounding_box is None
+        else bounding_box
+    )
+    yield from iter_cells_in_chunks(
+        points=points,
+        bounding_box=bounding_box,
+        chunk_size=chunk_size,
+        tiles=tiles,
+        max_workers=max_workers,
     )
 
-    gdf = clip_polygons_to_mask(gdf=gdf, mask=mask)
+
+def iter_clipped_cells(
+    cell_chunks: Iterable[tuple[np.ndarray, np.ndarray]],
+    properties: PropertyTable,
+    mask: PreparedMask,
+) -> Generator[gpd.GeoDataFrame, None, None]:
+    """Match chunks of site indices and cells to their properties and clip them."""
+    for site_indices, cells in cell_chunks:
+        gdf = create_geodataframe_from_cells_and_properties(
+            cells=cells, properties=properties, site_indices=site_indices
+        )
+        yield clip_polygons_to_mask(gdf=gdf, mask=mask)
+
+
+def map_layer(
+    features_file_path: Path | str,
+    mask: PreparedMask,
+    save_path: Path | str | None = None,
+    bounding_box: BoundingBox | None = None,
+    tiles: tuple[int, int] | None = None,
+    max_workers: int | None = None,
+    cache: StageCache | None = None,
+    instrumentation: Instrumentation | None = None,
+    output_format: str | None = None,
+    property_columns: Sequence[str] | None = None,
+    coalesce_tolerance: float | None = None,
+    chunk_size: int | None = None,
+) -> gpd.GeoDataFrame | None:
+    """Map one point layer against a loaded and prepared mask, as `voronoi_map` does.
+
+    Every stage after the mask is run here, so that `voronoi_map` and
+    `voronoi_map_batch` share them. Cached stages are keyed on the mask itself
+    rather than on the boundary file it came from.
+    """
+    if chunk_size is not None and save_path is None:
+        raise ValueError("Streaming cells with a chunk_size needs a save_path.")
+
+    # tiled runs pick a different default bounding box
+    cells_params = {
+        "bounding_box": bounding_box,
+        "tiled": tiles is not None,
+        "mask": mask.mask,
+        "coalesce_tolerance": coalesce_tolerance,
+    }
+
+    def load_layer() -> tuple[np.ndarray, PropertyTable]:
+        with measure_stage(instrumentation, "load_sites") as stage:
+            points, properties = load_sites_cached(
+                file_path=features_file_path, cache=cache, columns=property_columns
+            )
+            stage.items = len(points)
+
+        if coalesce_tolerance is not None:
+            with measure_stage(instrumentation, "coalesce") as stage:
+                points, feature_sites = coalesce_sites(
+                    points=points, tolerance=coalesce_tolerance
+                )
+                properties = coalesce_properties(
+                    properties=properties,
+                    feature_sites=feature_sites,
+                    n_sites=len(points),
+                )
+                stage.items = len(points)
+        return points, properties
+
+    if chunk_size is not None:
+        points, properties = load_layer()
+        cell_chunks = iter_cells(
+            points=points,
+            mask=mask.mask,
+            chunk_size=chunk_size,
+            bounding_box=bounding_box,
+            tiles=tiles,
+            max_workers=max_workers,
+        )
+
+        with measure_stage(instrumentation, "stream") as stage:
+            stage.items = write_cell_chunks(
+                chunks=iter_clipped_cells(
+                    cell_chunks=cell_chunks, properties=properties, mask=mask
+                ),
+                save_path=save_path,
+                properties=properties,
+                output_format=output_format,
+            )
+        return None
+
+    def build_map() -> gpd.GeoDataFrame:
+        points, properties = load_layer()
+        cells = cached_stage(
+            cache=cache,
+            stage="cells",
+            file_paths=[features_file_path],
+            params=cells_params,
+            compute=lambda: get_cells(
+                points=points,
+                mask=mask.mask,
+                bounding_box=bounding_box,
+                tiles=tiles,
+                max_workers=max_workers,
+                instrumentation=instrumentation,
+            ),
+            dump=shapely.to_wkb,
+            load=shapely.from_wkb,
+        )
+
+        with measure_stage(instrumentation, "geodataframe") as stage:
+            gdf = create_geodataframe_from_cells_and_properties(
+                cells=cells, properties=properties
+            )
+            stage.items = len(gdf)
+
+        with measure_stage(instrumentation, "clip") as stage:
+            gdf = clip_polygons_to_mask(gdf=gdf, mask=mask)
+            stage.items = len(gdf)
+        return gdf
+
+    gdf = cached_stage(
+        cache=cache,
+        stage="clipped",
+        file_paths=[features_file_path],
+        params={
+            **cells_params,
+            "property_columns": property_columns,
+            "mask_tile_size": mask.tile_size,
+        },
+        compute=build_map,
+    )
 
     if save_path is not None:
-        gdf.to_file(save_path, driver="GeoJSON")
+        with measure_stage(instrumentation, "write") as stage:
+            write_cells(gdf=gdf, save_path=save_path, output_format=output_format)
+            stage.items = len(gdf)
+    return gdf
+
+
+def voronoi_map(
+    features_file_path: Path | str,
+    boundary_file_path: Path | str,
+    bounding_box: BoundingBox | None = None,
+    save_path: Path | str | None = None,
+    mask_tile_size: float | None = None,
+    tiles: tuple[int, int] | None = None,
+    max_workers: int | None = None,
+    cache_dir: Path | str | None = None,
+    instrumentation: Instrumentation | None = None,
+    output_format: str | None = None,
+    property_columns: Sequence[str] | None = None,
+    mask_simplify_tolerance: float | None = None,
+    mask_coverage: bool = False,
+    coalesce_tolerance: float | None = None,
+    chunk_size: int | None = None,
+) -> gpd.GeoDataFrame | None:
+    """Build the Voronoi cells of point features clipped to a boundary, and save them.
+
+    Returns the clipped cells and their properties, indexed by site.
+
+    `chunk_size` streams cells through building, matching, clipping and writing
+    that many nearby sites at a time rather than all at once, which bounds peak
+    memory. The cells are the same, but rows are written chunk by chunk, it needs
+    a `save_path`, skips the cell caches and nothing is returned.
+    """
+    cache = None if cache_dir is None else StageCache(directory=cache_dir)
+
+    with measure_stage(instrumentation, "load_mask") as stage:
+        # boundary features outside the bounding box cannot reach any cell
+        mask = load_mask_geojson_cached(
+            geojson_path=boundary_file_path,
+            cache=cache,
+            bounding_box=bounding_box,
+            simplify_tolerance=mask_simplify_tolerance,
+            coverage=mask_coverage,
+        )
+        stage.items = int(shapely.get_num_coordinates(mask))
+
+    with measure_stage(instrumentation, "prepare_mask") as stage:
+        prepared_mask = PreparedMask(mask=mask, tile_size=mask_tile_size)
+        stage.items = len(prepared_mask.parts)
+
+    return map_layer(
+        features_file_path=features_file_path,
+        mask=prepared_mask,
+        save_path=save_path,
+        bounding_box=bounding_box,
+        tiles=tiles,
+        max_workers=max_workers,
+        cache=cache,
+        instrumentation=instrumentation,
+        output_format=output_format,
+        property_columns=property_columns,
+        coalesce_tolerance=coalesce_tolerance,
+        chunk_size=chunk_size,
+    )
@@ -0,0 +1,436 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+import numpy as np
+import shapely
+from voronoi_mapper.properties import PropertyTable
+
+if TYPE_CHECKING:
+    import geopandas as gpd
+    from pyproj import CRS
+
+OUTPUT_FORMATS = {
+    ".geojson": "geojson",
+    ".json": "geojson",
+    ".parquet": "geoparquet",
+    ".geoparquet": "geoparquet",
+    ".fgb": "flatgeobuf",
+    ".arrow": "wkb_arrow",
+}
+
+DEFAULT_CHUNK_SIZE = 65_536
+
+_GEOMETRY_TYPES = {
+    shapely.GeometryType.POLYGON: "Polygon",
+    shapely.GeometryType.MULTIPOLYGON: "MultiPolygon",
+}
+
+
+def get_output_format(save_path: Path | str, output_format: str | None = None) -> str:
+    """Get the output format to write, from `output_format` or else the file extension.
+
+    Unknown extensions are written as GeoJSON.
+    """
+    if output_format is None:
+        return OUTPUT_FORMATS.get(Path(save_path).suffix.lower(), "geojson")
+
+    if output_format not in OUTPUT_FORMATS.values():
+        raise ValueError(
+            f"Unknown output format {output_format}, "
+            f"expected one of {sorted(set(OUTPUT_FORMATS.values()))}."
+        )
+    return output_format
+
+
+_MISSING_FORMATS_MESSAGE = (
+    "Writing GeoParquet, FlatGeobuf or Arrow output, or writing cells in "
+    "chunks, needs pyarrow and pyogrio, install them with "
+    "`pip install voronoi-mapper[formats]`."
+)
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as error:  # pragma: no cover
+        raise ImportError(_MISSING_FORMATS_MESSAGE) from error
+    return pyarrow
+
+
+def _get_geometry_types(geometries: np.ndarray) -> list[str]:
+    return _get_geometry_type_names(np.unique(shapely.get_type_id(geometries)))
+
+
+def _get_geometry_type_names(type_ids: Iterable[int]) -> list[str]:
+    """Name the geometry types, an empty list stands for any type in GeoParquet."""
+    type_ids = sorted(type_ids)
+    if not all(type_id in _GEOMETRY_TYPES for type_id in type_ids):
+        return []
+    return [_GEOMETRY_TYPES[type_id] for type_id in type_ids]
+
+
+def _get_flatgeobuf_geometry_type(geometry_types: list[str]) -> str:
+    return geometry_types[0] if len(geometry_types) == 1 else "Unknown"
+
+
+def _get_frame_property_schema(gdf: gpd.GeoDataFrame):
+    pa = _import_pyarrow()
+    properties = gdf.drop(columns=gdf.geometry.name)
+    return pa.Schema.from_pandas(properties, preserve_index=False).remove_metadata()
+
+
+def _get_table_property_schema(properties: PropertyTable):
+    """Get the Arrow types pyarrow picks for a frame of the table, without the frame.
+
+    pandas may convert a column to a dtype of its own, as it can for strings, so
+    the type of a typed or string column comes from a frame of one of its values.
+    Other object columns are scanned as pyarrow scans them in a frame.
+    """
+    import pandas as pd
+
+    pa = _import_pyarrow()
+    fields = []
+    for name, column in properties.columns.items():
+        if column.dtype == object and pd.api.types.infer_dtype(column) != "string":
+            fields.append(pa.field(name, pa.infer_type(column, from_pandas=True)))
+            continue
+        sample = pd.DataFrame({name: column[pd.notna(column)][:1]})
+        fields.append(pa.Schema.from_pandas(sample, preserve_index=False).field(name))
+    return pa.schema(fields)
+
+
+def _get_schema(property_schema, geometry_metadata: dict[bytes, bytes]):
+    pa = _import_pyarrow()
+    return property_schema.append(
+        pa.field("geometry", pa.binary(), metadata=geometry_metadata)
+    )
+
+
+def _iter_record_batches(gdf: gpd.GeoDataFrame, schema, chunk_size: int) -> Iterator:
+    """Convert the frame to Arrow record batches of WKB geometry and properties."""
+    pa = _import_pyarrow()
+    properties = gdf.drop(columns=gdf.geometry.name)
+    property_schema = schema.remove(schema.get_field_index("geometry"))
+    geometries = gdf.geometry.to_numpy()
+
+    for start in range(0, len(gdf), chunk_size):
+        stop = start + chunk_size
+        batch = pa.RecordBatch.from_pandas(
+            properties.iloc[start:stop], schema=property_schema, preserve_index=False
+        )
+        yield pa.RecordBatch.from_arrays(
+            [*batch.columns, pa.array(shapely.to_wkb(geometries[start:stop]))],
+            schema=schema,
+        )
+
+
+def _get_geoparquet_schema(
+    property_schema,
+    crs: CRS | None,
+    geometry_types: list[str],
+    bbox: list[float] | None,
+):
+    column_metadata = {
+        "encoding": "WKB",
+        "geometry_types": geometry_types,
+        "crs": None if crs is None else crs.to_json_dict(),
+    }
+    # the bbox is optional, and needs four numbers when given
+    if bbox is not None:
+        column_metadata["bbox"] = bbox
+    geo_metadata = {
+        "version": "1.0.0",
+        "primary_column": "geometry",
+        "columns": {"geometry": column_metadata},
+    }
+    schema = _get_schema(property_schema=property_schema, geometry_metadata={})
+    return schema.with_metadata({b"geo": json.dumps(geo_metadata).encode("utf-8")})
+
+
+def _write_geoparquet_batches(batches: Iterable, schema, save_path: Path | str):
+    pa = _import_pyarrow()
+    import pyarrow.parquet as pq
+
+    with pq.ParquetWriter(save_path, schema=schema) as writer:
+        for batch in batches:
+            writer.write_table(pa.Table.from_batches([batch]))
+
+
+def write_geoparquet(
+    gdf: gpd.GeoDataFrame, save_path: Path | str, chunk_size: int = DEFAULT_CHUNK_SIZE
+):
+    """Write cells as GeoParquet with WKB geometry, one row group per chunk."""
+    schema = _get_geoparquet_schema(
+        property_schema=_get_frame_property_schema(gdf=gdf),
+        crs=gdf.crs,
+        geometry_types=_get_geometry_types(gdf.geometry.to_numpy()),
+        bbox=gdf.total_bounds.tolist() if len(gdf) else None,
+    )
+    _write_geoparquet_batches(
+        batches=_iter_record_batches(gdf=gdf, schema=schema, chunk_size=chunk_size),
+        schema=schema,
+        save_path=save_path,
+    )
+
+
+def _get_wkb_arrow_schema(property_schema, crs: CRS | None):
+    extension_metadata = {} if crs is None else {"crs": crs.to_json_dict()}
+    return _get_schema(
+        property_schema=property_schema,
+        geometry_metadata={
+            b"ARROW:extension:name": b"geoarrow.wkb",
+            b"ARROW:extension:metadata": json.dumps(extension_metadata).encode("utf-8"),
+        },
+    )
+
+
+def _write_wkb_arrow_batches(batches: Iterable, schema, save_path: Path | str):
+    pa = _import_pyarrow()
+
+    with pa.ipc.new_file(save_path, schema=schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+
+
+def write_wkb_arrow(
+    gdf: gpd.GeoDataFrame, save_path: Path | str, chunk_size: int = DEFAULT_CHUNK_SIZE
+):
+    """Write cells as an Arrow IPC file with a geoarrow.wkb geometry column."""
+    schema = _get_wkb_arrow_schema(
+        property_schema=_get_frame_property_schema(gdf=gdf), crs=gdf.crs
+    )
+    _write_wkb_arrow_batches(
+        batches=_iter_record_batches(gdf=gdf, schema=schema, chunk_size=chunk_size),
+        schema=schema,
+        save_path=save_path,
+    )
+
+
+def _get_ogr_schema(property_schema):
+    return _get_schema(
+        property_schema=property_schema,
+        geometry_metadata={b"ARROW:extension:name": b"geoarrow.wkb"},
+    )
+
+
+def _write_ogr_batches(
+    batches: Iterable,
+    schema,
+    save_path: Path | str,
+    driver: str,
+    geometry_type: str,
+    crs,
+):
+    """Stream record batches to a GDAL driver."""
+    pa = _import_pyarrow()
+    try:
+        from pyogrio.raw import write_arrow
+    except ImportError as error:  # pragma: no cover
+        raise ImportError(_MISSING_FORMATS_MESSAGE) from error
+
+    write_arrow(
+        pa.RecordBatchReader.from_batches(schema, batches),
+        str(save_path),
+        driver=driver,
+        geometry_name="geometry",
+        geometry_type=geometry_type,
+        crs=None if crs is None else crs.to_wkt(),
+    )
+
+
+def write_flatgeobuf(
+    gdf: gpd.GeoDataFrame, save_path: Path | str, chunk_size: int = DEFAULT_CHUNK_SIZE
+):
+    """Write cells as FlatGeobuf, streaming record batches to GDAL."""
+    schema = _get_ogr_schema(property_schema=_get_frame_property_schema(gdf=gdf))
+    _write_ogr_batches(
+        batches=_iter_record_batches(gdf=gdf, schema=schema, chunk_size=chunk_size),
+        schema=schema,
+        save_path=save_path,
+        driver="FlatGeobuf",
+        geometry_type=_get_flatgeobuf_geometry_type(
+            _get_geometry_types(gdf.geometry.to_numpy())
+        ),
+        crs=gdf.crs,
+    )
+
+
+def write_cells(
+    gdf: gpd.GeoDataFrame,
+    save_path: Path | str,
+    output_format: str | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+):
+    """
+    Write a GeoDataFrame of cells in the format given or implied by the extension.
+
+    Parameters:
+    - gdf (gpd.GeoDataFrame): The cells and their properties.
+    - save_path (Path | str): Where to write, the index is not written.
+    - output_format (str | None): One of "geojson", "geoparquet", "flatgeobuf" or
+      "wkb_arrow", defaults to the one matching the extension of `save_path`.
+    - chunk_size (int): Rows converted and written at a time by the binary writers.
+    """
+    output_format = get_output_format(save_path=save_path, output_format=output_format)
+
+    if output_format == "geojson":
+        # the default engine of geopandas < 1.0 is fiona, which cannot write list
+        # properties and writes GeoJSON unlike the chunked writer
+        engine = "pyogrio" if importlib.util.find_spec("pyogrio") else None
+        gdf.to_file(save_path, driver="GeoJSON", engine=engine)
+    elif output_format == "geoparquet":
+        write_geoparquet(gdf=gdf, save_path=save_path, chunk_size=chunk_size)
+    elif output_format == "flatgeobuf":
+        write_flatgeobuf(gdf=gdf, save_path=save_path, chunk_size=chunk_size)
+    else:
+        write_wkb_arrow(gdf=gdf, save_path=save_path, chunk_size=chunk_size)
+
+
+class _GeometrySummary:
+    """The geometry types and bounds of the cells seen so far."""
+
+    def __init__(self):
+        self.type_ids: set[int] = set()
+        self.bounds: np.ndarray | None = None
+
+    def update(self, geometries: np.ndarray):
+        if len(geometries) == 0:
+            return
+        self.type_ids.update(np.unique(shapely.get_type_id(geometries)).tolist())
+        bounds = shapely.total_bounds(geometries)
+        if self.bounds is not None:
+            bounds = np.concatenate(
+                [
+                    np.minimum(self.bounds[:2], bounds[:2]),
+                    np.maximum(self.bounds[2:], bounds[2:]),
+                ]
+            )
+        self.bounds = bounds
+
+    @property
+    def geometry_types(self) -> list[str]:
+        return _get_geometry_type_names(self.type_ids)
+
+    @property
+    def bbox(self) -> list[float] | None:
+        return None if self.bounds is None else self.bounds.tolist()
+
+
+def _iter_chunk_record_batches(
+    chunks: Iterable[gpd.GeoDataFrame],
+    schema,
+    chunk_size: int,
+    summary: _GeometrySummary,
+) -> Iterator:
+    for chunk in chunks:
+        summary.update(chunk.geometry.to_numpy())
+        yield from _iter_record_batches(gdf=chunk, schema=schema, chunk_size=chunk_size)
+
+
+def write_cell_chunks(
+    chunks: Iterable[gpd.GeoDataFrame],
+    save_path: Path | str,
+    properties: PropertyTable,
+    crs: CRS | None = None,
+    output_format: str | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """
+    Write cells arriving as a stream of GeoDataFrames, holding one chunk at a time.
+
+    The file matches the one `write_cells` writes for all chunks joined together.
+    GeoParquet and FlatGeobuf need the geometry types of all cells before the
+    first row, so their rows are spooled to a temporary Arrow file next to
+    `save_path` first.
+
+    Parameters:
+    - chunks (Iterable[gpd.GeoDataFrame]): The cells and their properties, in output order.
+    - save_path (Path | str): Where to write, the index is not written.
+    - properties (PropertyTable): The properties of all sites the chunks are cut
+      from, their column types are used for every chunk so that they do not depend
+      on the rows of the first one.
+    - crs (CRS | None): The crs of the chunks.
+    - output_format (str | None): As in `write_cells`.
+    - chunk_size (int): Rows converted and written at a time.
+
+    Returns:
+    - int: The number of cells written.
+    """
+    pa = _import_pyarrow()
+    output_format = get_output_format(save_path=save_path, output_format=output_format)
+
+    property_schema = _get_table_property_schema(properties=properties)
+    summary = _GeometrySummary()
+    written = 0
+
+    def iter_batches(schema) -> Iterator:
+        nonlocal written
+        for batch in _iter_chunk_record_batches(
+            chunks=chunks, schema=schema, chunk_size=chunk_size, summary=summary
+        ):
+            written += batch.num_rows
+            yield batch
+
+    if output_format == "geojson":
+        schema = _get_ogr_schema(property_schema=property_schema)
+        _write_ogr_batches(
+            batches=iter_batches(schema),
+            schema=schema,
+            save_path=save_path,
+            driver="GeoJSON",
+            geometry_type="Unknown",
+            crs=crs,
+        )
+        return written
+
+    if output_format == "wkb_arrow":
+        schema = _get_wkb_arrow_schema(property_schema=property_schema, crs=crs)
+        _write_wkb_arrow_batches(
+            batches=iter_batches(schema), schema=schema, save_path=save_path
+        )
+        return written
+
+    # the spool is kept on the same disk as the output rather than in memory
+    with tempfile.TemporaryDirectory(dir=Path(save_path).parent) as spool_directory:
+        spool_path = Path(spool_directory) / "cells.arrow"
+        spool_schema = _get_ogr_schema(property_schema=property_schema)
+        _write_wkb_arrow_batches(
+            batches=iter_batches(spool_schema),
+            schema=spool_schema,
+            save_path=spool_path,
+        )
+
+        with pa.ipc.open_file(pa.memory_map(str(spool_path))) as reader:
+            spooled_batches = (
+                reader.get_batch(i) for i in range(reader.num_record_batches)
+            )
+            if output_format == "geoparquet":
+                schema = _get_geoparquet_schema(
+                    property_schema=property_schema,
+                    crs=crs,
+                    geometry_types=summary.geometry_types,
+                    bbox=summary.bbox,
+                )
+                _write_geoparquet_batches(
+                    batches=(
+                        pa.RecordBatch.from_arrays(batch.columns, schema=schema)
+                        for batch in spooled_batches
+                    ),
+                    schema=schema,
+                    save_path=save_path,
+                )
+            else:
+                _write_ogr_batches(
+                    batches=spooled_batches,
+                    schema=spool_schema,
+                    save_path=save_path,
+                    driver="FlatGeobuf",
+                    geometry_type=_get_flatgeobuf_geometry_type(summary.geometry_types),
+                    crs=crs,
+                )
+    return written